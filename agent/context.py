@@ -0,0 +1,226 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+# Context window settings (overridable from the environment)
+CONTEXT_KEEP_TURNS = int(os.environ.get("AGENT_CONTEXT_KEEP_TURNS", "4"))
+CONTEXT_MAX_PROMPT_TOKENS = int(os.environ.get("AGENT_CONTEXT_MAX_PROMPT_TOKENS", "6000"))
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.environ.get("AGENT_CONTEXT_SUMMARY_MAX_TOKENS", "400"))
+CONTEXT_SUMMARIZE = os.environ.get("AGENT_CONTEXT_SUMMARIZE", "true").lower() == "true"
+
+SUMMARY_PROMPT = """You maintain a running summary of a travel-planning conversation.
+Merge the previous summary with the new messages into one short summary.
+Keep concrete facts: destinations, dates, budget, passengers, preferences, chosen flights/hotels and bookings.
+Drop greetings and formatting. Reply with the summary only."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message: BaseMessage) -> int:
+    content = message.content
+    if isinstance(content, list):
+        content = "".join(item.get("text", "") if isinstance(item, dict) else str(item) for item in content)
+    # Small per-message overhead for role/formatting tokens
+    return estimate_tokens(str(content)) + 4
+
+
+def count_tokens(messages: List[BaseMessage]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+class _SummaryState:
+    __slots__ = ("summary", "last_covered")
+
+    def __init__(self):
+        self.summary = ""
+        self.last_covered: Optional[BaseMessage] = None
+
+
+class ConversationContextManager:
+    """Builds a bounded prompt from a conversation's history.
+
+    The last keep_turns turns are sent verbatim; older turns are rolled into a
+    running summary that is cached per conversation id and only extended with
+    the turns that newly fell out of the window. The assembled prompt is then
+    trimmed to max_prompt_tokens before the agent is invoked.
+    """
+
+    def __init__(self, llm=None, keep_turns: int = CONTEXT_KEEP_TURNS,
+                 max_prompt_tokens: int = CONTEXT_MAX_PROMPT_TOKENS,
+                 summary_max_tokens: int = CONTEXT_SUMMARY_MAX_TOKENS,
+                 summarize: bool = CONTEXT_SUMMARIZE, max_cached_summaries: int = 1000):
+        self.llm = llm
+        self.keep_turns = keep_turns
+        self.max_prompt_tokens = max_prompt_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.summarize = summarize and llm is not None
+        self.max_cached_summaries = max_cached_summaries
+        self._summaries: "OrderedDict[Hashable, _SummaryState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prepare(self, system_prompt: str, chat_history, user_request: str) -> Tuple[List[BaseMessage], Dict[str, Any]]:
+        """Return (messages, stats) for one agent invocation."""
+        history, state, window_start, new_older = self._split(chat_history)
+        if new_older:
+            summary = None
+            if self.summarize:
+                try:
+                    summary = self._text(self.llm.invoke(self._summary_request(state.summary, new_older)))
+                except Exception as e:
+                    print(f"Warning: History summarization failed, using extractive summary: {e}")
+            self._store_summary(state, summary, new_older)
+        return self._assemble(system_prompt, history, window_start, state.summary, user_request)
+
+    async def aprepare(self, system_prompt: str, chat_history, user_request: str) -> Tuple[List[BaseMessage], Dict[str, Any]]:
+        """Async variant of prepare (summarizes with the async LLM client)."""
+        history, state, window_start, new_older = self._split(chat_history)
+        if new_older:
+            summary = None
+            if self.summarize:
+                try:
+                    summary = self._text(await self.llm.ainvoke(self._summary_request(state.summary, new_older)))
+                except Exception as e:
+                    print(f"Warning: History summarization failed, using extractive summary: {e}")
+            self._store_summary(state, summary, new_older)
+        return self._assemble(system_prompt, history, window_start, state.summary, user_request)
+
+    def forget(self, chat_history) -> None:
+        """Drop the cached summary for a history (e.g. after reset)."""
+        with self._lock:
+            self._summaries.pop(self._key(chat_history), None)
+
+    def _split(self, chat_history):
+        history = [m for m in chat_history.messages if not isinstance(m, SystemMessage)]
+
+        # The verbatim window starts at the keep_turns-th most recent user message
+        window_start = len(history)
+        turns = 0
+        for i in range(len(history) - 1, -1, -1):
+            if isinstance(history[i], HumanMessage):
+                turns += 1
+                window_start = i
+                if turns >= self.keep_turns:
+                    break
+        if self.keep_turns <= 0:
+            window_start = len(history)
+
+        state = self._state_for(chat_history)
+        older = history[:window_start]
+
+        # Work out which older messages the cached summary doesn't cover yet
+        new_older = older
+        if state.last_covered is not None:
+            covered_idx = next((i for i in range(len(older) - 1, -1, -1) if older[i] is state.last_covered), -1)
+            if covered_idx >= 0:
+                new_older = older[covered_idx + 1:]
+            elif any(m is state.last_covered for m in history):
+                # Covered message is back inside the window (window grew); nothing to roll up
+                new_older = []
+            else:
+                # History was cleared or replaced; start over
+                state.summary = ""
+                state.last_covered = None
+        return history, state, window_start, new_older
+
+    @staticmethod
+    def _key(chat_history) -> Hashable:
+        # Registry histories carry their conversation id; any other history is keyed by identity
+        return getattr(chat_history, "conversation_id", None) or id(chat_history)
+
+    def _state_for(self, chat_history) -> _SummaryState:
+        key = self._key(chat_history)
+        with self._lock:
+            state = self._summaries.get(key)
+            if state is None:
+                state = _SummaryState()
+                self._summaries[key] = state
+                while len(self._summaries) > self.max_cached_summaries:
+                    self._summaries.popitem(last=False)
+            else:
+                self._summaries.move_to_end(key)
+            return state
+
+    def _summary_request(self, previous: str, messages: List[BaseMessage]) -> List[BaseMessage]:
+        transcript = "\n".join(self._line(m) for m in messages)
+        return [
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=f"Previous summary:\n{previous or '(none)'}\n\nNew messages:\n{transcript}")
+        ]
+
+    def _store_summary(self, state: _SummaryState, summary: Optional[str], new_older: List[BaseMessage]) -> None:
+        if not summary:
+            # Extractive fallback: keep the leading part of each dropped message
+            lines = [state.summary] if state.summary else []
+            lines.extend(self._line(m, limit=200) for m in new_older)
+            summary = "\n".join(lines)
+        # Keep the most recent part if the summary outgrows its budget
+        max_chars = self.summary_max_tokens * 4
+        if len(summary) > max_chars:
+            summary = summary[-max_chars:]
+        state.summary = summary
+        state.last_covered = new_older[-1]
+
+    def _assemble(self, system_prompt: str, history: List[BaseMessage], window_start: int,
+                  summary: str, user_request: str) -> Tuple[List[BaseMessage], Dict[str, Any]]:
+        system = SystemMessage(content=system_prompt)
+        request = HumanMessage(content=user_request)
+        window = history[window_start:]
+        summary_msg = SystemMessage(content=f"Summary of earlier conversation:\n{summary}") if summary else None
+
+        fixed_tokens = message_tokens(system) + message_tokens(request)
+        summary_tokens = message_tokens(summary_msg) if summary_msg else 0
+        window_tokens = [message_tokens(m) for m in window]
+
+        # Enforce the hard budget: drop the oldest verbatim messages first, then the summary
+        dropped = 0
+        total = fixed_tokens + summary_tokens + sum(window_tokens)
+        while window and total > self.max_prompt_tokens:
+            total -= window_tokens.pop(0)
+            window = window[1:]
+            dropped += 1
+        # Never start the window on a dangling assistant reply
+        while window and isinstance(window[0], AIMessage):
+            total -= window_tokens.pop(0)
+            window = window[1:]
+            dropped += 1
+        if summary_msg and total > self.max_prompt_tokens:
+            total -= summary_tokens
+            summary_msg = None
+
+        messages: List[BaseMessage] = [system]
+        if summary_msg:
+            messages.append(summary_msg)
+        messages.extend(window)
+        messages.append(request)
+
+        stats = {
+            "prompt_tokens": total,
+            "unwindowed_prompt_tokens": fixed_tokens + count_tokens(history),
+            "history_messages": len(history),
+            "verbatim_messages": len(window),
+            "summarized_messages": window_start,
+            "budget_dropped_messages": dropped,
+            "max_prompt_tokens": self.max_prompt_tokens
+        }
+        return messages, stats
+
+    @staticmethod
+    def _line(message: BaseMessage, limit: Optional[int] = None) -> str:
+        role = "Assistant" if isinstance(message, AIMessage) else "User"
+        text = ConversationContextManager._text(message)
+        if limit and len(text) > limit:
+            text = text[:limit].rstrip() + "..."
+        return f"{role}: {text}"
+
+    @staticmethod
+    def _text(message: Any) -> str:
+        content = getattr(message, "content", message)
+        if isinstance(content, list):
+            return "".join(item.get("text", "") if isinstance(item, dict) else str(item) for item in content)
+        return str(content or "")
@@ -0,0 +1,310 @@
+import os
+import re
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from agent.tool_output import decode_tool_result
+
+# Opt-in: answer simple "N days in X" requests without the ReAct loop
+AGENT_FAST_PATH = os.environ.get("AGENT_FAST_PATH", "false").lower() == "true"
+
+DEFAULT_ORIGIN = "Mumbai"
+# Days until departure when the request gives no date (matches /api/booking-options)
+DEFAULT_LEAD_DAYS = 7
+
+# Requests that act on earlier turns or need judgement go to the full agent
+AGENT_ONLY = re.compile(
+    r"\b(book|booking|reserve|cancel|change|instead|cheaper|previous|compare|option|prefer|remember|save)\w*\b",
+    re.IGNORECASE
+)
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "couple": 2
+}
+MONTHS = {name: i for i, name in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july",
+     "august", "september", "october", "november", "december"], start=1)}
+MONTHS.update({name[:3]: i for name, i in list(MONTHS.items())})
+
+INTEREST_KEYWORDS = {
+    "adventure": r"adventur\w*|div(?:e|ing)|scuba|trek\w*|hik(?:e|es|ing)|parasail\w*|thrill\w*",
+    "culture": r"cultur\w*|histor\w*|museums?|heritage|forts?",
+    "food": r"food\w*|cuisines?|culinary|eat(?:s|ing)?|restaurants?",
+    "beach": r"beach\w*|sea|ocean|coast\w*|islands?",
+    "nightlife": r"nightlife|part(?:y|ies)|clubs?|clubbing|bars?|night markets?",
+    "wellness": r"wellness|yoga|spas?|relax\w*|meditat\w*",
+}
+INTEREST_PATTERNS = {category: re.compile(rf"\b(?:{words})\b", re.IGNORECASE) for category, words in INTEREST_KEYWORDS.items()}
+STYLE_KEYWORDS = [
+    ("luxury", re.compile(r"\b(luxury|luxurious|5[- ]star|five[- ]star|premium)\b", re.IGNORECASE)),
+    ("budget-friendly", re.compile(r"\b(cheap|affordable|budget[- ](?:friendly|hotel|stay|trip)|backpack\w*)\b", re.IGNORECASE)),
+    ("mid-range", re.compile(r"\b(mid[- ]range|moderate)\b", re.IGNORECASE)),
+]
+
+# Words that end a place name ("5 days in Goa for two", "to Paris with kids")
+PLACE_STOPWORDS = {
+    "for", "with", "from", "on", "under", "in", "around", "during", "starting", "next", "this",
+    "and", "budget", "by", "at", "within", "to", "of", "me", "us", "trip", "vacation", "holiday"
+}
+# Words that can follow "to"/"in" but never start a place name ("want to go to Paris")
+NOT_PLACES = {
+    "the", "my", "our", "a", "an", "go", "travel", "visit", "see", "plan", "spend", "fly", "stay",
+    "have", "get", "take", "explore", "do", "be", "relax", "enjoy", "book", "mind", "total"
+}
+# The name is captured inside a lookahead so later candidates are still found
+PLACE_PATTERN = re.compile(r"\b(?:to|in|visit(?:ing)?|explore|exploring)\s+(?=([A-Za-z][A-Za-z .'-]*))", re.IGNORECASE)
+ORIGIN_PATTERN = re.compile(r"\bfrom\s+([A-Za-z][A-Za-z .'-]*)", re.IGNORECASE)
+DURATION_PATTERN = re.compile(r"\b(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten)[\s-]*(day|night|week)s?\b", re.IGNORECASE)
+BUDGET_PATTERN = re.compile(
+    r"(?:\$\s*(\d[\d,]*(?:\.\d+)?)\s*(k)?|\b(\d[\d,]*(?:\.\d+)?)\s*(k)?\s*(?:usd|dollars)\b|\bbudget(?:\s+(?:of|is|around))?\s+\$?\s*(\d[\d,]*(?:\.\d+)?)\s*(k)?)",
+    re.IGNORECASE
+)
+PASSENGER_PATTERN = re.compile(
+    r"\b(\d+|one|two|three|four|five|six|seven|eight|nine|ten|couple)\s+(?:of\s+us|people|persons|passengers|travell?ers|adults|guests|friends)\b",
+    re.IGNORECASE
+)
+ISO_DATE_PATTERN = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+
+FAST_PATH_INSTRUCTIONS = """The tools for this request have already been run; their results are below
+(JSON; lists are encoded as {{"columns": [...], "rows": [[...], ...]}}). Do not call tools.
+Using only these results, write the complete travel plan: recommended flight and hotel with prices,
+weather, activities, the budget breakdown and the day-by-day itinerary. Mention alternatives briefly.
+
+Parsed request: {intent}
+
+Tool results:
+{results}"""
+
+
+class TripIntent(BaseModel):
+    destination: str
+    origin: str = DEFAULT_ORIGIN
+    num_days: int
+    start_date: str
+    end_date: str
+    budget: Optional[float] = None
+    passengers: int = 1
+    interests: List[str] = []
+    accommodation_style: str = "any"
+
+
+def _number(word: str) -> Optional[int]:
+    word = word.lower()
+    return int(word) if word.isdigit() else NUMBER_WORDS.get(word)
+
+
+def _place(match: Optional[re.Match]) -> Optional[str]:
+    """Take the words of a place name up to the first stopword or punctuation."""
+    if not match:
+        return None
+    words = []
+    for word in re.split(r"\s+", re.split(r"[,.!?;]", match.group(1))[0].strip()):
+        if not word or word.lower() in PLACE_STOPWORDS or len(words) == 3:
+            break
+        words.append(word)
+    first = words[0].lower() if words else None
+    if not first or first in MONTHS or first in NUMBER_WORDS or first in NOT_PLACES:
+        return None
+    return " ".join(w[:1].upper() + w[1:] for w in words)
+
+
+def _month_start(month: int, today: date) -> date:
+    """First day of the next occurrence of month (a week out if it is this month)."""
+    if month == today.month:
+        return today + timedelta(days=DEFAULT_LEAD_DAYS)
+    year = today.year if month > today.month else today.year + 1
+    return date(year, month, 1)
+
+
+def parse_trip_request(text: str, today: Optional[date] = None) -> Optional[TripIntent]:
+    """Extract a self-contained trip request, or None if the full agent should handle it.
+
+    Needs at least a destination and a duration (or start and end dates).
+    """
+    if AGENT_ONLY.search(text):
+        return None
+    today = today or date.today()
+
+    destination = None
+    for match in PLACE_PATTERN.finditer(text):
+        destination = _place(match)
+        if destination:
+            break
+    if not destination:
+        return None
+
+    dates = ISO_DATE_PATTERN.findall(text)
+    try:
+        start = datetime.strptime(dates[0], "%Y-%m-%d").date() if dates else None
+        end = datetime.strptime(dates[1], "%Y-%m-%d").date() if len(dates) > 1 else None
+    except ValueError:
+        return None
+
+    num_days = None
+    duration = DURATION_PATTERN.search(text)
+    if duration:
+        count = _number(duration.group(1))
+        unit = duration.group(2).lower()
+        num_days = count * 7 if unit == "week" else count + 1 if unit == "night" else count
+    elif start and end and end > start:
+        num_days = (end - start).days + 1
+    if not num_days or num_days < 1 or num_days > 30:
+        return None
+
+    if not start:
+        month = next((MONTHS[w] for w in re.findall(r"[a-z]+", text.lower()) if w in MONTHS and w != "may"), None)
+        start = _month_start(month, today) if month else today + timedelta(days=DEFAULT_LEAD_DAYS)
+    if not end or end <= start:
+        end = start + timedelta(days=max(num_days - 1, 1))
+
+    budget = None
+    budget_match = BUDGET_PATTERN.search(text)
+    if budget_match:
+        amount, thousands = next((budget_match.group(i), budget_match.group(i + 1)) for i in (1, 3, 5) if budget_match.group(i))
+        budget = float(amount.replace(",", "")) * (1000 if thousands else 1)
+
+    passengers = 1
+    passenger_match = PASSENGER_PATTERN.search(text)
+    if passenger_match:
+        passengers = min(max(_number(passenger_match.group(1)) or 1, 1), 10)
+
+    interests = [category for category, pattern in INTEREST_PATTERNS.items() if pattern.search(text)]
+    style = next((name for name, pattern in STYLE_KEYWORDS if pattern.search(text)), "any")
+
+    return TripIntent(
+        destination=destination,
+        origin=_place(ORIGIN_PATTERN.search(text)) or DEFAULT_ORIGIN,
+        num_days=num_days,
+        start_date=start.isoformat(),
+        end_date=end.isoformat(),
+        budget=budget,
+        passengers=passengers,
+        interests=interests,
+        accommodation_style=style
+    )
+
+
+class FastPathPlanner:
+    """Plans a parsed trip request with one LLM call.
+
+    The search tools run concurrently in Python (through the same cache,
+    executor and timeouts as the agent), the picks, budget and itinerary are
+    computed deterministically, and a single LLM call writes the prose.
+    """
+
+    def __init__(self, llm, tools: Dict[str, Any]):
+        self.llm = llm
+        self.tools = tools
+
+    async def _call(self, name: str, args: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        raw = await self.tools[name].ainvoke(args)
+        return raw, decode_tool_result(raw)
+
+    async def run_tools(self, intent: TripIntent) -> AsyncIterator[Dict[str, Any]]:
+        """Yield tool_start/tool_end events, then a results event with every tool output."""
+        results: Dict[str, str] = {}
+
+        _, prefs = await self._call("get_user_preferences", {})
+        prefs = prefs.get("preferences", {})
+        style = intent.accommodation_style
+        if style == "any" and prefs.get("accommodation_style") in {"luxury", "budget-friendly", "mid-range"}:
+            style = prefs["accommodation_style"]
+        saved_interests = prefs.get("interests") if isinstance(prefs.get("interests"), list) else []
+        interests = intent.interests or [i for i in saved_interests if isinstance(i, str)]
+
+        nights = max(intent.num_days - 1, 1)
+        searches = {
+            "search_flights": {"origin": intent.origin, "destination": intent.destination, "date": intent.start_date},
+            "search_hotels": {"city": intent.destination, "check_in": intent.start_date,
+                              "check_out": intent.end_date, "accommodation_style": style},
+            "get_weather_forecast": {"city": intent.destination, "date": intent.start_date},
+            "search_activities": {"city": intent.destination, "categories": interests or None},
+        }
+        if intent.budget:
+            # Same split as /api/booking-options: 40% flights, 40% accommodation
+            searches["search_flights"]["max_budget"] = intent.budget * 0.4 / intent.passengers
+            searches["search_hotels"]["max_price_per_night"] = intent.budget * 0.4 / nights
+
+        for name, args in searches.items():
+            yield {"type": "tool_start", "tool": name, "input": args}
+        outputs = await asyncio.gather(*(self._call(name, args) for name, args in searches.items()))
+        decoded = {}
+        for name, (raw, data) in zip(searches, outputs):
+            results[name], decoded[name] = raw, data
+            yield {"type": "tool_end", "tool": name}
+
+        flights = decoded["search_flights"].get("flights", [])
+        hotels = decoded["search_hotels"].get("hotels", [])
+        activities = sorted(decoded["search_activities"].get("activities", []), key=lambda a: -a.get("rating", 0))[:3]
+        flight = min(flights, key=lambda f: f.get("price", 0)) if flights else {}
+        hotel = max(hotels, key=lambda h: h.get("rating", 0)) if hotels else {}
+
+        follow_ups = {
+            "calculate_trip_budget": {
+                # Flight prices are one way per person
+                "flight_cost": flight.get("price", 0) * 2 * intent.passengers,
+                "hotel_cost_per_night": hotel.get("price_per_night", 0),
+                "num_nights": nights,
+                "activity_costs": [a.get("price", 0) * intent.passengers for a in activities],
+            },
+            "create_day_by_day_itinerary": {
+                "destination": intent.destination,
+                "num_days": intent.num_days,
+                "activities": [a.get("name", "") for a in activities],
+                "hotel_name": hotel.get("name", "your hotel"),
+                "special_interests": interests or None,
+            },
+        }
+        for name, args in follow_ups.items():
+            yield {"type": "tool_start", "tool": name, "input": args}
+        outputs = await asyncio.gather(*(self._call(name, args) for name, args in follow_ups.items()))
+        for name, (raw, _) in zip(follow_ups, outputs):
+            results[name] = raw
+            yield {"type": "tool_end", "tool": name}
+
+        yield {"type": "results", "results": results}
+
+    @staticmethod
+    def prose_messages(messages: List[BaseMessage], user_request: str, intent: TripIntent,
+                       results: Dict[str, str]) -> List[BaseMessage]:
+        """Replace the final user message with the request plus the tool results."""
+        block = "\n".join(f"{name}: {output}" for name, output in results.items())
+        instructions = FAST_PATH_INSTRUCTIONS.format(intent=intent.model_dump_json(exclude_none=True), results=block)
+        return messages[:-1] + [HumanMessage(content=f"{user_request}\n\n{instructions}")]
+
+    async def aplan(self, messages: List[BaseMessage], user_request: str, intent: TripIntent) -> Dict[str, Any]:
+        """Run the pipeline and return the agent-shaped result ({"messages": [...]})."""
+        results = {}
+        async for event in self.run_tools(intent):
+            if event["type"] == "results":
+                results = event["results"]
+        prompt = self.prose_messages(messages, user_request, intent, results)
+        answer = await self.llm.ainvoke(prompt)
+        return {"messages": prompt + [answer]}
+
+    async def astream(self, messages: List[BaseMessage], user_request: str,
+                      intent: TripIntent) -> AsyncIterator[Dict[str, Any]]:
+        """Like aplan, but yields tool and token events; the last event is {"type": "result"}."""
+        results = {}
+        async for event in self.run_tools(intent):
+            if event["type"] == "results":
+                results = event["results"]
+            else:
+                yield event
+        prompt = self.prose_messages(messages, user_request, intent, results)
+        answer = None
+        async for chunk in self.llm.astream(prompt):
+            answer = chunk if answer is None else answer + chunk
+            content = chunk.content
+            if isinstance(content, list):
+                content = "".join(item.get("text", "") if isinstance(item, dict) else str(item) for item in content)
+            if content:
+                yield {"type": "token", "content": content}
+        final = AIMessage(content=answer.content if answer is not None else "",
+                          usage_metadata=getattr(answer, "usage_metadata", None))
+        yield {"type": "result", "result": {"messages": prompt + [final]}}
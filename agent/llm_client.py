@@ -0,0 +1,222 @@
+import os
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+import httpx
+import openai
+from langchain_openai import ChatOpenAI
+
+# Shared LLM client settings (overridable from the environment)
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE = int(os.environ.get("LLM_MAX_KEEPALIVE", "32"))
+LLM_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "10"))
+# Retries on 408/409/429/5xx and connection errors, with jittered exponential
+# backoff that honours Retry-After (the OpenAI SDK's retry policy)
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+# LLM requests allowed in flight per process; the rest queue in FIFO order
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+# How long a request may wait in that queue before giving up
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", "30"))
+
+
+class LLMBusy(Exception):
+    """Raised when an LLM request waited too long for an in-flight slot."""
+
+
+class _Waiter:
+    __slots__ = ("wake", "granted", "cancelled")
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+
+class InFlightLimiter:
+    """FIFO semaphore shared by threads and event loops.
+
+    Sync callers (the threadpool) and async callers (the event loop) draw from
+    the same pool of slots, so the cap holds for the whole process.
+    """
+
+    def __init__(self, limit: int = LLM_MAX_CONCURRENCY, queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: "deque[_Waiter]" = deque()
+        self._lock = threading.Lock()
+        self.queued_total = 0
+        self.rejected_total = 0
+        self.peak_queued = 0
+
+    def _try_acquire(self, waiter: _Waiter) -> bool:
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return True
+            self._waiters.append(waiter)
+            self.queued_total += 1
+            self.peak_queued = max(self.peak_queued, len(self._waiters))
+            return False
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Leave the queue; False if a slot was handed over in the meantime."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            waiter.cancelled = True
+            self._waiters.remove(waiter)
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.cancelled:
+                    # Hand the slot straight to the next waiter
+                    waiter.granted = True
+                    waiter.wake()
+                    return
+            self._active -= 1
+
+    def acquire(self) -> None:
+        event = threading.Event()
+        waiter = _Waiter(event.set)
+        if self._try_acquire(waiter):
+            return
+        if not event.wait(self.queue_timeout) and self._abandon(waiter):
+            self._reject()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = _Waiter(lambda: loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None)))
+        if self._try_acquire(waiter):
+            return
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                self._reject()
+        except BaseException:
+            # Cancelled while queued: give back a slot we may have just been handed
+            if not self._abandon(waiter):
+                self.release()
+            raise
+
+    def _reject(self):
+        with self._lock:
+            self.rejected_total += 1
+        raise LLMBusy("The AI planner is busy right now, please try again in a moment")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self._active,
+                "queued": len(self._waiters),
+                "peak_queued": self.peak_queued,
+                "queued_total": self.queued_total,
+                "rejected_total": self.rejected_total
+            }
+
+
+llm_limiter = InFlightLimiter()
+
+# Set while a call holds a slot, so nested calls (e.g. _generate -> _stream) don't take a second one
+_holding_slot: ContextVar[bool] = ContextVar("llm_holding_slot", default=False)
+
+
+@contextmanager
+def _slot():
+    if _holding_slot.get():
+        yield
+        return
+    llm_limiter.acquire()
+    token = _holding_slot.set(True)
+    try:
+        yield
+    finally:
+        _holding_slot.reset(token)
+        llm_limiter.release()
+
+
+@asynccontextmanager
+async def _aslot():
+    if _holding_slot.get():
+        yield
+        return
+    await llm_limiter.aacquire()
+    token = _holding_slot.set(True)
+    try:
+        yield
+    finally:
+        _holding_slot.reset(token)
+        llm_limiter.release()
+
+
+class LimitedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose requests count against the process-wide in-flight limit."""
+
+    def _generate(self, *args, **kwargs):
+        with _slot():
+            return super()._generate(*args, **kwargs)
+
+    async def _agenerate(self, *args, **kwargs):
+        async with _aslot():
+            return await super()._agenerate(*args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        with _slot():
+            yield from super()._stream(*args, **kwargs)
+
+    async def _astream(self, *args, **kwargs):
+        async with _aslot():
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+
+
+_http_clients: Dict[str, Any] = {}
+_http_clients_lock = threading.Lock()
+
+
+def _shared_http_clients():
+    """One keep-alive connection pool per process, shared by every chat model.
+
+    Like any asyncio connection pool, the async client belongs to the event
+    loop that first uses it (the server's loop).
+    """
+    with _http_clients_lock:
+        if not _http_clients:
+            limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS,
+                                  max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                                  keepalive_expiry=LLM_KEEPALIVE_EXPIRY)
+            timeout = httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+            _http_clients["sync"] = openai.DefaultHttpxClient(limits=limits, timeout=timeout)
+            _http_clients["async"] = openai.DefaultAsyncHttpxClient(limits=limits, timeout=timeout)
+        return _http_clients["sync"], _http_clients["async"]
+
+
+def build_chat_model(model: str, temperature: float = 0.7, api_key: Optional[str] = None,
+                     base_url: Optional[str] = None, timeout: float = LLM_TIMEOUT,
+                     max_retries: int = LLM_MAX_RETRIES, **kwargs) -> ChatOpenAI:
+    """Chat model for OpenRouter on the shared pool, limiter, timeout and retry policy."""
+    http_client, http_async_client = _shared_http_clients()
+    return LimitedChatOpenAI(
+        model=model,
+        temperature=temperature,
+        api_key=api_key or os.environ.get("OPENROUTER_API_KEY"),
+        base_url=base_url or OPENROUTER_BASE_URL,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        timeout=timeout,
+        max_retries=max_retries,
+        **kwargs
+    )
@@ -0,0 +1,237 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import openai
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict, Field
+
+from agent.llm_client import build_chat_model
+
+# Model tiers (OpenRouter model ids). The small model picks the first tools of a
+# planning turn and handles short follow-ups; the large one does the rest.
+AGENT_MODEL_LARGE = os.environ.get("AGENT_MODEL_LARGE", "meta-llama/llama-3.3-70b-instruct")
+AGENT_MODEL_SMALL = os.environ.get("AGENT_MODEL_SMALL", "meta-llama/llama-3.1-8b-instruct")
+# Tried in order when a model times out or keeps failing; "" disables fallback
+AGENT_MODEL_FALLBACKS = [m.strip() for m in os.environ.get("AGENT_MODEL_FALLBACKS", "qwen/qwen-2.5-72b-instruct").split(",") if m.strip()]
+# Per-attempt timeout and retries before moving on to the next model
+AGENT_MODEL_TIMEOUT = float(os.environ.get("AGENT_MODEL_TIMEOUT", "30"))
+AGENT_MODEL_RETRIES = int(os.environ.get("AGENT_MODEL_RETRIES", "1"))
+# Turns up to this many characters without planning words count as short follow-ups
+AGENT_ROUTER_SHORT_CHARS = int(os.environ.get("AGENT_ROUTER_SHORT_CHARS", "160"))
+
+PLANNING_WORDS = ("plan", "itinerary", "trip", "days", "week", "budget", "schedule", "book")
+
+# Errors that move a call on to the next model
+FALLBACK_ERRORS = (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError,
+                   openai.InternalServerError, asyncio.TimeoutError, TimeoutError)
+
+
+class ModelStats:
+    """Per-model call, latency, token and fallback counters."""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._window = window
+        self._models: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self, model: str) -> Dict[str, Any]:
+        entry = self._models.get(model)
+        if entry is None:
+            entry = self._models[model] = {"calls": 0, "errors": 0, "fallbacks": 0, "input_tokens": 0,
+                                           "output_tokens": 0, "latencies": deque(maxlen=self._window)}
+        return entry
+
+    def record(self, model: str, latency: float, message: Optional[BaseMessage]) -> None:
+        usage = getattr(message, "usage_metadata", None) or {}
+        with self._lock:
+            entry = self._entry(model)
+            entry["calls"] += 1
+            entry["latencies"].append(latency)
+            entry["input_tokens"] += usage.get("input_tokens", 0)
+            entry["output_tokens"] += usage.get("output_tokens", 0)
+
+    def record_error(self, model: str, fell_back: bool) -> None:
+        with self._lock:
+            entry = self._entry(model)
+            entry["errors"] += 1
+            entry["fallbacks"] += int(fell_back)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for model, entry in self._models.items():
+                latencies = sorted(entry["latencies"])
+                result[model] = {k: v for k, v in entry.items() if k != "latencies"}
+                if latencies:
+                    result[model]["latency_ms_avg"] = round(sum(latencies) / len(latencies) * 1000)
+                    result[model]["latency_ms_p50"] = round(latencies[len(latencies) // 2] * 1000)
+                    result[model]["latency_ms_p95"] = round(latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000)
+            return result
+
+
+def _turn_text(messages: Sequence[BaseMessage]) -> str:
+    """The current user message."""
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            content = message.content
+            return content if isinstance(content, str) else " ".join(
+                c.get("text", "") if isinstance(c, dict) else str(c) for c in content)
+    return ""
+
+
+def _has_tool_results(messages: Sequence[BaseMessage]) -> bool:
+    """Whether tools have already run in the current turn."""
+    for message in reversed(messages):
+        if isinstance(message, ToolMessage):
+            return True
+        if isinstance(message, HumanMessage):
+            return False
+    return False
+
+
+def _is_short_follow_up(text: str) -> bool:
+    lowered = text.lower()
+    return len(text) <= AGENT_ROUTER_SHORT_CHARS and not any(w in lowered for w in PLANNING_WORDS)
+
+
+class ModelRouter(BaseChatModel):
+    """Chat model that routes each call to a small or large model, with fallback.
+
+    Each call is routed before it is made, so its answer is never discarded
+    and streams straight through:
+    - Short follow-ups without planning words go to the small model.
+    - The first step of a planning turn (tools bound, no tool results yet)
+      goes to the small model with tool_choice="required", so it can only
+      pick tools. Later steps, which may call more tools or write the final
+      plan, go to the large model.
+    - Calls without tools (fast-path prose) go to the large model.
+    - A tier can be pinned (e.g. "small" for conversation summaries).
+
+    Each attempt that times out or fails after its retries moves on to the
+    next model in the fallback chain; the small tier falls back to the large
+    model first.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    large: BaseChatModel
+    small: Optional[BaseChatModel] = None
+    fallbacks: List[BaseChatModel] = Field(default_factory=list)
+    pinned_tier: Optional[str] = None
+    stats: ModelStats = Field(default_factory=ModelStats)
+
+    @property
+    def _llm_type(self) -> str:
+        return "model-router"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def with_tier(self, tier: str) -> "ModelRouter":
+        """A view of this router that always uses one tier (sharing models and stats)."""
+        return self.model_copy(update={"pinned_tier": tier})
+
+    def _chain(self, tier: str) -> List[BaseChatModel]:
+        if tier == "small" and self.small is not None:
+            primary = [self.small, self.large]
+        else:
+            primary = [self.large]
+        return primary + [m for m in self.fallbacks if all(m is not p for p in primary)]
+
+    def _route(self, messages: List[BaseMessage], kwargs: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """The tier for a call and the kwargs to call it with."""
+        if self.pinned_tier:
+            return self.pinned_tier, kwargs
+        if "tools" not in kwargs or self.small is None:
+            return "large", kwargs
+        if _is_short_follow_up(_turn_text(messages)):
+            return "small", kwargs
+        if not _has_tool_results(messages) and "tool_choice" not in kwargs:
+            # A tool-selection step: it cannot turn into the final answer
+            return "small", {**kwargs, "tool_choice": "required"}
+        return "large", kwargs
+
+    @staticmethod
+    def _name(model: BaseChatModel) -> str:
+        return getattr(model, "model_name", None) or getattr(model, "model", None) or type(model).__name__
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self._call(*self._route(messages, kwargs), messages, stop)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return await self._acall(*self._route(messages, kwargs), messages, stop)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        async for chunk in self._astream_chain(*self._route(messages, kwargs), messages, stop):
+            yield chunk
+
+    def _call(self, tier, kwargs, messages, stop) -> ChatResult:
+        chain = self._chain(tier)
+        for i, model in enumerate(chain):
+            start = time.perf_counter()
+            try:
+                result = model._generate(messages, stop=stop, **kwargs)
+            except FALLBACK_ERRORS as e:
+                self._failed(model, e, i < len(chain) - 1)
+                continue
+            self.stats.record(self._name(model), time.perf_counter() - start, result.generations[0].message)
+            return result
+
+    async def _acall(self, tier, kwargs, messages, stop) -> ChatResult:
+        chain = self._chain(tier)
+        for i, model in enumerate(chain):
+            start = time.perf_counter()
+            try:
+                result = await model._agenerate(messages, stop=stop, **kwargs)
+            except FALLBACK_ERRORS as e:
+                self._failed(model, e, i < len(chain) - 1)
+                continue
+            self.stats.record(self._name(model), time.perf_counter() - start, result.generations[0].message)
+            return result
+
+    async def _astream_chain(self, tier, kwargs, messages, stop):
+        chain = self._chain(tier)
+        for i, model in enumerate(chain):
+            start = time.perf_counter()
+            final = None
+            try:
+                async for chunk in model._astream(messages, stop=stop, **kwargs):
+                    final = chunk.message if final is None else final + chunk.message
+                    yield chunk
+            except FALLBACK_ERRORS as e:
+                if final is not None:
+                    # Part of the answer has already been streamed; don't restart it
+                    self._failed(model, e, False)
+                    raise
+                self._failed(model, e, i < len(chain) - 1)
+                continue
+            self.stats.record(self._name(model), time.perf_counter() - start, final)
+            return
+
+    def _failed(self, model: BaseChatModel, error: Exception, fall_back: bool) -> None:
+        """Count the failure, then re-raise it unless another model is left to try."""
+        self.stats.record_error(self._name(model), fall_back)
+        if not fall_back:
+            raise error
+        print(f"Warning: model {self._name(model)} failed ({type(error).__name__}), falling back")
+
+
+def build_model_router() -> ModelRouter:
+    """Router over the configured OpenRouter models."""
+    def model(name: str, temperature: float = 0.7) -> BaseChatModel:
+        return build_chat_model(model=name, temperature=temperature, timeout=AGENT_MODEL_TIMEOUT,
+                                max_retries=AGENT_MODEL_RETRIES, stream_usage=True)
+
+    return ModelRouter(
+        large=model(AGENT_MODEL_LARGE),
+        # Lower temperature keeps tool arguments consistent
+        small=model(AGENT_MODEL_SMALL, temperature=0.2) if AGENT_MODEL_SMALL else None,
+        fallbacks=[model(name) for name in AGENT_MODEL_FALLBACKS]
+    )
@@ -0,0 +1,155 @@
+import os
+import re
+import json
+import math
+import hashlib
+import threading
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cache import TTLCache
+
+# Opt-in: replay plans for repeated first-turn queries instead of re-running the agent
+AGENT_RESPONSE_CACHE = os.environ.get("AGENT_RESPONSE_CACHE", "false").lower() == "true"
+AGENT_RESPONSE_CACHE_TTL = float(os.environ.get("AGENT_RESPONSE_CACHE_TTL", "900"))
+AGENT_RESPONSE_CACHE_MAXSIZE = int(os.environ.get("AGENT_RESPONSE_CACHE_MAXSIZE", "500"))
+# Cosine similarity needed for a near-match; 0 disables the similarity lookup
+AGENT_RESPONSE_CACHE_SIMILARITY = float(os.environ.get("AGENT_RESPONSE_CACHE_SIMILARITY", "0.9"))
+
+EMBEDDING_DIMENSIONS = 1024
+# Numbers and dates change the answer ("under $800" vs "under $900"), so they must match exactly
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,-]\d+)*")
+# Words that can differ between near-matches. Everything else (places, origin,
+# diet, budget tier, ...) must match exactly: "from mumbai" vs "from delhi" or
+# "mid-range" vs "luxury" score above any useful threshold but need a different plan.
+FILLER_WORDS = frozenset("""
+    a an the to from for in on at of with and or my me i we us our please can could would you
+    plan planning trip trips travel itinerary visit visiting go going want need make create
+    give show suggest help day days night nights
+""".split())
+
+Vector = Dict[int, float]
+
+
+def normalize_query(text: str) -> str:
+    text = re.sub(r"[^\w$.,-]+", " ", text.casefold())
+    return " ".join(text.strip(" .,").split())
+
+
+def key_terms(query: str) -> frozenset:
+    """Content words of a normalized query, with the origin marked ("from:mumbai")."""
+    terms = set()
+    previous = None
+    for word in re.findall(r"\w+", query):
+        if word not in FILLER_WORDS:
+            stem = word[:-1] if len(word) > 3 and word.endswith("s") else word
+            terms.add(f"from:{stem}" if previous == "from" else stem)
+        previous = word
+    return frozenset(terms)
+
+
+def preferences_fingerprint(preferences: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(preferences, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def local_embedding(text: str) -> Vector:
+    """Hashed bag of words and character trigrams, L2-normalized.
+
+    Cheap and dependency-free; catches rewordings and typos ("3 day goa trip"
+    vs "3-day trip to Goa"), not paraphrases. Swap in a real embedding model
+    through PlanResponseCache(embed=...).
+    """
+    vector: Vector = {}
+    words = re.findall(r"\w+", text)
+    features = words + [w[i:i + 3] for w in (f" {w} " for w in words) for i in range(len(w) - 2)]
+    for feature in features:
+        bucket = zlib.crc32(feature.encode()) % EMBEDDING_DIMENSIONS
+        vector[bucket] = vector.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {k: v / norm for k, v in vector.items()}
+
+
+def cosine(a: Vector, b: Vector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class PlanResponseCache:
+    """Caches plan responses by normalized query and preferences fingerprint.
+
+    Lookups try the exact normalized query first, then (if enabled) the most
+    similar cached query with the same numbers, key terms and preferences.
+    Similarity only covers rewordings; it never bridges a different place,
+    origin or qualifier.
+    """
+
+    def __init__(self, ttl: float = AGENT_RESPONSE_CACHE_TTL, maxsize: int = AGENT_RESPONSE_CACHE_MAXSIZE,
+                 similarity: float = AGENT_RESPONSE_CACHE_SIMILARITY,
+                 embed: Callable[[str], Vector] = local_embedding):
+        self.similarity = similarity
+        self.embed = embed
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def get(self, user_request: str, preferences: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Return (cached response, "exact" | "similar") or None."""
+        query = normalize_query(user_request)
+        fingerprint = preferences_fingerprint(preferences)
+
+        entry = self._entries.get((fingerprint, query))
+        if entry is not None:
+            with self._lock:
+                self.exact_hits += 1
+            return entry["response"], "exact"
+
+        if self.similarity > 0:
+            numbers = NUMBER_PATTERN.findall(query)
+            terms = key_terms(query)
+            vector = self.embed(query)
+            best, best_score = None, self.similarity
+            for (entry_fingerprint, _), candidate in self._entries.items():
+                if entry_fingerprint != fingerprint or candidate["numbers"] != numbers \
+                        or candidate["terms"] != terms:
+                    continue
+                score = cosine(vector, candidate["vector"])
+                if score >= best_score:
+                    best, best_score = candidate, score
+            if best is not None:
+                with self._lock:
+                    self.similar_hits += 1
+                return best["response"], "similar"
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, user_request: str, preferences: Dict[str, Any], response: Dict[str, Any]) -> None:
+        query = normalize_query(user_request)
+        self._entries.set((preferences_fingerprint(preferences), query), {
+            "response": response,
+            "numbers": NUMBER_PATTERN.findall(query),
+            "terms": key_terms(query),
+            "vector": self.embed(query) if self.similarity > 0 else None
+        })
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            total = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self._entries.maxsize,
+                "ttl": self._entries.ttl,
+                "similarity_threshold": self.similarity,
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 3) if total else 0.0
+            }
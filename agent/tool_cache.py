@@ -0,0 +1,183 @@
+import os
+import json
+import inspect
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from cache import TTLCache
+
+# Seconds a result stays fresh, per tool (override with AGENT_TOOL_CACHE_TTL_<TOOL NAME>; 0 disables)
+DEFAULT_TOOL_TTLS = {
+    "search_flights": 300,
+    "search_hotels": 600,
+    "get_weather_forecast": 1800,
+    "search_activities": 3600,
+}
+# Entries kept per tool before the least recently used are evicted
+AGENT_TOOL_CACHE_MAXSIZE = int(os.environ.get("AGENT_TOOL_CACHE_MAXSIZE", "512"))
+
+
+def _ttl_for(tool_name: str) -> float:
+    env = os.environ.get(f"AGENT_TOOL_CACHE_TTL_{tool_name.upper()}")
+    return float(env) if env is not None else float(DEFAULT_TOOL_TTLS.get(tool_name, 0))
+
+
+def _normalize(value: Any) -> Any:
+    """Make equivalent arguments compare equal ("Goa " == "goa", 450 == 450.0)."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 2)
+    if isinstance(value, (list, tuple, set)):
+        # Category-style lists are order-insensitive filters
+        return sorted((_normalize(v) for v in value), key=repr)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    return str(value)
+
+
+class ToolCacheBackend(ABC):
+    """Storage interface for ToolResultCache.
+
+    Entries are namespaced per tool so each tool gets its own size limit.
+    A shared backend (e.g. Redis) only needs to implement the abstract
+    methods; stats() is optional.
+    """
+
+    @abstractmethod
+    def get(self, tool_name: str, key: Hashable) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, tool_name: str, key: Hashable, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class InProcessToolCacheBackend(ToolCacheBackend):
+    """One LRU+TTL cache per tool, local to this process."""
+
+    def __init__(self, maxsize: int = AGENT_TOOL_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self._caches: Dict[str, TTLCache] = {}
+        self._lock = threading.Lock()
+
+    def _cache(self, tool_name: str) -> TTLCache:
+        with self._lock:
+            cache = self._caches.get(tool_name)
+            if cache is None:
+                cache = self._caches[tool_name] = TTLCache(maxsize=self.maxsize)
+            return cache
+
+    def get(self, tool_name, key):
+        return self._cache(tool_name).get(key)
+
+    def set(self, tool_name, key, value, ttl):
+        self._cache(tool_name).set(key, value, ttl=ttl)
+
+    def clear(self):
+        with self._lock:
+            for cache in self._caches.values():
+                cache.clear()
+
+    def stats(self):
+        with self._lock:
+            return {name: {"size": len(cache), "maxsize": cache.maxsize} for name, cache in self._caches.items()}
+
+
+class ToolResultCache:
+    """Caches deterministic tool results keyed on their normalized arguments.
+
+    Concurrent calls with the same key are single-flighted: one caller runs the
+    tool and the others wait for its result instead of repeating the call.
+    Failures are never cached.
+    """
+
+    def __init__(self, backend: Optional[ToolCacheBackend] = None):
+        self.backend = backend or InProcessToolCacheBackend()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, tool_name: str, outcome: str) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(tool_name, {"hits": 0, "misses": 0, "coalesced": 0})
+            counters[outcome] += 1
+
+    def call(self, tool_name: str, func: Callable[..., Any], key: Hashable, kwargs: Dict[str, Any]) -> Any:
+        ttl = _ttl_for(tool_name)
+        if ttl <= 0:
+            return func(**kwargs)
+
+        cached = self.backend.get(tool_name, key)
+        if cached is not None:
+            self._count(tool_name, "hits")
+            return cached
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            self._count(tool_name, "coalesced")
+            return future.result()
+
+        self._count(tool_name, "misses")
+        try:
+            result = func(**kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.backend.set(tool_name, key, result, ttl)
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def wrap(self, tool_name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Return func with its results served from this cache."""
+        signature = inspect.signature(func)
+
+        def cached(**kwargs):
+            # Fill in defaults so omitted and explicit default arguments share a key
+            bound = signature.bind(**kwargs)
+            bound.apply_defaults()
+            key = (tool_name, json.dumps(_normalize(dict(bound.arguments)), sort_keys=True))
+            return self.call(tool_name, func, key, kwargs)
+
+        cached.__wrapped__ = func
+        return cached
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        backend_stats = self.backend.stats()
+        with self._lock:
+            tools = {}
+            for name in sorted(set(self._counters) | set(backend_stats)):
+                counters = dict(self._counters.get(name, {"hits": 0, "misses": 0, "coalesced": 0}))
+                total = counters["hits"] + counters["misses"] + counters["coalesced"]
+                counters["hit_rate"] = round((counters["hits"] + counters["coalesced"]) / total, 3) if total else 0.0
+                counters["ttl"] = _ttl_for(name)
+                counters.update(backend_stats.get(name, {}))
+                tools[name] = counters
+        return {"backend": type(self.backend).__name__, "tools": tools}
+
+
+# Shared by every agent instance and by /api/booking-options
+tool_cache = ToolResultCache()
@@ -0,0 +1,77 @@
+import os
+import json
+from typing import Any, Dict, Iterable, Set
+
+# Compact encoding of tool results; set to false for the old pretty-printed JSON
+TOOL_OUTPUT_COMPACT = os.environ.get("AGENT_TOOL_OUTPUT_COMPACT", "true").lower() == "true"
+
+# Keys dropped (at any depth) from what the model sees: echoes of the tool's
+# own arguments, counts it can read off the rows, and derivable percentages.
+# Override per tool with AGENT_TOOL_PRUNE_<TOOL NAME>="key1,key2" ("" keeps everything).
+DEFAULT_PRUNED_FIELDS = {
+    "search_flights": ["origin", "destination", "date", "flights_found"],
+    "search_hotels": ["city", "check_in", "check_out", "hotels_found"],
+    "search_activities": ["city", "activities_found"],
+    "calculate_trip_budget": ["percentage"],
+}
+
+TABLE_KEYS = {"columns", "rows"}
+
+
+def _pruned_fields(tool_name: str) -> Set[str]:
+    env = os.environ.get(f"AGENT_TOOL_PRUNE_{tool_name.upper()}")
+    if env is not None:
+        return {f.strip() for f in env.split(",") if f.strip()}
+    return set(DEFAULT_PRUNED_FIELDS.get(tool_name, ()))
+
+
+def _prune(value: Any, fields: Set[str]) -> Any:
+    if isinstance(value, dict):
+        return {k: _prune(v, fields) for k, v in value.items() if k not in fields}
+    if isinstance(value, list):
+        return [_prune(v, fields) for v in value]
+    return value
+
+
+def _is_uniform(rows: Iterable[Any]) -> bool:
+    rows = list(rows)
+    return len(rows) > 1 and all(isinstance(r, dict) for r in rows) and all(r.keys() == rows[0].keys() for r in rows)
+
+
+def _tabulate(value: Any) -> Any:
+    """Turn lists of same-shaped objects into {"columns": [...], "rows": [[...], ...]}."""
+    if isinstance(value, dict):
+        return {k: _tabulate(v) for k, v in value.items()}
+    if isinstance(value, list):
+        if _is_uniform(value):
+            columns = list(value[0])
+            return {"columns": columns, "rows": [[_tabulate(r[c]) for c in columns] for r in value]}
+        return [_tabulate(v) for v in value]
+    return value
+
+
+def _untabulate(value: Any) -> Any:
+    if isinstance(value, dict):
+        if value.keys() == TABLE_KEYS:
+            return [dict(zip(value["columns"], [_untabulate(c) for c in row])) for row in value["rows"]]
+        return {k: _untabulate(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_untabulate(v) for v in value]
+    return value
+
+
+def encode_tool_result(tool_name: str, result: Dict[str, Any]) -> str:
+    """Serialize a tool result for the model.
+
+    Results are re-sent to the LLM on every later step of a plan, so they are
+    pruned, tabulated and minified rather than pretty-printed.
+    """
+    if not TOOL_OUTPUT_COMPACT:
+        return json.dumps(result, indent=2)
+    compact = _tabulate(_prune(result, _pruned_fields(tool_name)))
+    return json.dumps(compact, separators=(",", ":"), ensure_ascii=False)
+
+
+def decode_tool_result(text: str) -> Dict[str, Any]:
+    """Parse a tool result back into plain dicts and lists (tables become lists of dicts)."""
+    return _untabulate(json.loads(text))
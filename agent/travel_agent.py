@@ -1,20 +1,91 @@
 import os
 import json
-import requests
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-from langchain_openai import ChatOpenAI
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Optional, AsyncIterator
 from langchain_core.tools import tool
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
 from langgraph.prebuilt import create_react_agent
+from agent.context import ConversationContextManager
+from agent.model_router import build_model_router
+from agent.tool_cache import tool_cache
+from agent.tool_output import encode_tool_result
+from agent.fast_path import AGENT_FAST_PATH, FastPathPlanner, parse_trip_request
+from agent.response_cache import AGENT_RESPONSE_CACHE, PlanResponseCache
+from catalog import catalog, CATALOG_TOP_K
+from database import SessionLocal
+import booking_service
+from booking_service import BookingRequest, BookingError
 
 # Using OpenRouter API for flexible access to multiple AI models
 
 # Global user preferences storage (in production would use a database)
 user_preferences_store = {}
 
+# Tools whose effects a cached response could not replay
+SIDE_EFFECT_TOOLS = {"create_booking", "save_user_preferences"}
+
+# Bounded pool for running the synchronous tools off the event loop.
+# Sized so a burst of planning requests can't spawn unbounded threads.
+AGENT_TOOL_WORKERS = int(os.environ.get("AGENT_TOOL_WORKERS", "8"))
+tool_executor = ThreadPoolExecutor(max_workers=AGENT_TOOL_WORKERS, thread_name_prefix="agent-tool")
+
+# Seconds a single tool call may take before the agent moves on without it
+# (override per tool with AGENT_TOOL_TIMEOUT_<TOOL NAME>; 0 waits indefinitely)
+AGENT_TOOL_TIMEOUT = float(os.environ.get("AGENT_TOOL_TIMEOUT", "20"))
+# create_booking writes to the database; giving up on it mid-write could double-book on retry
+TOOL_TIMEOUT_OVERRIDES = {"create_booking": 0}
+
+def _tool_timeout(tool_name: str) -> float:
+    env = os.environ.get(f"AGENT_TOOL_TIMEOUT_{tool_name.upper()}")
+    return float(env) if env is not None else TOOL_TIMEOUT_OVERRIDES.get(tool_name, AGENT_TOOL_TIMEOUT)
+
+def _timeout_result(tool_name: str, timeout: float) -> str:
+    print(f"Warning: tool {tool_name} timed out after {timeout:g}s")
+    return json.dumps({
+        "status": "error",
+        "message": f"{tool_name} did not respond within {timeout:g} seconds. Continue without it or try again later."
+    })
+
+def _offload_to_executor(sync_tool):
+    """Run a synchronous tool on the bounded tool executor, with its timeout.
+    
+    The agent's ToolNode runs all tool calls of one step concurrently, so a
+    step takes as long as its slowest tool instead of the sum of them. A call
+    that times out keeps running in its worker thread, but the agent gets an
+    error result straight away.
+    """
+    if sync_tool.coroutine is not None:
+        return sync_tool
+    func = sync_tool.func
+    timeout = _tool_timeout(sync_tool.name)
+    
+    def _run(**kwargs):
+        future = tool_executor.submit(func, **kwargs)
+        try:
+            return future.result(timeout=timeout or None)
+        except FutureTimeoutError:
+            return _timeout_result(sync_tool.name, timeout)
+    
+    async def _arun(**kwargs):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(tool_executor, functools.partial(func, **kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout or None)
+        except asyncio.TimeoutError:
+            return _timeout_result(sync_tool.name, timeout)
+    
+    sync_tool.func = _run
+    sync_tool.coroutine = _arun
+    return sync_tool
+
+def _cache_results(sync_tool):
+    """Serve a deterministic tool's results from the shared tool cache."""
+    sync_tool.func = tool_cache.wrap(sync_tool.name, sync_tool.func)
+    return sync_tool
+
 @tool
 def search_flights(origin: str, destination: str, date: str, max_budget: float = 1000.0) -> str:
     """
@@ -29,7 +100,24 @@ def search_flights(origin: str, destination: str, date: str, max_budget: float =
     Returns:
         JSON string with flight options including prices, times, airlines
     """
-    flights = [
+    # Loaded inventory for the route, cheapest first; otherwise sample flights
+    flights = catalog.query("flights", (origin, destination), max_price=max_budget,
+                            sort=[("price", False), ("departure_time", False)], limit=CATALOG_TOP_K)
+    if flights is None:
+        flights = _sample_flights(max_budget)
+    
+    result = {
+        "origin": origin,
+        "destination": destination,
+        "date": date,
+        "flights_found": len(flights),
+        "flights": flights
+    }
+    
+    return encode_tool_result("search_flights", result)
+
+def _sample_flights(max_budget: float) -> List[Dict[str, Any]]:
+    return [
         {
             "airline": "Air India",
             "flight_number": "AI202",
@@ -61,16 +149,6 @@ def search_flights(origin: str, destination: str, date: str, max_budget: float =
             "class": "Economy"
         }
     ]
-    
-    result = {
-        "origin": origin,
-        "destination": destination,
-        "date": date,
-        "flights_found": len(flights),
-        "flights": flights
-    }
-    
-    return json.dumps(result, indent=2)
 
 @tool
 def search_hotels(city: str, check_in: str, check_out: str, max_price_per_night: float = 150.0, accommodation_style: str = "any") -> str:
@@ -87,6 +165,27 @@ def search_hotels(city: str, check_in: str, check_out: str, max_price_per_night:
     Returns:
         JSON string with hotel options including prices, ratings, amenities
     """
+    # Loaded inventory for the city, best rated first; otherwise sample hotels
+    styles = {"style": [accommodation_style]} if accommodation_style != "any" else None
+    query = dict(max_price=max_price_per_night, sort=[("rating", True), ("price", False)], limit=CATALOG_TOP_K)
+    all_hotels = catalog.query("hotels", (city,), filters=styles, **query)
+    if all_hotels == [] and styles:
+        # Nothing in that style: show other styles rather than nothing
+        all_hotels = catalog.query("hotels", (city,), **query)
+    if all_hotels is None:
+        all_hotels = _sample_hotels(max_price_per_night, accommodation_style)
+    
+    result = {
+        "city": city,
+        "check_in": check_in,
+        "check_out": check_out,
+        "hotels_found": len(all_hotels),
+        "hotels": all_hotels
+    }
+    
+    return encode_tool_result("search_hotels", result)
+
+def _sample_hotels(max_price_per_night: float, accommodation_style: str) -> List[Dict[str, Any]]:
     all_hotels = [
         {
             "name": "Beach Paradise Resort",
@@ -122,16 +221,7 @@ def search_hotels(city: str, check_in: str, check_out: str, max_price_per_night:
         filtered_hotels = [h for h in all_hotels if h["style"] == accommodation_style]
         if filtered_hotels:
             all_hotels = filtered_hotels
-    
-    result = {
-        "city": city,
-        "check_in": check_in,
-        "check_out": check_out,
-        "hotels_found": len(all_hotels),
-        "hotels": all_hotels
-    }
-    
-    return json.dumps(result, indent=2)
+    return all_hotels
 
 @tool
 def get_weather_forecast(city: str, date: str) -> str:
@@ -192,7 +282,7 @@ def get_weather_forecast(city: str, date: str) -> str:
             "recommendation": "Pack an umbrella and rain jacket. Great for indoor activities."
         }
     
-    return json.dumps(weather, indent=2)
+    return encode_tool_result("get_weather_forecast", weather)
 
 @tool
 def search_activities(city: str, categories: Optional[List[str]] = None) -> str:
@@ -206,6 +296,23 @@ def search_activities(city: str, categories: Optional[List[str]] = None) -> str:
     Returns:
         JSON string with activity options
     """
+    # Loaded inventory for the city, best rated first; otherwise sample activities
+    query = dict(sort=[("rating", True), ("price", False)], limit=CATALOG_TOP_K)
+    all_activities = catalog.query("activities", (city,), filters={"category": categories} if categories else None, **query)
+    if all_activities == [] and categories:
+        all_activities = catalog.query("activities", (city,), **query)
+    if all_activities is None:
+        all_activities = _sample_activities(categories)
+    
+    result = {
+        "city": city,
+        "activities_found": len(all_activities),
+        "activities": all_activities
+    }
+    
+    return encode_tool_result("search_activities", result)
+
+def _sample_activities(categories: Optional[List[str]]) -> List[Dict[str, Any]]:
     all_activities = [
         {
             "name": "Scuba Diving Adventure",
@@ -270,14 +377,12 @@ def search_activities(city: str, categories: Optional[List[str]] = None) -> str:
         filtered = [a for a in all_activities if a["category"] in categories]
         if filtered:
             all_activities = filtered
-    
-    result = {
-        "city": city,
-        "activities_found": len(all_activities),
-        "activities": all_activities
-    }
-    
-    return json.dumps(result, indent=2)
+    return all_activities
+
+# Search and forecast tools are pure functions of their arguments, so repeat
+# calls (within a turn, across users, and from /api/booking-options) hit the cache
+for _cacheable_tool in (search_flights, search_hotels, get_weather_forecast, search_activities):
+    _cache_results(_cacheable_tool)
 
 @tool
 def calculate_trip_budget(flight_cost: float, hotel_cost_per_night: float, num_nights: int, 
@@ -331,7 +436,7 @@ def calculate_trip_budget(flight_cost: float, hotel_cost_per_night: float, num_n
         "currency": "USD"
     }
     
-    return json.dumps(breakdown, indent=2)
+    return encode_tool_result("calculate_trip_budget", breakdown)
 
 @tool
 def save_user_preferences(preferences: Dict[str, Any]) -> str:
@@ -347,11 +452,11 @@ def save_user_preferences(preferences: Dict[str, Any]) -> str:
     global user_preferences_store
     user_preferences_store.update(preferences)
     
-    return json.dumps({
+    return encode_tool_result("save_user_preferences", {
         "status": "success",
         "message": f"Saved {len(preferences)} preferences",
         "current_preferences": user_preferences_store
-    }, indent=2)
+    })
 
 @tool
 def get_user_preferences() -> str:
@@ -364,22 +469,31 @@ def get_user_preferences() -> str:
     global user_preferences_store
     
     if not user_preferences_store:
-        return json.dumps({
+        return encode_tool_result("get_user_preferences", {
             "status": "empty",
             "message": "No preferences saved yet",
             "preferences": {}
-        }, indent=2)
+        })
     
-    return json.dumps({
+    return encode_tool_result("get_user_preferences", {
         "status": "success",
         "preferences": user_preferences_store
-    }, indent=2)
+    })
+
+def _find_listing(kind: str, key: List[str], field: str, value: str,
+                  samples: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """A flight or hotel as the search tools list it: from the catalog, else the sample inventory."""
+    index = catalog.index(kind, *key)
+    items = index.items if index is not None else samples
+    wanted = str(value).strip().lower()
+    return next((dict(item) for item in items if str(item.get(field, "")).strip().lower() == wanted), None)
 
 @tool
-def create_booking(destination: str, trip_name: str, start_date: str, end_date: str, 
-                  passengers: int, base_price: float = 200.0) -> str:
+def create_booking(destination: str, trip_name: str, start_date: str, end_date: str,
+                  passengers: int, origin: str, flight_number: str, hotel_name: str) -> str:
     """
     Create a booking for a trip. This will save the booking and allow the user to proceed to payment.
+    The price is calculated on the server from the chosen flight and hotel.
     
     Args:
         destination: Destination city/country
@@ -387,60 +501,64 @@ def create_booking(destination: str, trip_name: str, start_date: str, end_date:
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
         passengers: Number of passengers (1-10)
-        base_price: Base price per person (default 200.0)
+        origin: Departure city of the chosen flight
+        flight_number: Flight number of the chosen flight, as returned by search_flights
+        hotel_name: Name of the chosen hotel, as returned by search_hotels
         
     Returns:
         JSON string with booking confirmation and booking ID
     """
-    # Calculate total price
-    total_price = base_price * passengers
-    
-    # Generate a trip_id
-    trip_id = f"ai-booking-{destination.lower().replace(' ', '-')}"
-    
+    # Prices come from the inventory the search tools read (samples at their default budgets), never from the model
+    flight = _find_listing("flights", [origin, destination], "flight_number", flight_number, _sample_flights(1000.0))
+    hotel = _find_listing("hotels", [destination], "name", hotel_name, _sample_hotels(150.0, "any"))
+    if flight is None or hotel is None:
+        missing = f"flight {flight_number} from {origin}" if flight is None else f"hotel {hotel_name}"
+        return encode_tool_result("create_booking", {
+            "status": "error",
+            "message": f"Failed to create booking: {missing} to {destination} was not found. "
+                       "Search again and book one of the listed options."
+        })
+    
+    # Dynamic booking: the service prices it as (flight × passengers) + (hotel × nights)
     booking_data = {
-        "trip_id": trip_id,
+        "trip_id": f"booking-{destination.lower().replace(' ', '-')}",
         "trip_name": trip_name,
         "destination": destination,
         "start_date": start_date,
         "end_date": end_date,
-        "total_price": total_price,
+        "total_price": 0,
         "passengers": passengers,
-        "flight_details": {},
-        "hotel_details": {}
+        "flight_details": {**flight, "origin": origin},
+        "hotel_details": hotel
     }
     
+    # Book in-process through the shared booking service (no HTTP loopback)
+    db = SessionLocal()
     try:
-        # Get the base URL from environment or use localhost
-        base_url = os.environ.get('BASE_URL', 'http://localhost:5000')
-        response = requests.post(
-            f"{base_url}/api/bookings",
-            json=booking_data,
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return json.dumps({
-                "status": "success",
-                "message": f"Booking created successfully! Booking ID: {result.get('booking_id', 'N/A')}",
-                "booking_id": result.get('booking_id'),
-                "booking": result.get('booking'),
-                "next_step": "The user can now proceed to payment from the 'My Trips' page."
-            }, indent=2)
-        else:
-            return json.dumps({
-                "status": "error",
-                "message": f"Failed to create booking: {response.text}"
-            }, indent=2)
+        db_booking = booking_service.create_booking(db, BookingRequest(**booking_data))
+        return encode_tool_result("create_booking", {
+            "status": "success",
+            "message": f"Booking created successfully! Booking ID: {db_booking.booking_id}",
+            "booking_id": db_booking.booking_id,
+            "booking": booking_service.booking_summary(db_booking),
+            "next_step": "The user can now proceed to payment from the 'My Trips' page."
+        })
+    except BookingError as e:
+        return encode_tool_result("create_booking", {
+            "status": "error",
+            "message": f"Failed to create booking: {e.detail}"
+        })
     except Exception as e:
-        # If API call fails, return booking info for manual creation
-        return json.dumps({
+        # If saving fails, return booking info for manual creation
+        return encode_tool_result("create_booking", {
             "status": "info",
-            "message": f"Booking details prepared: {trip_name} to {destination} for {passengers} passenger(s) from {start_date} to {end_date}. Total: ${total_price:.2f}",
+            "message": f"Booking details prepared: {trip_name} to {destination} for {passengers} passenger(s) from {start_date} to {end_date}, "
+                       f"flight {flight_number} and {hotel_name}.",
             "booking_data": booking_data,
             "note": "Please visit the 'My Trips' page to complete the booking."
-        }, indent=2)
+        })
+    finally:
+        db.close()
 
 @tool
 def create_day_by_day_itinerary(destination: str, num_days: int, activities: List[str], 
@@ -500,20 +618,17 @@ def create_day_by_day_itinerary(destination: str, num_days: int, activities: Lis
         
         itinerary["days"].append(day_plan)
     
-    return json.dumps(itinerary, indent=2)
+    return encode_tool_result("create_day_by_day_itinerary", itinerary)
 
 
 class TravelPlannerAgent:
     """Autonomous AI agent for travel planning with LangChain agent executor."""
     
     def __init__(self):
-        # Use OPENROUTER_API_KEY environment variable
-        self.llm = ChatOpenAI(
-            model="meta-llama/llama-3.3-70b-instruct",
-            temperature=0.7,
-            api_key=os.environ.get("OPENROUTER_API_KEY"),
-            base_url="https://openrouter.ai/api/v1"
-        )
+        # Use OPENROUTER_API_KEY environment variable. The router sends tool
+        # selection and short follow-ups to a small model, final plans to the
+        # large one, and falls back to other models on timeouts
+        self.llm = build_model_router()
         
         # Chat history for conversation memory
         self.chat_history = ChatMessageHistory()
@@ -549,7 +664,7 @@ Agent Behavior:
 7. **Save new preferences** when user mentions them
 8. **Be proactive** - if user mentions they "love adventure", save it and suggest adventure activities
 9. **Offer booking** - When user expresses interest in booking or says "book this", use create_booking tool
-10. **Extract booking details** - From the conversation, extract destination, dates, passengers, and price for booking
+10. **Extract booking details** - From the conversation, extract destination, dates, passengers, and the chosen flight number and hotel name for booking
 
 Response Format:
 - Use clear headings and sections
@@ -560,8 +675,8 @@ Response Format:
 
 Remember: You have autonomy to use multiple tools in sequence to build complete travel plans!"""
         
-        # Create tools list
-        self.tools = [
+        # Create tools list (each tool runs on the bounded executor with a timeout)
+        self.tools = [_offload_to_executor(t) for t in [
             search_flights,
             search_hotels,
             get_weather_forecast,
@@ -571,10 +686,19 @@ Remember: You have autonomy to use multiple tools in sequence to build complete
             get_user_preferences,
             create_day_by_day_itinerary,
             create_booking
-        ]
+        ]]
         
         # Create the agent
         self.agent_executor = self._create_agent_executor()
+        
+        # Keeps prompts bounded: recent turns verbatim, older turns summarized
+        self.context_manager = ConversationContextManager(self.llm.with_tier("small"))
+        
+        # Simple "N days in X" requests skip the ReAct loop (one LLM call instead of 5-10)
+        self.fast_path = FastPathPlanner(self.llm, {t.name: t for t in self.tools}) if AGENT_FAST_PATH else None
+        
+        # Opt-in replay of plans for repeated first-turn queries
+        self.response_cache = PlanResponseCache() if AGENT_RESPONSE_CACHE else None
     
     def _create_agent_executor(self):
         """Create the LangGraph agent with tools."""
@@ -588,85 +712,228 @@ Remember: You have autonomy to use multiple tools in sequence to build complete
         
         return agent_executor
     
-    def plan_trip(self, user_request: str) -> Dict[str, Any]:
-        """Process user travel request using the autonomous agent."""
+    def _finalize_response(self, user_request: str, result: Dict[str, Any],
+                           context_stats: Dict[str, Any], prompt_len: int, path: str = "agent") -> Dict[str, Any]:
+        """Extract the final answer and usage stats from an agent run."""
+        # Extract the final response - get the last AI message
+        final_message = None
+        for msg in reversed(result["messages"]):
+            if isinstance(msg, AIMessage):
+                final_message = msg
+                break
+        
+        if not final_message:
+            # Fallback to last message
+            final_message = result["messages"][-1]
+        
+        # Handle different response formats
+        if hasattr(final_message, 'content'):
+            content = final_message.content
+            # If content is a list (Gemini format), extract text from it
+            if isinstance(content, list):
+                response_text = ""
+                for item in content:
+                    if isinstance(item, dict) and 'text' in item:
+                        response_text += item['text']
+                    elif isinstance(item, str):
+                        response_text += item
+            else:
+                response_text = str(content) if content else "I'm processing your request..."
+        else:
+            response_text = str(final_message) if final_message else "I'm processing your request..."
+        
+        # Clean up response text
+        if not response_text or response_text.strip() == "":
+            response_text = "I've processed your request. How can I help you further?"
+        
+        # Actual input tokens billed across every LLM step of this run, when reported
+        llm_input_tokens = sum(
+            (msg.usage_metadata or {}).get("input_tokens", 0)
+            for msg in result["messages"][prompt_len:]
+            if isinstance(msg, AIMessage) and getattr(msg, "usage_metadata", None)
+        )
+        
+        return {
+            "status": "success",
+            "request": user_request,
+            "response": response_text,
+            "usage": {**context_stats, "llm_input_tokens": llm_input_tokens, "path": path}
+        }
+    
+    @staticmethod
+    def _turn_messages(response: Dict[str, Any]) -> List[BaseMessage]:
+        return [HumanMessage(content=response["request"]), AIMessage(content=response["response"])]
+    
+    def _error_response(self, user_request: str, e: Exception) -> Dict[str, Any]:
+        error_msg = f"I encountered an error while planning: {str(e)}\n\nPlease try rephrasing your request or provide more details."
+        return {
+            "status": "error",
+            "request": user_request,
+            "error": str(e),
+            "response": error_msg
+        }
+    
+    def _cached_plan(self, user_request: str, chat_history) -> Optional[Dict[str, Any]]:
+        """Return a cached plan for a first-turn request, if there is one.
+        
+        Follow-ups depend on the conversation so far and are never served
+        from the cache.
+        """
+        if self.response_cache is None or chat_history.messages:
+            return None
+        hit = self.response_cache.get(user_request, user_preferences_store)
+        if hit is None:
+            return None
+        response, kind = hit
+        return {**response, "request": user_request,
+                "usage": {**response.get("usage", {}), "llm_input_tokens": 0, "cache": kind}}
+    
+    def _remember_plan(self, user_request: str, result: Dict[str, Any], response: Dict[str, Any],
+                       context_stats: Dict[str, Any]) -> None:
+        if self.response_cache is None or response["status"] != "success" or context_stats["history_messages"]:
+            return
+        if any(isinstance(m, ToolMessage) and m.name in SIDE_EFFECT_TOOLS for m in result["messages"]):
+            return
+        self.response_cache.set(user_request, user_preferences_store, response)
+    
+    def plan_trip(self, user_request: str, chat_history=None) -> Dict[str, Any]:
+        """Process user travel request using the autonomous agent.
+        
+        chat_history selects the conversation to continue; defaults to the
+        agent's own history.
+        """
+        if chat_history is None:
+            chat_history = self.chat_history
         try:
-            # Prepare chat history for the agent
-            chat_history_messages = list(self.chat_history.messages)
-            
-            # Check if system message is already in history
-            has_system_message = any(isinstance(msg, SystemMessage) for msg in chat_history_messages)
+            cached = self._cached_plan(user_request, chat_history)
+            if cached:
+                chat_history.add_messages(self._turn_messages(cached))
+                return cached
             
-            # Include system message at the beginning if not already in history
-            messages = []
-            if not has_system_message:
-                messages.append(SystemMessage(content=self.system_message))
-            messages.extend(chat_history_messages)
-            messages.append(HumanMessage(content=user_request))
+            messages, context_stats = self.context_manager.prepare(self.system_message, chat_history, user_request)
             
             # Invoke the agent with LangGraph
             result = self.agent_executor.invoke({
                 "messages": messages
             })
             
-            # Extract the final response - get the last AI message
-            final_message = None
-            for msg in reversed(result["messages"]):
-                if isinstance(msg, AIMessage):
-                    final_message = msg
-                    break
+            response = self._finalize_response(user_request, result, context_stats, len(messages))
+            self._remember_plan(user_request, result, response, context_stats)
             
-            if not final_message:
-                # Fallback to last message
-                final_message = result["messages"][-1]
+            # Add to chat history
+            chat_history.add_messages(self._turn_messages(response))
+            return response
             
-            # Handle different response formats
-            if hasattr(final_message, 'content'):
-                content = final_message.content
-                # If content is a list (Gemini format), extract text from it
-                if isinstance(content, list):
-                    response_text = ""
-                    for item in content:
-                        if isinstance(item, dict) and 'text' in item:
-                            response_text += item['text']
-                        elif isinstance(item, str):
-                            response_text += item
-                else:
-                    response_text = str(content) if content else "I'm processing your request..."
+        except Exception as e:
+            return self._error_response(user_request, e)
+    
+    async def aplan_trip(self, user_request: str, chat_history=None) -> Dict[str, Any]:
+        """Async variant of plan_trip that never blocks the event loop.
+        
+        LLM calls go through the async OpenAI client and tools run on the
+        bounded tool executor, so many plans can be in flight on one worker.
+        """
+        if chat_history is None:
+            chat_history = self.chat_history
+        try:
+            cached = self._cached_plan(user_request, chat_history)
+            if cached:
+                await chat_history.aadd_messages(self._turn_messages(cached))
+                return cached
+            
+            messages, context_stats = await self.context_manager.aprepare(self.system_message, chat_history, user_request)
+            
+            intent = parse_trip_request(user_request) if self.fast_path else None
+            if intent:
+                result = await self.fast_path.aplan(messages, user_request, intent)
             else:
-                response_text = str(final_message) if final_message else "I'm processing your request..."
+                result = await self.agent_executor.ainvoke({
+                    "messages": messages
+                })
             
-            # Clean up response text
-            if not response_text or response_text.strip() == "":
-                response_text = "I've processed your request. How can I help you further?"
+            response = self._finalize_response(user_request, result, context_stats, len(messages),
+                                               path="fast" if intent else "agent")
+            self._remember_plan(user_request, result, response, context_stats)
             
-            # Add to chat history
-            self.chat_history.add_user_message(user_request)
-            self.chat_history.add_ai_message(response_text)
+            # Persisting history touches the database, so keep it off the event loop
+            await chat_history.aadd_messages(self._turn_messages(response))
+            return response
             
-            return {
-                "status": "success",
-                "request": user_request,
-                "response": response_text
-            }
+        except Exception as e:
+            return self._error_response(user_request, e)
+    
+    async def _astream_agent(self, messages: List[BaseMessage]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a ReAct agent run as tool/token events; the last event is {"type": "result"}."""
+        result = None
+        async for event in self.agent_executor.astream_events({"messages": messages}, version="v2"):
+            kind = event["event"]
+            if kind == "on_tool_start":
+                yield {"type": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+            elif kind == "on_tool_end":
+                yield {"type": "tool_end", "tool": event["name"]}
+            elif kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if isinstance(content, list):
+                    content = "".join(item.get("text", "") if isinstance(item, dict) else str(item) for item in content)
+                if content:
+                    yield {"type": "token", "content": content}
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                # Final state of the top-level graph run
+                result = event["data"].get("output")
+        yield {"type": "result", "result": result}
+    
+    async def astream_plan(self, user_request: str, chat_history=None) -> AsyncIterator[Dict[str, Any]]:
+        """Run the agent and yield progress events as they happen.
+        
+        Yields tool_start/tool_end events for each tool call, token events with
+        LLM output chunks, and finally a done event carrying the same fields as
+        aplan_trip (or an error event).
+        """
+        if chat_history is None:
+            chat_history = self.chat_history
+        try:
+            cached = self._cached_plan(user_request, chat_history)
+            if cached:
+                await chat_history.aadd_messages(self._turn_messages(cached))
+                yield {"type": "done", **cached}
+                return
+            
+            messages, context_stats = await self.context_manager.aprepare(self.system_message, chat_history, user_request)
+            
+            intent = parse_trip_request(user_request) if self.fast_path else None
+            events = self.fast_path.astream(messages, user_request, intent) if intent else self._astream_agent(messages)
+            result = None
+            async for event in events:
+                if event["type"] == "result":
+                    result = event["result"]
+                else:
+                    yield event
+            
+            if not result or "messages" not in result:
+                raise RuntimeError("Agent run finished without a response")
+            
+            response = self._finalize_response(user_request, result, context_stats, len(messages),
+                                               path="fast" if intent else "agent")
+            self._remember_plan(user_request, result, response, context_stats)
+            await chat_history.aadd_messages(self._turn_messages(response))
+            yield {"type": "done", **response}
             
         except Exception as e:
-            error_msg = f"I encountered an error while planning: {str(e)}\n\nPlease try rephrasing your request or provide more details."
-            return {
-                "status": "error",
-                "request": user_request,
-                "error": str(e),
-                "response": error_msg
-            }
+            yield {"type": "error", **self._error_response(user_request, e)}
     
-    def reset_memory(self):
+    def reset_memory(self, chat_history=None):
         """Clear conversation history."""
-        self.chat_history.clear()
+        if chat_history is None:
+            chat_history = self.chat_history
+        chat_history.clear()
+        self.context_manager.forget(chat_history)
     
-    def get_conversation_history(self) -> List[Dict[str, str]]:
+    def get_conversation_history(self, chat_history=None) -> List[Dict[str, str]]:
         """Get formatted conversation history."""
+        if chat_history is None:
+            chat_history = self.chat_history
         messages = []
-        for msg in self.chat_history.messages:
+        for msg in chat_history.messages:
             messages.append({
                 "role": "assistant" if isinstance(msg, AIMessage) else "user",
                 "content": msg.content
@@ -0,0 +1,144 @@
+import os
+import asyncio
+import secrets
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from database import SessionLocal, Session as DBSession
+
+# Session lifetimes (overridable from the environment)
+SESSION_TTL_HOURS = float(os.environ.get("SESSION_TTL_HOURS", "24"))
+SESSION_REMEMBER_ME_DAYS = float(os.environ.get("SESSION_REMEMBER_ME_DAYS", "30"))
+# How long a validated token is trusted before the DB is asked again. Logouts on
+# this process take effect at once; on other processes within this window.
+SESSION_CACHE_TTL = float(os.environ.get("SESSION_CACHE_TTL", "300"))
+SESSION_CACHE_MAXSIZE = int(os.environ.get("SESSION_CACHE_MAXSIZE", "10000"))
+# Unknown tokens are remembered briefly so bad tokens don't cost a query each
+SESSION_NEGATIVE_CACHE_TTL = float(os.environ.get("SESSION_NEGATIVE_CACHE_TTL", "30"))
+# How often expired sessions are deleted; 0 disables the sweeper
+SESSION_SWEEP_INTERVAL = float(os.environ.get("SESSION_SWEEP_INTERVAL", "3600"))
+
+_INVALID = object()
+
+
+def generate_token() -> str:
+    """Generate a secure random token."""
+    return secrets.token_urlsafe(32)
+
+
+def session_expiry(remember_me: bool = False, now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.utcnow()
+    return now + (timedelta(days=SESSION_REMEMBER_ME_DAYS) if remember_me else timedelta(hours=SESSION_TTL_HOURS))
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    token = authorization[7:] if authorization.lower().startswith("bearer ") else authorization
+    return token.strip() or None
+
+
+class SessionStore:
+    """Auth tokens backed by the sessions table, with an in-memory LRU/TTL cache in front.
+
+    validate() answers from the cache when it can, so checking a token on
+    every request is a dict lookup rather than a query. Cached entries never
+    outlive the session's expires_at.
+    """
+
+    def __init__(self, cache_ttl: float = SESSION_CACHE_TTL, maxsize: int = SESSION_CACHE_MAXSIZE,
+                 negative_ttl: float = SESSION_NEGATIVE_CACHE_TTL):
+        self.negative_ttl = negative_ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=cache_ttl)
+        self.swept_total = 0
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def create(self, db: Session, user_id: int, email: str, remember_me: bool = False) -> DBSession:
+        """Add a session for the user to db (the caller commits)."""
+        session = DBSession(token=generate_token(), user_id=user_id, email=email,
+                            expires_at=session_expiry(remember_me))
+        db.add(session)
+        return session
+
+    def validate(self, token: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return {"user_id", "email", "expires_at"} for a live token, else None."""
+        if not token:
+            return None
+        now = datetime.utcnow()
+        session = self._cache.get(token)
+        if session is None:
+            session = self._load(token)
+            if session is None:
+                self._cache.set(token, _INVALID, ttl=self.negative_ttl)
+                return None
+            remaining = (session["expires_at"] - now).total_seconds()
+            self._cache.set(token, session, ttl=min(self._cache.ttl, remaining))
+        if session is _INVALID or session["expires_at"] <= now:
+            return None
+        return session
+
+    def revoke(self, db: Session, token: str) -> bool:
+        self._cache.delete(token)
+        deleted = db.query(DBSession).filter(DBSession.token == token).delete(synchronize_session=False)
+        db.commit()
+        return bool(deleted)
+
+    def _load(self, token: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            session = db.query(DBSession).filter(DBSession.token == token).first()
+            if session is None:
+                return None
+            # Sessions created before expiry was tracked get the default lifetime
+            expires_at = session.expires_at or session_expiry(now=session.created_at or datetime.utcnow())
+            if expires_at <= datetime.utcnow():
+                return None
+            return {"user_id": session.user_id, "email": session.email, "expires_at": expires_at}
+        finally:
+            db.close()
+
+    def sweep(self) -> int:
+        """Bulk-delete expired sessions; returns how many were removed."""
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            deleted = db.query(DBSession).filter(or_(
+                DBSession.expires_at < now,
+                and_(DBSession.expires_at.is_(None), DBSession.created_at < now - timedelta(hours=SESSION_TTL_HOURS))
+            )).delete(synchronize_session=False)
+            db.commit()
+            self.swept_total += deleted
+            return deleted
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _sweep_periodically(self, interval: float) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                print(f"Warning: Failed to sweep expired sessions: {e}")
+            await asyncio.sleep(interval)
+
+    def start_sweeper(self, interval: float = SESSION_SWEEP_INTERVAL) -> None:
+        if interval > 0 and self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_periodically(interval))
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._cache.stats(), "swept_total": self.swept_total}
+
+
+session_store = SessionStore()
@@ -0,0 +1,94 @@
+"""
+Benchmark: concurrent booking creation and booking id uniqueness.
+
+1. Creates --bookings bookings in parallel through POST /api/bookings
+   (--concurrency threads against a temporary SQLite database), first with the
+   old second-resolution BK<timestamp> ids and then with booking_ids, and
+   reports throughput, failures and duplicate ids.
+2. Generates --ids ids in each of --processes separate processes with the
+   same (unconfigured) setup the uvicorn workers get, and checks that all of
+   them are unique and that each process's ids are strictly increasing.
+
+Usage:
+    python benchmarks/bench_booking_ids.py [--bookings 2000] [--concurrency 32] [--processes 4] [--ids 100000]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--bookings", type=int, default=2000)
+parser.add_argument("--concurrency", type=int, default=32)
+parser.add_argument("--processes", type=int, default=4)
+parser.add_argument("--ids", type=int, default=100000)
+args = parser.parse_args()
+
+
+def generate_ids(count):
+    from booking_ids import new_booking_id
+    return [new_booking_id() for _ in range(count)]
+
+
+def legacy_booking_id():
+    return f"BK{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+
+def create_bookings(client, label):
+    booking = {
+        "trip_id": "goa-beach", "trip_name": "Goa Beach", "destination": "Goa",
+        "start_date": "2026-12-01", "end_date": "2026-12-05", "total_price": 450, "passengers": 1
+    }
+
+    def one(_):
+        response = client.post("/api/bookings", json=booking)
+        return response.json().get("booking_id") if response.status_code == 200 else None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        ids = list(pool.map(one, range(args.bookings)))
+    elapsed = time.perf_counter() - start
+    created = [i for i in ids if i]
+    print(f"{label:<22}{len(created):>8}{len(ids) - len(created):>8}{len(created) - len(set(created)):>7}"
+          f"{len(created) / elapsed:>12.0f}")
+
+
+def main():
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ.pop("OPENROUTER_API_KEY", None)
+
+    from fastapi.testclient import TestClient
+    import main as app_module
+    import booking_service
+
+    print(f"{args.bookings} bookings over {args.concurrency} threads")
+    print(f"{'ids':<22}{'created':>8}{'failed':>8}{'dupes':>7}{'bookings/s':>12}")
+    with TestClient(app_module.app) as client:
+        new_booking_id = booking_service.new_booking_id
+        booking_service.new_booking_id = legacy_booking_id
+        try:
+            create_bookings(client, "BK<seconds> (old)")
+        finally:
+            booking_service.new_booking_id = new_booking_id
+        create_bookings(client, "booking_ids")
+
+    print(f"\n{args.processes} processes x {args.ids} ids")
+    start = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+        batches = pool.map(generate_ids, [args.ids] * args.processes)
+    elapsed = time.perf_counter() - start
+    all_ids = [i for batch in batches for i in batch]
+    monotonic = all(all(a < b for a, b in zip(batch, batch[1:])) for batch in batches)
+    print(f"unique: {len(set(all_ids)) == len(all_ids)}  strictly increasing per process: {monotonic}  "
+          f"({len(all_ids) / elapsed:,.0f} ids/s incl. process start)")
+    print(f"sample: {all_ids[0]}  {all_ids[-1]}")
+
+
+if __name__ == "__main__":
+    main()
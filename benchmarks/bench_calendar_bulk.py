@@ -0,0 +1,95 @@
+"""
+Benchmark: syncing calendar events one request at a time vs. the bulk endpoints.
+
+Against a temporary SQLite database, creates --events events through
+POST /api/calendar/events (one request, commit and refresh each) and then
+through POST /api/calendar/events/bulk in batches of --batch, and does the same
+for edits (PUT) and deletes (DELETE). Reports wall time, requests and SQL
+statements executed for each.
+
+Usage:
+    python benchmarks/bench_calendar_bulk.py [--events 300] [--batch 100]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--events", type=int, default=300)
+parser.add_argument("--batch", type=int, default=100)
+args = parser.parse_args()
+
+
+def make_events(title):
+    first = date(2026, 12, 1)
+    return [{
+        "title": f"{title} {i}",
+        "start_date": (first + timedelta(days=i % 60)).isoformat(),
+        "end_date": (first + timedelta(days=i % 60)).isoformat(),
+        "start_time": "09:00", "end_time": "10:30", "all_day": "false",
+        "event_type": "trip", "tags": ["itinerary"]
+    } for i in range(args.events)]
+
+
+def batches(items):
+    return [items[i:i + args.batch] for i in range(0, len(items), args.batch)]
+
+
+def main():
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ.pop("OPENROUTER_API_KEY", None)
+
+    from sqlalchemy import event
+    from fastapi.testclient import TestClient
+    import main as app_module
+    from database import engine
+
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    def run(label, calls):
+        statements[0] = 0
+        start = time.perf_counter()
+        for call in calls:
+            response = call()
+            assert response.status_code == 200 and response.json()["status"] == "success", response.text
+        elapsed = time.perf_counter() - start
+        print(f"{label:<26}{len(calls):>10}{statements[0]:>12}{elapsed * 1000:>10.0f}")
+
+    print(f"{args.events} events, bulk batches of {args.batch}")
+    print(f"{'method':<26}{'requests':>10}{'statements':>12}{'ms':>10}")
+    with TestClient(app_module.app) as client:
+        single_ids = []
+        run("create one by one", [
+            lambda e=e: (lambda r: single_ids.append(r.json()["event_id"]) or r)(
+                client.post("/api/calendar/events", json=e))
+            for e in make_events("Single")
+        ])
+        bulk_ids = []
+        run("create bulk", [
+            lambda b=b: (lambda r: bulk_ids.extend(x["event_id"] for x in r.json()["results"]) or r)(
+                client.post("/api/calendar/events/bulk", json=b))
+            for b in batches(make_events("Bulk"))
+        ])
+
+        run("update one by one", [
+            lambda i=i, e=e: client.put(f"/api/calendar/events/{i}", json={**e, "title": e["title"] + "*"})
+            for i, e in zip(single_ids, make_events("Single"))
+        ])
+        run("update bulk", [
+            lambda b=b: client.put("/api/calendar/events/bulk", json=b)
+            for b in batches([{**e, "id": i, "title": e["title"] + "*"} for i, e in zip(bulk_ids, make_events("Bulk"))])
+        ])
+
+        run("delete one by one", [lambda i=i: client.delete(f"/api/calendar/events/{i}") for i in single_ids])
+        run("delete bulk", [lambda b=b: client.request("DELETE", "/api/calendar/events/bulk", json=b)
+                            for b in batches(bulk_ids)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: indexed catalog queries vs. filtering a list per call.
+
+Generates a synthetic city inventory (hotels with price, rating, reviews,
+style and amenities) and runs typical search-tool queries two ways: a list
+comprehension + sort over every hotel (what the tools did with their inline
+lists) and catalog.InventoryIndex.query (bisected price/rating ranges,
+inverted indexes for style/amenities, top-k). Results are checked to match.
+
+Usage:
+    python benchmarks/bench_catalog.py [--hotels 50000] [--queries 200] [--top-k 10]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import InventoryIndex
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--hotels", type=int, default=50000)
+parser.add_argument("--queries", type=int, default=200)
+parser.add_argument("--top-k", type=int, default=10)
+args = parser.parse_args()
+
+STYLES = ["luxury", "mid-range", "budget-friendly", "boutique", "hostel"]
+AMENITIES = ["Pool", "WiFi", "Breakfast", "Spa", "Gym", "Parking", "Beach Access", "Restaurant"]
+
+
+def make_hotels(n):
+    rng = random.Random(7)
+    return [{
+        "city": "Goa",
+        "name": f"Hotel {i}",
+        "price_per_night": rng.randint(15, 600),
+        "rating": round(rng.uniform(2.5, 5.0), 1),
+        "reviews": rng.randint(0, 5000),
+        "style": rng.choice(STYLES),
+        "amenities": rng.sample(AMENITIES, rng.randint(1, 5))
+    } for i in range(n)]
+
+
+def make_queries(n):
+    rng = random.Random(11)
+    queries = []
+    for _ in range(n):
+        kind = rng.choice(["budget", "style", "amenity", "cheapest"])
+        if kind == "budget":
+            queries.append({"max_price": rng.randint(50, 300), "sort": [("rating", True), ("price", False)]})
+        elif kind == "style":
+            queries.append({"max_price": rng.randint(80, 400), "filters": {"style": [rng.choice(STYLES)]},
+                            "sort": [("rating", True), ("price", False)]})
+        elif kind == "amenity":
+            queries.append({"min_rating": 4.5, "filters": {"amenities": [rng.choice(AMENITIES)]},
+                            "sort": [("price", False), ("rating", True)]})
+        else:
+            queries.append({"min_rating": 3.5, "sort": [("price", False), ("reviews", True)]})
+    return queries
+
+
+def linear(hotels, max_price=None, min_rating=None, filters=None, sort=(), limit=10):
+    def keep(h):
+        if max_price is not None and h["price_per_night"] > max_price:
+            return False
+        if min_rating is not None and h["rating"] < min_rating:
+            return False
+        for field, values in (filters or {}).items():
+            have = h[field] if isinstance(h[field], list) else [h[field]]
+            if not {v.lower() for v in values} & {v.lower() for v in have}:
+                return False
+        return True
+
+    def key(h):
+        parts = []
+        for field, descending in sort:
+            value = h["price_per_night" if field == "price" else field]
+            parts.append(-value if descending else value)
+        return parts
+
+    indexed = list(enumerate(hotels))
+    matched = [(i, h) for i, h in indexed if keep(h)]
+    matched.sort(key=lambda pair: (key(pair[1]), pair[0]))
+    return [h for _, h in matched[:limit]]
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    hotels = make_hotels(args.hotels)
+    queries = make_queries(args.queries)
+
+    start = time.perf_counter()
+    index = InventoryIndex(hotels, "price_per_night", ("style", "amenities"))
+    build_ms = (time.perf_counter() - start) * 1000
+
+    expected, linear_ms = timed(lambda q: linear(hotels, limit=args.top_k, **q), queries)
+    actual, index_ms = timed(lambda q: index.query(limit=args.top_k, **q), queries)
+    assert actual == expected, "indexed results differ from the linear scan"
+
+    print(f"{args.hotels} hotels, {args.queries} queries, top {args.top_k}")
+    print(f"index build: {build_ms:.0f} ms (once per load)")
+    print(f"{'method':<22}{'ms/query':>10}")
+    print(f"{'list filter + sort':<22}{linear_ms:>10.2f}")
+    print(f"{'indexed catalog':<22}{index_ms:>10.2f}")
+    print(f"speedup: {linear_ms / index_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: DB-bound routes on the threadpool vs. blocking the event loop.
+
+Fires concurrent GET /api/bookings requests at the app while measuring how
+long the event loop stalls (what /health and every other endpoint would feel),
+and compares against an equivalent `async def` route that runs the same
+synchronous query directly on the event loop (the old handler pattern).
+
+Usage:
+    python benchmarks/bench_db_concurrency.py [--requests 200] [--concurrency 40] [--db-latency-ms 20]
+
+--db-latency-ms adds a sleep before every SQL statement to mimic a networked
+database such as Postgres (SQLite on local disk is otherwise too fast to show
+the difference).
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--requests", type=int, default=200)
+parser.add_argument("--concurrency", type=int, default=40)
+parser.add_argument("--db-latency-ms", type=float, default=20.0)
+parser.add_argument("--seed-bookings", type=int, default=50)
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ.pop("OPENROUTER_API_KEY", None)
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import main
+from database import engine, get_db, SessionLocal, Booking
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _simulated_latency(conn, cursor, statement, parameters, context, executemany):
+    if args.db_latency_ms:
+        time.sleep(args.db_latency_ms / 1000)
+
+
+@main.app.get("/bench/blocking-bookings")
+async def blocking_bookings(db: Session = Depends(get_db)):
+    """The pre-threadpool pattern: sync SQLAlchemy inside an async handler."""
+    bookings = db.query(Booking).order_by(Booking.created_at.desc()).all()
+    return {"status": "success", "count": len(bookings)}
+
+
+def seed():
+    db = SessionLocal()
+    try:
+        for i in range(args.seed_bookings):
+            db.add(Booking(booking_id=f"BKBENCH{i:06d}", trip_id="goa-beach", trip_name="Bench",
+                           destination="Goa", start_date="2026-01-01", end_date="2026-01-05",
+                           base_price=450.0, total_price=450.0, passengers=1))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run(path: str):
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            sem = asyncio.Semaphore(args.concurrency)
+            loop_lag = []
+            done = asyncio.Event()
+
+            async def one():
+                async with sem:
+                    r = await client.get(path)
+                    r.raise_for_status()
+
+            async def probe():
+                # A 10 ms timer that fires late means the loop was blocked
+                while not done.is_set():
+                    t = time.perf_counter()
+                    await asyncio.sleep(0.01)
+                    loop_lag.append(max((time.perf_counter() - t) * 1000 - 10, 0.0))
+
+            prober = asyncio.create_task(probe())
+            start = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(args.requests)))
+            elapsed = time.perf_counter() - start
+            done.set()
+            await prober
+
+    loop_lag.sort()
+    return {
+        "throughput": args.requests / elapsed,
+        "elapsed": elapsed,
+        "lag_p50": statistics.median(loop_lag) if loop_lag else 0.0,
+        "lag_max": loop_lag[-1] if loop_lag else 0.0,
+    }
+
+
+def main_():
+    seed()
+    print(f"{args.requests} requests, concurrency {args.concurrency}, simulated DB latency {args.db_latency_ms} ms")
+    print(f"{'handler':<28}{'req/s':>10}{'total s':>10}{'loop lag p50 ms':>18}{'loop lag max ms':>18}")
+    for label, path in (("async def + sync DB (old)", "/bench/blocking-bookings"),
+                        ("def on threadpool (new)", "/api/bookings")):
+        r = asyncio.run(run(path))
+        print(f"{label:<28}{r['throughput']:>10.1f}{r['elapsed']:>10.2f}{r['lag_p50']:>18.1f}{r['lag_max']:>18.1f}")
+
+
+if __name__ == "__main__":
+    main_()
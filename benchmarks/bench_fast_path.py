@@ -0,0 +1,122 @@
+"""
+Benchmark: fast-path planner vs. the full ReAct loop for a simple trip request.
+
+A scripted chat model stands in for the LLM: on the ReAct path it makes the
+calls the real model makes for "5 days in Goa" (preferences, the four
+searches, budget, itinerary, then the answer), and every call sleeps for
+--llm-latency-ms. Each call reports its input tokens (estimated at ~4
+characters/token) as usage metadata, so the figures are LLM round trips,
+end-to-end latency and input tokens per request.
+
+Usage:
+    python benchmarks/bench_fast_path.py [--llm-latency-ms 800] [--runs 3]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+parser.add_argument("--runs", type=int, default=3)
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+os.environ["AGENT_CONTEXT_SUMMARIZE"] = "false"
+os.environ["AGENT_FAST_PATH"] = "true"
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_community.chat_message_histories import ChatMessageHistory
+
+from agent.context import count_tokens
+from agent.travel_agent import TravelPlannerAgent
+
+REQUEST = "Plan a 5 day trip to Goa with a budget of $1500, we love beaches and food"
+GOA = {"city": "Goa"}
+REACT_STEPS = [
+    [("get_user_preferences", {})],
+    [("search_flights", {"origin": "Mumbai", "destination": "Goa", "date": "2026-12-01", "max_budget": 600}),
+     ("search_hotels", {**GOA, "check_in": "2026-12-01", "check_out": "2026-12-05", "max_price_per_night": 150}),
+     ("get_weather_forecast", {**GOA, "date": "2026-12-01"}),
+     ("search_activities", {**GOA, "categories": ["beach", "food"]})],
+    [("calculate_trip_budget", {"flight_cost": 640, "hotel_cost_per_night": 120, "num_nights": 4,
+                                "activity_costs": [50, 40]})],
+    [("create_day_by_day_itinerary", {"destination": "Goa", "num_days": 5, "hotel_name": "Beach Paradise Resort",
+                                      "activities": ["Beach Sunset Cruise", "Local Food & Spice Tour"]})],
+]
+ANSWER = "Here is your 5-day Goa plan. " * 60
+
+
+class ScriptedModel(BaseChatModel):
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(args.llm_latency_ms / 1000)
+        self.calls += 1
+        last_human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        step = sum(1 for m in messages[last_human:] if isinstance(m, AIMessage))
+        tool_calls = REACT_STEPS[step] if step < len(REACT_STEPS) and "Do not call tools" not in messages[-1].content else []
+        usage = {"input_tokens": count_tokens(messages), "output_tokens": 0, "total_tokens": count_tokens(messages)}
+        message = AIMessage(
+            content="" if tool_calls else ANSWER,
+            tool_calls=[{"name": n, "args": a, "id": f"call-{step}-{i}"} for i, (n, a) in enumerate(tool_calls)],
+            usage_metadata=usage
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def build_agent(fast_path: bool):
+    agent = TravelPlannerAgent()
+    agent.llm = ScriptedModel()
+    agent.agent_executor = agent._create_agent_executor()
+    agent.fast_path.llm = agent.llm
+    if not fast_path:
+        agent.fast_path = None
+    return agent
+
+
+def measure(fast_path: bool):
+    agent = build_agent(fast_path)
+    latencies, tokens, path = [], [], None
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        response = asyncio.run(agent.aplan_trip(REQUEST, chat_history=ChatMessageHistory()))
+        latencies.append(time.perf_counter() - start)
+        tokens.append(response["usage"]["llm_input_tokens"])
+        path = response["usage"]["path"]
+    return {
+        "path": path,
+        "llm_calls": agent.llm.calls / args.runs,
+        "latency": statistics.median(latencies),
+        "tokens": statistics.median(tokens),
+    }
+
+
+def main():
+    print(f'request: "{REQUEST}"')
+    print(f"simulated LLM latency {args.llm_latency_ms:.0f} ms per call, median of {args.runs} runs")
+    print(f"{'planner':<12}{'LLM calls':>11}{'latency ms':>12}{'input tokens':>14}")
+    results = [measure(fast_path=False), measure(fast_path=True)]
+    for r in results:
+        print(f"{r['path']:<12}{r['llm_calls']:>11.0f}{r['latency'] * 1000:>12.0f}{r['tokens']:>14.0f}")
+    react, fast = results
+    print(f"speedup {react['latency'] / fast['latency']:.1f}x, tokens {react['tokens'] / fast['tokens']:.1f}x fewer")
+
+
+if __name__ == "__main__":
+    main()
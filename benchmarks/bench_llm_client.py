@@ -0,0 +1,94 @@
+"""
+Benchmark: the shared LLM client layer vs. a default ChatOpenAI client.
+
+Starts benchmarks/fake_openai_server.py in-process with a fixed capacity
+(requests beyond it get 429 + Retry-After, like a rate-limited provider) and
+fires a burst of concurrent chat completions at it, first through a
+ChatOpenAI with default settings and then through build_chat_model (shared
+keep-alive pool, in-flight limit with queueing, timeout and retries).
+
+Usage:
+    python benchmarks/bench_llm_client.py [--requests 64] [--capacity 8] [--latency-ms 300]
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import threading
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--requests", type=int, default=64)
+parser.add_argument("--capacity", type=int, default=8, help="server-side concurrent request limit")
+parser.add_argument("--latency-ms", type=float, default=300.0)
+parser.add_argument("--max-concurrency", type=int, default=None,
+                    help="client in-flight limit (defaults to --capacity)")
+args = parser.parse_args()
+
+os.environ["LLM_MAX_CONCURRENCY"] = str(args.max_concurrency or args.capacity)
+
+import httpx
+import uvicorn
+from langchain_openai import ChatOpenAI
+
+from agent.llm_client import build_chat_model, llm_limiter
+from benchmarks.fake_openai_server import create_app
+
+
+def start_server() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    config = uvicorn.Config(create_app(latency_ms=args.latency_ms, capacity=args.capacity),
+                            host="127.0.0.1", port=port, log_level="error")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def burst(llm):
+    async def one():
+        start = time.perf_counter()
+        try:
+            await llm.ainvoke("Plan a 3 day trip to Goa")
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, type(e).__name__
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(args.requests)))
+    return results, time.perf_counter() - start
+
+
+def report(label, base_url, llm):
+    httpx.post(f"{base_url}/stats/reset")
+    results, elapsed = asyncio.run(burst(llm))
+    server = httpx.get(f"{base_url}/stats").json()
+    ok = sorted(latency for latency, error in results if error is None)
+    errors = [error for _, error in results if error]
+    p95 = ok[int(len(ok) * 0.95) - 1] if ok else 0.0
+    print(f"{label:<22}{len(ok):>5}/{len(results):<5}{elapsed:>9.2f}"
+          f"{(statistics.median(ok) if ok else 0) * 1000:>9.0f}{p95 * 1000:>9.0f}"
+          f"{server['statuses'].get('429', 0):>7}{server['connections']:>7}{server['peak_in_flight']:>7}"
+          f"   {', '.join(sorted(set(errors)))}")
+
+
+def main():
+    base_url = start_server()
+    print(f"{args.requests} concurrent requests, server capacity {args.capacity}, latency {args.latency_ms:.0f} ms")
+    print(f"{'client':<22}{'ok':>7}{'':<4}{'total s':>8}{'p50 ms':>9}{'p95 ms':>9}{'429s':>7}{'conns':>7}{'peak':>7}   errors")
+    report("default ChatOpenAI", base_url,
+           ChatOpenAI(model="fake", api_key="fake", base_url=f"{base_url}/v1"))
+    report("build_chat_model", base_url,
+           build_chat_model(model="fake", api_key="fake", base_url=f"{base_url}/v1"))
+    print(f"limiter: {llm_limiter.stats()}")
+
+
+if __name__ == "__main__":
+    main()
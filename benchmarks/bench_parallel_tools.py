@@ -0,0 +1,128 @@
+"""
+Benchmark: wall-clock time of one agent step that calls several tools.
+
+A scripted chat model asks for search_flights, search_hotels,
+get_weather_forecast and search_activities in a single step (as the real
+model does for "plan a trip to Goa"), then answers. Each tool is given a
+simulated provider latency. The same graph is run with its tool calls
+serialized (max_concurrency=1) and concurrently (the default), and once more
+with one tool slower than its timeout.
+
+Usage:
+    python benchmarks/bench_parallel_tools.py [--latencies-ms 400,600,300,500] [--runs 3]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--latencies-ms", default="400,600,300,500",
+                    help="simulated latency for flights,hotels,weather,activities")
+parser.add_argument("--runs", type=int, default=3)
+args = parser.parse_args()
+latencies = [float(x) / 1000 for x in args.latencies_ms.split(",")]
+
+TOOL_NAMES = ["search_flights", "search_hotels", "get_weather_forecast", "search_activities"]
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+# Measure the tools themselves, not the result cache
+for name in TOOL_NAMES:
+    os.environ[f"AGENT_TOOL_CACHE_TTL_{name.upper()}"] = "0"
+# The last run pushes search_hotels past this timeout
+os.environ["AGENT_TOOL_TIMEOUT_SEARCH_HOTELS"] = str(max(latencies) * 1.5)
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from agent import travel_agent
+
+TOOL_ARGS = {
+    "search_flights": {"origin": "Mumbai", "destination": "Goa", "date": "2026-12-01"},
+    "search_hotels": {"city": "Goa", "check_in": "2026-12-01", "check_out": "2026-12-05"},
+    "get_weather_forecast": {"city": "Goa", "date": "2026-12-01"},
+    "search_activities": {"city": "Goa"},
+}
+
+
+class ScriptedModel(BaseChatModel):
+    """Requests every search tool in one step, then answers."""
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if isinstance(messages[-1], ToolMessage):
+            message = AIMessage(content="Here is your plan.")
+        else:
+            message = AIMessage(content="", tool_calls=[
+                {"name": name, "args": TOOL_ARGS[name], "id": f"call-{i}"} for i, name in enumerate(TOOL_NAMES)
+            ])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+delays = dict(zip(TOOL_NAMES, latencies))
+
+
+def add_latency(name):
+    tool = getattr(travel_agent, name)
+    func = tool.func
+
+    def slow(**kwargs):
+        time.sleep(delays[name])
+        return func(**kwargs)
+
+    tool.func = slow
+
+
+# Installed before the agent wraps the tools, so the latency counts toward their timeouts
+for name in TOOL_NAMES:
+    add_latency(name)
+
+agent = travel_agent.TravelPlannerAgent()
+agent.llm = ScriptedModel()
+agent.agent_executor = agent._create_agent_executor()
+request = {"messages": [HumanMessage(content="Plan a trip to Goa")]}
+
+
+def timed(fn):
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    print(f"tool latencies ms: {dict(zip(TOOL_NAMES, (int(l * 1000) for l in latencies)))}")
+    print(f"sum {sum(latencies) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms, median of {args.runs} runs")
+    print(f"{'mode':<34}{'step ms':>10}")
+
+    serial, _ = timed(lambda: agent.agent_executor.invoke(request, config={"max_concurrency": 1}))
+    print(f"{'sync, serialized tool calls':<34}{serial * 1000:>10.0f}")
+    parallel_sync, _ = timed(lambda: agent.agent_executor.invoke(request))
+    print(f"{'sync, concurrent tool calls':<34}{parallel_sync * 1000:>10.0f}")
+    parallel_async, _ = timed(lambda: asyncio.run(agent.agent_executor.ainvoke(request)))
+    print(f"{'async, concurrent tool calls':<34}{parallel_async * 1000:>10.0f}")
+
+    # Hotels now exceed their timeout: the step ends at the timeout and the
+    # model receives an error result for that call
+    delays["search_hotels"] = max(latencies) * 3
+    timeout_run, result = timed(lambda: asyncio.run(agent.agent_executor.ainvoke(request)))
+    timed_out = [m.name for m in result["messages"] if isinstance(m, ToolMessage) and "did not respond" in m.content]
+    print(f"{'async, hotels past timeout':<34}{timeout_run * 1000:>10.0f}   timed out: {', '.join(timed_out) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
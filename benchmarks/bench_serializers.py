@@ -0,0 +1,116 @@
+"""
+Benchmark: serializing booking listings.
+
+Seeds --bookings bookings (with flight/hotel JSON details) into a temporary
+SQLite database, loads them once, then times turning the rows into a JSON
+response body two ways:
+
+1. The old path: a per-field getattr loop building each dict, then FastAPI's
+   jsonable_encoder pass over the whole payload and JSONResponse rendering.
+2. serializers: the precompiled attrgetter mapper and FastJSONResponse
+   (orjson when installed), returned directly so jsonable_encoder never runs.
+
+Both bodies are checked to decode to the same data. Reports µs per row for
+the full field set and for a narrow fields= selection.
+
+Usage:
+    python benchmarks/bench_serializers.py [--bookings 10000] [--repeat 5]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--bookings", type=int, default=10000)
+parser.add_argument("--repeat", type=int, default=5)
+args = parser.parse_args()
+
+NARROW_FIELDS = ["id", "trip_name", "start_date", "end_date", "total_price", "status"]
+
+
+def seed(SessionLocal, Booking):
+    rng = random.Random(3)
+    created = datetime(2026, 1, 1)
+    db = SessionLocal()
+    try:
+        for i in range(args.bookings):
+            start = created + timedelta(days=rng.randint(10, 200))
+            db.add(Booking(
+                booking_id=f"BK{i:08d}", trip_id=f"trip-{i}", trip_name=f"Trip {i}", destination="Goa",
+                start_date=start.date().isoformat(), end_date=(start + timedelta(days=4)).date().isoformat(),
+                base_price=400.0, total_price=round(rng.uniform(200, 3000), 2), passengers=rng.randint(1, 4),
+                email=f"user{i}@example.com", status=rng.choice(["pending", "confirmed", "cancelled"]),
+                payment_status="pending",
+                flight_details={"airline": "IndiGo", "flight_number": f"6E{i % 900}", "price": 120.5,
+                                "stops": 0, "departure": "07:30", "arrival": "09:45"},
+                hotel_details={"name": f"Hotel {i % 50}", "rating": 4.3, "price_per_night": 80,
+                               "amenities": ["WiFi", "Pool", "Breakfast"]},
+                created_at=created + timedelta(minutes=i), confirmed_at=created + timedelta(minutes=i, seconds=30)
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def old_serialize(row, spec, fields):
+    result = {}
+    for field in fields:
+        attr, transform = spec[field]
+        value = getattr(row, attr)
+        result[field] = transform(value) if transform else value
+    return result
+
+
+def timed(fn):
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return body, best
+
+
+def main():
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from database import init_db, SessionLocal, Booking
+    import serializers
+    from serializers import FastJSONResponse
+
+    init_db()
+    seed(SessionLocal, Booking)
+    db = SessionLocal()
+    rows = db.query(Booking).order_by(Booking.created_at.desc(), Booking.id.desc()).all()
+    spec = serializers.BOOKING_FIELDS
+
+    print(f"{len(rows)} bookings, best of {args.repeat} (encoder: {'orjson' if serializers.orjson else 'json'})")
+    print(f"{'fields':<10}{'method':<34}{'ms':>9}{'µs/row':>9}")
+    for label, fields in (("all", list(spec)), ("narrow", NARROW_FIELDS)):
+        def old_path():
+            payload = {"status": "success", "bookings": [old_serialize(r, spec, fields) for r in rows]}
+            return JSONResponse(content=jsonable_encoder(payload)).body
+
+        def new_path():
+            payload = {"status": "success", "bookings": serializers.bookings.many(rows, fields)}
+            return FastJSONResponse(payload).body
+
+        old_body, old_s = timed(old_path)
+        new_body, new_s = timed(new_path)
+        assert json.loads(old_body) == json.loads(new_body), "serializer output differs"
+        for method, seconds in (("getattr loop + jsonable_encoder", old_s), ("serializers + FastJSONResponse", new_s)):
+            print(f"{label:<10}{method:<34}{seconds * 1000:>9.1f}{seconds / len(rows) * 1e6:>9.2f}")
+        print(f"{'':<10}speedup: {old_s / new_s:.1f}x")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
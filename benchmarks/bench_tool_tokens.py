@@ -0,0 +1,80 @@
+"""
+Benchmark: prompt tokens spent on tool results for a typical trip plan.
+
+Runs the tool calls the agent makes for "plan a 5-day trip to Goa" and
+measures their output with the old pretty-printed JSON and with the compact
+encoding (pruned, tabulated, minified). Tool results stay in the message list,
+so each one is re-sent on every later LLM step of the plan; the "per plan"
+figure counts those repeats.
+
+Token counts use tiktoken's cl100k_base when it is available, otherwise the
+~4 characters/token estimate from agent.context.
+
+Usage:
+    python benchmarks/bench_tool_tokens.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+# Compare fresh tool output, not cached strings from the other encoding
+for name in ("search_flights", "search_hotels", "get_weather_forecast", "search_activities"):
+    os.environ[f"AGENT_TOOL_CACHE_TTL_{name.upper()}"] = "0"
+
+from agent import tool_output, travel_agent
+from agent.context import estimate_tokens
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+    count_tokens, tokenizer = (lambda text: len(_encoding.encode(text))), "tiktoken cl100k_base"
+except Exception:
+    count_tokens, tokenizer = estimate_tokens, "~4 chars/token estimate"
+
+# (LLM step that requested the call, tool, arguments); the plan has 3 LLM steps
+# after the first: two more tool rounds and the final answer.
+PLAN = [
+    (1, "get_user_preferences", {}),
+    (2, "search_flights", {"origin": "Mumbai", "destination": "Goa", "date": "2026-12-01", "max_budget": 800}),
+    (2, "search_hotels", {"city": "Goa", "check_in": "2026-12-01", "check_out": "2026-12-06"}),
+    (2, "get_weather_forecast", {"city": "Goa", "date": "2026-12-01"}),
+    (2, "search_activities", {"city": "Goa", "categories": ["beach", "adventure", "food"]}),
+    (3, "calculate_trip_budget", {"flight_cost": 350, "hotel_cost_per_night": 80, "num_nights": 5,
+                                  "activity_costs": [75, 50, 40]}),
+    (3, "create_day_by_day_itinerary", {"destination": "Goa", "num_days": 5, "hotel_name": "Cozy Inn & Suites",
+                                        "activities": ["Scuba Diving Adventure", "Beach Sunset Cruise",
+                                                       "Local Food & Spice Tour"]}),
+]
+FINAL_STEP = 4
+
+
+def run(compact: bool):
+    tool_output.TOOL_OUTPUT_COMPACT = compact
+    per_tool, per_plan = {}, 0
+    for step, name, tool_args in PLAN:
+        tokens = count_tokens(getattr(travel_agent, name).invoke(tool_args))
+        per_tool[name] = tokens
+        # Re-sent with every later LLM call of this plan
+        per_plan += tokens * (FINAL_STEP - step)
+    return per_tool, per_plan
+
+
+def main():
+    before, before_plan = run(compact=False)
+    after, after_plan = run(compact=True)
+
+    print(f"token counts: {tokenizer}")
+    print(f"{'tool':<30}{'pretty':>10}{'compact':>10}{'saved':>9}")
+    for name in before:
+        saved = 1 - after[name] / before[name]
+        print(f"{name:<30}{before[name]:>10}{after[name]:>10}{saved:>9.0%}")
+    total_before, total_after = sum(before.values()), sum(after.values())
+    print(f"{'tool results, once':<30}{total_before:>10}{total_after:>10}{1 - total_after / total_before:>9.0%}")
+    print(f"{'prompt tokens per plan':<30}{before_plan:>10}{after_plan:>10}{1 - after_plan / before_plan:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
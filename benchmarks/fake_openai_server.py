@@ -0,0 +1,126 @@
+"""
+Local fake of the OpenAI-compatible chat completions API (what OpenRouter serves).
+
+Point the app at it to exercise the LLM client layer without network access
+or API costs:
+
+    python benchmarks/fake_openai_server.py --port 8900 --latency-ms 300 --capacity 8
+    OPENROUTER_BASE_URL=http://127.0.0.1:8900/v1 OPENROUTER_API_KEY=fake python main.py
+
+Behaviour:
+- POST /v1/chat/completions answers with a fixed text reply, streamed as SSE
+  chunks when "stream": true. It never calls tools, so the agent answers
+  straight away.
+- --latency-ms delays each response.
+- More than --capacity requests in flight get 429 with a Retry-After header.
+  --error-rate makes a random share of requests fail with 500.
+- GET /stats reports requests, status counts, peak in-flight requests and the
+  number of distinct client connections seen. POST /stats/reset clears them.
+"""
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY = "Here is your travel plan: fly in the morning, stay near the beach and keep a day free for exploring."
+
+
+def create_app(latency_ms: float = 300.0, capacity: int = 0, error_rate: float = 0.0,
+               retry_after: float = 0.2) -> FastAPI:
+    """capacity 0 means unlimited."""
+    app = FastAPI(title="Fake OpenAI-compatible server")
+    state: Dict[str, Any] = {}
+
+    def reset():
+        state.update(requests=0, in_flight=0, peak_in_flight=0, statuses={}, connections=set())
+
+    reset()
+
+    def count(status: int):
+        state["statuses"][status] = state["statuses"].get(status, 0) + 1
+
+    @app.get("/stats")
+    async def stats():
+        return {**{k: v for k, v in state.items() if k != "connections"}, "connections": len(state["connections"])}
+
+    @app.post("/stats/reset")
+    async def stats_reset():
+        reset()
+        return {"status": "success"}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state["requests"] += 1
+        if request.client:
+            state["connections"].add((request.client.host, request.client.port))
+
+        if capacity and state["in_flight"] >= capacity:
+            count(429)
+            return JSONResponse({"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                                status_code=429, headers={"Retry-After": str(retry_after)})
+        if error_rate and random.random() < error_rate:
+            count(500)
+            return JSONResponse({"error": {"message": "Upstream error", "type": "server_error"}}, status_code=500)
+
+        state["in_flight"] += 1
+        state["peak_in_flight"] = max(state["peak_in_flight"], state["in_flight"])
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "fake-model")
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in body.get("messages", [])) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(REPLY) // 4,
+                 "total_tokens": prompt_tokens + len(REPLY) // 4}
+
+        if not body.get("stream"):
+            try:
+                await asyncio.sleep(latency_ms / 1000)
+            finally:
+                state["in_flight"] -= 1
+            count(200)
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}, "finish_reason": "stop"}],
+                "usage": usage
+            }
+
+        async def stream():
+            try:
+                words = REPLY.split(" ")
+                for i, word in enumerate(words):
+                    await asyncio.sleep(latency_ms / 1000 / len(words))
+                    delta = {"role": "assistant", "content": word + " "} if i == 0 else {"content": word + " "}
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                done = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+                yield f"data: {json.dumps(done)}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                state["in_flight"] -= 1
+
+        count(200)
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--capacity", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.2)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.capacity, args.error_rate, args.retry_after),
+                host=args.host, port=args.port, log_level="warning")
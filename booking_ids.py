@@ -0,0 +1,64 @@
+import os
+import time
+import secrets
+import threading
+from datetime import datetime, timezone
+
+# Worker id in [0, 2^20); set it per process/node to guarantee distinct ids.
+# Unset, each process picks a random one (re-picked after fork).
+BOOKING_ID_WORKER = os.environ.get("BOOKING_ID_WORKER")
+
+WORKER_BITS = 20
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+class BookingIdGenerator:
+    """Snowflake-style booking ids: BK<UTC time to the ms>-<worker><sequence>.
+
+    e.g. BK20261017062403123-0A3F1002. Ids from one generator are strictly
+    increasing (the sequence counts up within a millisecond, and the clock
+    never runs backwards), sort by creation time, and can't collide with ids
+    from other workers.
+    """
+
+    def __init__(self, worker_id=None, prefix: str = "BK"):
+        self.prefix = prefix
+        self._configured_worker = worker_id
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        worker = self._configured_worker
+        self.worker_id = int(worker) if worker not in (None, "") else secrets.randbelow(MAX_WORKER + 1)
+        if not 0 <= self.worker_id <= MAX_WORKER:
+            raise ValueError(f"Booking id worker must be between 0 and {MAX_WORKER}")
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms, self._sequence = now_ms, 0
+            elif self._sequence < MAX_SEQUENCE:
+                # Same millisecond, or the clock stepped back: keep counting from the last one
+                self._sequence += 1
+            else:
+                # Sequence exhausted: borrow the next millisecond
+                self._last_ms, self._sequence = self._last_ms + 1, 0
+            ms, sequence = self._last_ms, self._sequence
+        stamp = datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y%m%d%H%M%S")
+        return f"{self.prefix}{stamp}{ms % 1000:03d}-{self.worker_id:05X}{sequence:03X}"
+
+
+booking_ids = BookingIdGenerator(BOOKING_ID_WORKER)
+
+if hasattr(os, "register_at_fork"):
+    # A forked worker must not reuse its parent's random worker id
+    os.register_at_fork(after_in_child=booking_ids._reset)
+
+
+def new_booking_id() -> str:
+    return booking_ids.next_id()
@@ -0,0 +1,232 @@
+import os
+import math
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from database import Booking, parse_date_input
+import serializers
+from booking_ids import new_booking_id
+
+# Read cache for GET /api/bookings/{id} (overridable from the environment)
+BOOKING_CACHE_MAXSIZE = int(os.environ.get("BOOKING_CACHE_MAXSIZE", "2048"))
+BOOKING_CACHE_TTL = float(os.environ.get("BOOKING_CACHE_TTL", "300"))
+# Cached entries older than this are checked against bookings.updated_at before being served
+BOOKING_CACHE_REVALIDATE = float(os.environ.get("BOOKING_CACHE_REVALIDATE", "5"))
+
+# Server-side trip pricing (canonical source of truth)
+TRIP_PRICES = {
+    "goa-beach": 450.00,
+    "paris-family": 750.00,
+    "manali-adventure": 200.00
+}
+
+class BookingRequest(BaseModel):
+    trip_id: str
+    trip_name: str
+    destination: str
+    start_date: str
+    end_date: str
+    total_price: float
+    passengers: int
+    email: Optional[str] = None
+    flight_details: Optional[Dict[str, Any]] = None
+    hotel_details: Optional[Dict[str, Any]] = None
+    special_requests: Optional[str] = None
+
+class BookingError(Exception):
+    """Booking validation failure; carries the HTTP status the API should return."""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+def _parse_trip_dates(start_date: str, end_date: str) -> int:
+    """Validate YYYY-MM-DD dates and return the number of nights (at least 1)."""
+    start, end = parse_date_input(start_date), parse_date_input(end_date)
+    if start is None or end is None:
+        raise BookingError("Invalid date format. Use YYYY-MM-DD")
+
+    if end <= start:
+        raise BookingError("End date must be after start date")
+
+    return max((end - start).days, 1)
+
+def _positive_price(value: Any, label: str) -> float:
+    try:
+        price = float(value)
+        if not math.isfinite(price):
+            raise ValueError(f"{label} price must be a valid finite number")
+        if price <= 0:
+            raise ValueError(f"{label} price must be positive")
+    except (ValueError, TypeError) as e:
+        raise BookingError(f"Invalid {label.lower()} price: {str(e)}")
+    return price
+
+def create_booking(db: Session, booking: BookingRequest) -> Booking:
+    """Validate, price and persist a booking.
+
+    Shared by the /api/bookings route and the agent's create_booking tool;
+    the price is always calculated here, never taken from the caller.
+    """
+    # Validate passenger count
+    if booking.passengers < 1 or booking.passengers > 10:
+        raise BookingError("Passenger count must be between 1 and 10")
+
+    # Determine if this is a dynamic booking (AI-generated) or pre-defined trip
+    is_dynamic_booking = booking.trip_id.startswith("booking-")
+
+    if is_dynamic_booking:
+        # For dynamic bookings, calculate price from flight and hotel details
+        if not booking.flight_details or not booking.hotel_details:
+            raise BookingError("Flight and hotel details are required for dynamic bookings")
+
+        # Extract and validate pricing from flight details
+        if 'price' not in booking.flight_details:
+            raise BookingError("Flight price is required for dynamic bookings")
+        flight_price = _positive_price(booking.flight_details['price'], "Flight")
+
+        # Extract and validate pricing from hotel details
+        if 'price_per_night' not in booking.hotel_details:
+            raise BookingError("Hotel price per night is required for dynamic bookings")
+        hotel_price_per_night = _positive_price(booking.hotel_details['price_per_night'], "Hotel")
+
+        # Validate and calculate number of nights from dates
+        nights = _parse_trip_dates(booking.start_date, booking.end_date)
+
+        # Calculate total: (flight × passengers) + (hotel × nights)
+        flight_total = flight_price * booking.passengers
+        hotel_total = hotel_price_per_night * nights
+        calculated_total = flight_total + hotel_total
+        base_price = calculated_total / booking.passengers  # For record keeping
+    else:
+        # For pre-defined trips, use existing secure pricing
+        if booking.trip_id not in TRIP_PRICES:
+            raise BookingError(f"Unknown trip ID: {booking.trip_id}")
+
+        # Dates are stored in DATE columns, so reject malformed ones up front
+        if parse_date_input(booking.start_date) is None or parse_date_input(booking.end_date) is None:
+            raise BookingError("Invalid date format. Use YYYY-MM-DD")
+
+        # Calculate total using TRUSTED server-side pricing
+        base_price = TRIP_PRICES[booking.trip_id]
+        calculated_total = base_price * booking.passengers
+
+    booking_id = new_booking_id()
+
+    # Extract email from flight_details if not provided directly
+    email = booking.email
+    if not email and booking.flight_details and isinstance(booking.flight_details, dict):
+        email = booking.flight_details.get('email')
+
+    # Extract special_requests from flight_details if not provided directly
+    special_requests = booking.special_requests
+    if not special_requests and booking.flight_details and isinstance(booking.flight_details, dict):
+        special_requests = booking.flight_details.get('special_requests')
+
+    db_booking = Booking(
+        booking_id=booking_id,
+        trip_id=booking.trip_id,
+        trip_name=booking.trip_name,
+        destination=booking.destination,
+        start_date=booking.start_date,
+        end_date=booking.end_date,
+        base_price=base_price,
+        total_price=calculated_total,
+        passengers=booking.passengers,
+        email=email,
+        flight_details=booking.flight_details or {},
+        hotel_details=booking.hotel_details or {},
+        special_requests=special_requests,
+        status="pending",
+        payment_status="unpaid"
+    )
+
+    try:
+        db.add(db_booking)
+        db.commit()
+        db.refresh(db_booking)
+    except Exception:
+        db.rollback()
+        raise
+
+    return db_booking
+
+def booking_summary(db_booking: Booking) -> Dict[str, Any]:
+    """Response payload for a newly created booking."""
+    return {
+        "id": db_booking.booking_id,
+        "booking_id": db_booking.booking_id,
+        "trip_id": db_booking.trip_id,
+        "trip_name": db_booking.trip_name,
+        "destination": db_booking.destination,
+        "start_date": db_booking.start_date,
+        "end_date": db_booking.end_date,
+        "base_price": db_booking.base_price,
+        "total_price": db_booking.total_price,
+        "passengers": db_booking.passengers,
+        "email": db_booking.email,
+        "flight_details": db_booking.flight_details,
+        "hotel_details": db_booking.hotel_details,
+        "special_requests": db_booking.special_requests,
+        "status": db_booking.status,
+        "payment_status": db_booking.payment_status,
+        "created_at": db_booking.created_at.isoformat() if db_booking.created_at else datetime.now().isoformat()
+    }
+
+def booking_detail(db_booking: Booking) -> Dict[str, Any]:
+    """Full booking payload for GET /api/bookings/{id}."""
+    return serializers.booking_details.one(db_booking)
+
+class BookingCache:
+    """Bounded LRU/TTL read-through cache of booking details.
+
+    Changes made on this process are written through with put(). Entries
+    older than `revalidate` seconds are checked against bookings.updated_at
+    (a single column) before being served, so changes made by other workers
+    show up within that window.
+    """
+
+    def __init__(self, maxsize: int = BOOKING_CACHE_MAXSIZE, ttl: float = BOOKING_CACHE_TTL,
+                 revalidate: float = BOOKING_CACHE_REVALIDATE):
+        self.revalidate = revalidate
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.revalidations = 0
+        self.reloads = 0
+
+    def get(self, db: Session, booking_id: str) -> Optional[Dict[str, Any]]:
+        """Booking details, from the cache when they are still current; None if there is no such booking."""
+        now = time.monotonic()
+        entry = self._entries.get(booking_id)
+        if entry is not None:
+            data, version, checked_at = entry
+            if now - checked_at < self.revalidate:
+                return data
+            self.revalidations += 1
+            current = db.query(Booking.updated_at).filter(Booking.booking_id == booking_id).first()
+            if current is not None and current[0] == version:
+                self._entries.set(booking_id, (data, version, now))
+                return data
+
+        self.reloads += 1
+        booking = db.query(Booking).filter(Booking.booking_id == booking_id).first()
+        if booking is None:
+            self._entries.delete(booking_id)
+            return None
+        return self.put(booking)
+
+    def put(self, db_booking: Booking) -> Dict[str, Any]:
+        """Cache a booking as just read or written; returns its details."""
+        data = booking_detail(db_booking)
+        self._entries.set(db_booking.booking_id, (data, db_booking.updated_at, time.monotonic()))
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._entries.stats(), "revalidations": self.revalidations, "reloads": self.reloads}
+
+booking_cache = BookingCache()
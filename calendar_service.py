@@ -0,0 +1,204 @@
+import os
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from pydantic import BaseModel
+from sqlalchemy import insert, update, delete
+from sqlalchemy.orm import Session
+
+from database import CalendarEvent, parse_date_input
+from serializers import EVENT_TYPE_COLORS, DEFAULT_EVENT_COLOR
+
+# Largest batch accepted by the bulk calendar endpoints
+CALENDAR_BULK_MAX_EVENTS = int(os.environ.get("CALENDAR_BULK_MAX_EVENTS", "500"))
+
+class CalendarEventRequest(BaseModel):
+    title: str
+    description: Optional[str] = None
+    start_date: str
+    end_date: str
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    all_day: Optional[str] = "true"
+    event_type: Optional[str] = "personal"
+    tags: Optional[List[str]] = None
+    color: Optional[str] = None
+    booking_id: Optional[str] = None
+    reminder_enabled: Optional[str] = "false"
+    reminder_time: Optional[str] = None
+
+class CalendarEventUpdate(CalendarEventRequest):
+    id: int
+
+def validate_event(event: CalendarEventRequest) -> Optional[str]:
+    """Return the first validation error for an event, or None if it is valid."""
+    if not event.title or not event.title.strip():
+        return "Event title is required"
+
+    if not event.start_date or not event.end_date:
+        return "Start date and end date are required"
+
+    # Same rule the ISODate columns apply on write, so a valid event can always be stored
+    start_date_obj = parse_date_input(event.start_date)
+    end_date_obj = parse_date_input(event.end_date)
+    if start_date_obj is None or end_date_obj is None:
+        return "Invalid date format. Please use YYYY-MM-DD format"
+
+    if end_date_obj < start_date_obj:
+        return "End date must be on or after start date"
+
+    # Timed (non all-day) events need a valid start and end time
+    if event.all_day == "false":
+        if not event.start_time or not event.end_time:
+            return "Start time and end time are required for timed events"
+
+        try:
+            start_time_obj = datetime.strptime(event.start_time, "%H:%M")
+            end_time_obj = datetime.strptime(event.end_time, "%H:%M")
+        except ValueError:
+            return "Invalid time format. Please use HH:MM format"
+
+        # Time ordering only matters for same-day events
+        if start_date_obj == end_date_obj and end_time_obj <= start_time_obj:
+            return "End time must be after start time"
+
+    return None
+
+def new_event_values(event: CalendarEventRequest) -> Dict[str, Any]:
+    """Column values for a new event (colour defaults from the event type)."""
+    return {
+        "title": event.title.strip(),
+        "description": event.description,
+        "start_date": event.start_date,
+        "end_date": event.end_date,
+        "start_time": event.start_time,
+        "end_time": event.end_time,
+        "all_day": event.all_day or "true",
+        "event_type": event.event_type or "personal",
+        "tags": event.tags or [],
+        "color": event.color or EVENT_TYPE_COLORS.get(event.event_type, DEFAULT_EVENT_COLOR),
+        "booking_id": event.booking_id,
+        "reminder_enabled": event.reminder_enabled or "false",
+        "reminder_time": event.reminder_time
+    }
+
+def updated_event_values(event: CalendarEventRequest, current: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values for an edit; type, tags, colour and reminder flag keep their current value when omitted."""
+    return {
+        "title": event.title.strip(),
+        "description": event.description,
+        "start_date": event.start_date,
+        "end_date": event.end_date,
+        "start_time": event.start_time,
+        "end_time": event.end_time,
+        "all_day": event.all_day or "true",
+        "event_type": event.event_type or current["event_type"],
+        "tags": event.tags or current["tags"],
+        "color": event.color or current["color"],
+        "reminder_enabled": event.reminder_enabled or current["reminder_enabled"],
+        "reminder_time": event.reminder_time,
+        "updated_at": datetime.utcnow()
+    }
+
+def _batch_response(results: List[Dict[str, Any]], done_key: str, atomic: bool) -> Dict[str, Any]:
+    failed = sum(1 for r in results if r["status"] == "error")
+    if atomic and failed:
+        # Nothing was written: report the valid items as skipped
+        for r in results:
+            if r["status"] != "error":
+                r["status"] = "skipped"
+        return {
+            "status": "error",
+            "error": f"{failed} of {len(results)} events are invalid; nothing was saved",
+            done_key: 0,
+            "failed": failed,
+            "results": results
+        }
+    return {
+        "status": "success",
+        done_key: len(results) - failed,
+        "failed": failed,
+        "results": results
+    }
+
+def bulk_create_events(db: Session, events: List[CalendarEventRequest], atomic: bool = False) -> Dict[str, Any]:
+    """Validate every event, then insert the valid ones in one transaction with a batched INSERT ... RETURNING.
+
+    With atomic=True a single invalid event rejects the whole batch.
+    """
+    results: List[Dict[str, Any]] = []
+    rows = []
+    for index, event in enumerate(events):
+        error = validate_event(event)
+        if error:
+            results.append({"index": index, "status": "error", "error": error})
+        else:
+            results.append({"index": index, "status": "success"})
+            rows.append(new_event_values(event))
+
+    if rows and not (atomic and len(rows) < len(events)):
+        # sort_by_parameter_order keeps the returned ids in input order. PostgreSQL
+        # runs this as batched multi-row INSERTs; SQLite has no insert sentinel, so
+        # it inserts row by row, still inside the one transaction and commit.
+        event_ids = db.scalars(
+            insert(CalendarEvent).returning(CalendarEvent.id, sort_by_parameter_order=True), rows
+        ).all()
+        db.commit()
+        ids = iter(event_ids)
+        for result in results:
+            if result["status"] == "success":
+                result["event_id"] = next(ids)
+
+    return _batch_response(results, "created", atomic)
+
+def bulk_update_events(db: Session, events: List[CalendarEventUpdate], atomic: bool = False) -> Dict[str, Any]:
+    """Validate every edit, load the targeted events in one query and apply the valid edits as one executemany UPDATE."""
+    columns = (CalendarEvent.id, CalendarEvent.event_type, CalendarEvent.tags,
+               CalendarEvent.color, CalendarEvent.reminder_enabled)
+    ids = {event.id for event in events}
+    current = {row.id: row._asdict() for row in db.query(*columns).filter(CalendarEvent.id.in_(ids))} if ids else {}
+
+    results: List[Dict[str, Any]] = []
+    rows = []
+    seen = set()
+    for index, event in enumerate(events):
+        if event.id not in current:
+            error = "Event not found"
+        elif event.id in seen:
+            error = "Event appears more than once in the batch"
+        else:
+            error = validate_event(event)
+        if error:
+            results.append({"index": index, "event_id": event.id, "status": "error", "error": error})
+            continue
+        seen.add(event.id)
+        results.append({"index": index, "event_id": event.id, "status": "success"})
+        rows.append({"id": event.id, **updated_event_values(event, current[event.id])})
+
+    if rows and not (atomic and len(rows) < len(events)):
+        # Primary-key bulk UPDATE: one executemany for the whole batch
+        db.execute(update(CalendarEvent), rows)
+        db.commit()
+
+    return _batch_response(results, "updated", atomic)
+
+def bulk_delete_events(db: Session, event_ids: List[int]) -> Dict[str, Any]:
+    """Delete the given events with one DELETE ... WHERE id IN (...); unknown ids are reported per item."""
+    ids = set(event_ids)
+    found = {row.id for row in db.query(CalendarEvent.id).filter(CalendarEvent.id.in_(ids))} if ids else set()
+    if found:
+        db.execute(delete(CalendarEvent).where(CalendarEvent.id.in_(found)), execution_options={"synchronize_session": False})
+        db.commit()
+
+    results: List[Dict[str, Any]] = []
+    seen = set()
+    for index, event_id in enumerate(event_ids):
+        if event_id not in found:
+            results.append({"index": index, "event_id": event_id, "status": "error", "error": "Event not found"})
+        elif event_id in seen:
+            results.append({"index": index, "event_id": event_id, "status": "error",
+                            "error": "Event appears more than once in the batch"})
+        else:
+            seen.add(event_id)
+            results.append({"index": index, "event_id": event_id, "status": "success"})
+    return _batch_response(results, "deleted", False)
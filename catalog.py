@@ -0,0 +1,242 @@
+import os
+import csv
+import json
+import heapq
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Directory with flights/hotels/activities inventory files (.jsonl, .json or .csv)
+CATALOG_DIR = os.environ.get("CATALOG_DIR", "")
+# Results returned by the search tools
+CATALOG_TOP_K = int(os.environ.get("CATALOG_TOP_K", "10"))
+
+# Per kind: fields that key an index, the price field, and the fields with inverted indexes
+KINDS = {
+    "flights": {"key": ("origin", "destination"), "price": "price", "facets": ("airline", "stops", "class")},
+    "hotels": {"key": ("city",), "price": "price_per_night", "facets": ("style", "amenities")},
+    "activities": {"key": ("city",), "price": "price", "facets": ("category",)},
+}
+
+NUMERIC_FIELDS = {"price", "price_per_night", "rating", "reviews", "stops"}
+# CSV columns holding lists, e.g. "Pool|WiFi|Spa"
+LIST_FIELDS = {"amenities", "tags"}
+
+# (field, descending) pairs; "price" means the kind's price field
+SortSpec = Sequence[Tuple[str, bool]]
+
+
+def _norm(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class _Desc:
+    """Inverts comparisons so non-numeric fields can sort descending."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+class InventoryIndex:
+    """Indexed inventory for one city (or route).
+
+    Prices and ratings are kept as sorted arrays, so range filters are two
+    bisects; facet values (style, category, amenities...) map to the set of
+    items that have them. Queries drive from whichever candidate set is
+    cheapest, and walk the sort order directly (stopping after k matches)
+    when that is cheaper than collecting and ranking every candidate.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]], price_field: str, facets: Iterable[str]):
+        self.items = items
+        self.price_field = price_field
+        n = len(items)
+        self._prices = [float(item.get(price_field) or 0) for item in items]
+        self._ratings = [float(item.get("rating") or 0) for item in items]
+        self._by_price = sorted(range(n), key=self._prices.__getitem__)
+        self._price_keys = [self._prices[i] for i in self._by_price]
+        # Best rated first
+        self._by_rating = sorted(range(n), key=lambda i: -self._ratings[i])
+        self._rating_keys = [-self._ratings[i] for i in self._by_rating]
+        self._postings: Dict[str, Dict[str, set]] = {}
+        for facet in facets:
+            postings: Dict[str, set] = {}
+            for i, item in enumerate(items):
+                values = item.get(facet)
+                for value in values if isinstance(values, list) else [values]:
+                    if value is not None:
+                        postings.setdefault(_norm(value), set()).add(i)
+            self._postings[facet] = postings
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _value(self, i: int, field: str):
+        if field in ("price", self.price_field):
+            return self._prices[i]
+        if field == "rating":
+            return self._ratings[i]
+        return self.items[i].get(field)
+
+    def _sort_key(self, sort: SortSpec):
+        def key(i: int):
+            parts = []
+            for field, descending in sort:
+                value = self._value(i, field)
+                if value is None:
+                    value = ""
+                if descending:
+                    value = -value if isinstance(value, (int, float)) else _Desc(value)
+                parts.append(value)
+            parts.append(i)
+            return tuple(parts)
+        return key
+
+    def _ordered_walk(self, field: str, descending: bool, lo: int, hi: int, rating_hi: int):
+        """Item ids in sort order, limited to the price/rating range already bisected."""
+        if field == "rating":
+            ids = self._by_rating[:rating_hi]
+            return ids if descending else reversed(ids)
+        ids = self._by_price[lo:hi]
+        return reversed(ids) if descending else ids
+
+    def query(self, min_price: Optional[float] = None, max_price: Optional[float] = None,
+              min_rating: Optional[float] = None, filters: Optional[Dict[str, Iterable[Any]]] = None,
+              sort: SortSpec = (("rating", True),), limit: int = CATALOG_TOP_K) -> List[Dict[str, Any]]:
+        """Top `limit` items in range, matching any of the given values for every filtered facet."""
+        n = len(self.items)
+        lo = bisect_left(self._price_keys, min_price) if min_price is not None else 0
+        hi = bisect_right(self._price_keys, max_price) if max_price is not None else n
+        rating_hi = bisect_right(self._rating_keys, -min_rating) if min_rating is not None else n
+        if lo >= hi or not rating_hi or limit <= 0:
+            return []
+
+        facet_sets = []
+        for facet, values in (filters or {}).items():
+            postings = self._postings.get(facet)
+            if postings is None:
+                raise ValueError(f"'{facet}' is not an indexed field")
+            matched = [postings.get(_norm(v), set()) for v in values]
+            facet_sets.append(matched[0] if len(matched) == 1 else set().union(*matched))
+        if any(not s for s in facet_sets):
+            return []
+
+        def matches(i: int) -> bool:
+            price = self._prices[i]
+            return ((min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+                    and (min_rating is None or self._ratings[i] >= min_rating)
+                    and all(i in s for s in facet_sets))
+
+        key = self._sort_key(sort)
+        primary, descending = sort[0] if sort else ("rating", True)
+        primary = "price" if primary == self.price_field else primary
+
+        # Cost of collecting the smallest candidate set and ranking it...
+        candidates: Iterable[int] = self._by_price[lo:hi] if hi - lo <= rating_hi else self._by_rating[:rating_hi]
+        set_cost = min(hi - lo, rating_hi)
+        for s in facet_sets:
+            if len(s) < set_cost:
+                candidates, set_cost = s, len(s)
+        # ...versus walking the primary sort order until `limit` matches turn up
+        if primary in ("price", "rating"):
+            selectivity = min(hi - lo, rating_hi) / n
+            for s in facet_sets:
+                selectivity *= len(s) / n
+            if limit / max(selectivity, 1e-9) < set_cost:
+                ids = self._ordered_walk(primary, descending, lo, hi, rating_hi)
+                return self._walk_top_k(ids, primary, matches, key, limit)
+
+        return [dict(self.items[i]) for i in heapq.nsmallest(limit, (i for i in candidates if matches(i)), key=key)]
+
+    def _walk_top_k(self, ids, primary, matches, key, limit):
+        found: List[int] = []
+        boundary = None
+        for i in ids:
+            if boundary is not None and self._value(i, primary) != boundary:
+                break
+            if matches(i):
+                found.append(i)
+                # Keep going through ties on the primary key so secondary keys decide
+                if len(found) == limit:
+                    boundary = self._value(i, primary)
+        return [dict(self.items[i]) for i in sorted(found, key=key)[:limit]]
+
+
+class Catalog:
+    """Flight, hotel and activity inventory, indexed per route or city."""
+
+    def __init__(self):
+        self._indexes: Dict[str, Dict[Tuple[str, ...], InventoryIndex]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, kind: str, records: Iterable[Dict[str, Any]]) -> int:
+        """Replace a kind's inventory (e.g. rows from a file or a DB query); returns the item count."""
+        spec = KINDS[kind]
+        grouped: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        count = 0
+        for record in records:
+            grouped.setdefault(tuple(_norm(record.get(f, "")) for f in spec["key"]), []).append(record)
+            count += 1
+        indexes = {key: InventoryIndex(items, spec["price"], spec["facets"]) for key, items in grouped.items()}
+        with self._lock:
+            self._indexes[kind] = indexes
+        return count
+
+    def load_dir(self, directory: str) -> Dict[str, int]:
+        loaded = {}
+        for kind in KINDS:
+            for ext in (".jsonl", ".json", ".csv"):
+                path = os.path.join(directory, kind + ext)
+                if os.path.exists(path):
+                    loaded[kind] = self.load(kind, _read_records(path, kind))
+                    break
+        return loaded
+
+    def index(self, kind: str, *key: str) -> Optional[InventoryIndex]:
+        return self._indexes.get(kind, {}).get(tuple(_norm(k) for k in key))
+
+    def query(self, kind: str, key: Sequence[str], **kwargs) -> Optional[List[Dict[str, Any]]]:
+        """Query one city's (or route's) inventory; None if the catalog has none for it."""
+        index = self.index(kind, *key)
+        return index.query(**kwargs) if index is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                kind: {"keys": len(indexes), "items": sum(len(ix) for ix in indexes.values())}
+                for kind, indexes in self._indexes.items()
+            }
+
+
+def _read_records(path: str, kind: str) -> List[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        if path.endswith(".json"):
+            data = json.load(f)
+            return data[kind] if isinstance(data, dict) else data
+        records = []
+        for row in csv.DictReader(f):
+            for field, value in row.items():
+                if field in NUMERIC_FIELDS and value not in (None, ""):
+                    row[field] = float(value) if "." in value else int(value)
+                elif field in LIST_FIELDS:
+                    row[field] = [v.strip() for v in (value or "").split("|") if v.strip()]
+            records.append(row)
+        return records
+
+
+catalog = Catalog()
+
+if CATALOG_DIR:
+    try:
+        print(f"Loaded catalog from {CATALOG_DIR}: {catalog.load_dir(CATALOG_DIR)}")
+    except Exception as e:
+        print(f"Warning: Failed to load catalog from {CATALOG_DIR}: {e}")
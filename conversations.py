@@ -0,0 +1,168 @@
+import os
+import time
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from database import SessionLocal, ConversationMessage
+from trip_facts import extract_message_facts, merge_trip_facts
+
+# Registry limits (overridable from the environment)
+MAX_CONVERSATIONS = int(os.environ.get("AGENT_MAX_CONVERSATIONS", "1000"))
+CONVERSATION_TTL_SECONDS = int(os.environ.get("AGENT_CONVERSATION_TTL_SECONDS", "3600"))
+MAX_HISTORY_MESSAGES = int(os.environ.get("AGENT_MAX_HISTORY_MESSAGES", "40"))
+
+
+
+def new_conversation_id() -> str:
+    """An unguessable id for a conversation started without one."""
+    return secrets.token_urlsafe(16)
+
+
+class ConversationHistory(BaseChatMessageHistory):
+    """Chat history for one conversation, mirrored to the conversation_messages table.
+
+    Only the most recent max_messages are kept in memory; the full transcript
+    stays in the database. Trip details are extracted from each message once,
+    as it is added, and merged on demand by trip_facts().
+    """
+
+    def __init__(self, conversation_id: str, messages: Optional[List[BaseMessage]] = None,
+                 max_messages: int = MAX_HISTORY_MESSAGES):
+        self.conversation_id = conversation_id
+        self.max_messages = max_messages
+        self._messages: List[BaseMessage] = list(messages or [])[-max_messages:]
+        self._facts: List[Dict[str, Any]] = [extract_message_facts(str(m.content)) for m in self._messages]
+        self._trip: Optional[Dict[str, Any]] = None
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return self._messages
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        messages = list(messages)
+        db = SessionLocal()
+        try:
+            for msg in messages:
+                db.add(ConversationMessage(
+                    conversation_id=self.conversation_id,
+                    role="assistant" if isinstance(msg, AIMessage) else "user",
+                    content=str(msg.content)
+                ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Failed to persist conversation {self.conversation_id}: {e}")
+        finally:
+            db.close()
+
+        facts = [extract_message_facts(str(m.content)) for m in messages]
+        self._messages.extend(messages)
+        self._facts.extend(facts)
+        if len(self._messages) > self.max_messages:
+            del self._messages[:len(self._messages) - self.max_messages]
+            del self._facts[:len(self._facts) - self.max_messages]
+        self._trip = None
+
+    def add_message(self, message: BaseMessage) -> None:
+        self.add_messages([message])
+
+    def trip_facts(self) -> Dict[str, Any]:
+        """Destination, dates, budget and passengers mentioned in the kept messages."""
+        trip = self._trip
+        if trip is None:
+            trip = self._trip = merge_trip_facts(self._facts)
+        return dict(trip)
+
+    def clear(self) -> None:
+        self._messages = []
+        self._facts = []
+        self._trip = None
+        db = SessionLocal()
+        try:
+            db.query(ConversationMessage).filter(
+                ConversationMessage.conversation_id == self.conversation_id
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Warning: Failed to clear conversation {self.conversation_id}: {e}")
+        finally:
+            db.close()
+
+
+class ConversationRegistry:
+    """LRU/TTL registry of per-conversation chat histories.
+
+    Histories are loaded from the database on first access, evicted when idle
+    for longer than ttl_seconds or when more than max_conversations are live.
+    """
+
+    def __init__(self, max_conversations: int = MAX_CONVERSATIONS,
+                 ttl_seconds: int = CONVERSATION_TTL_SECONDS,
+                 max_messages: int = MAX_HISTORY_MESSAGES):
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id: str) -> ConversationHistory:
+        """Return the history for a conversation, loading it from the database if needed."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._entries.get(conversation_id)
+            if entry is not None:
+                self._entries[conversation_id] = (entry[0], now)
+                self._entries.move_to_end(conversation_id)
+                return entry[0]
+
+        history = ConversationHistory(conversation_id, self._load(conversation_id), self.max_messages)
+
+        with self._lock:
+            # Another request may have loaded it while we were reading the DB
+            entry = self._entries.get(conversation_id)
+            if entry is not None:
+                history = entry[0]
+            self._entries[conversation_id] = (history, now)
+            self._entries.move_to_end(conversation_id)
+            while len(self._entries) > self.max_conversations:
+                self._entries.popitem(last=False)
+        return history
+
+    def reset(self, conversation_id: str) -> None:
+        """Clear a conversation both in memory and in the database."""
+        self.get(conversation_id).clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict_expired(self, now: float) -> None:
+        # Entries are kept in access order, so expired ones sit at the front
+        while self._entries:
+            conversation_id, (_, last_access) = next(iter(self._entries.items()))
+            if now - last_access < self.ttl_seconds:
+                break
+            self._entries.popitem(last=False)
+
+    def _load(self, conversation_id: str) -> List[BaseMessage]:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(ConversationMessage)
+                .filter(ConversationMessage.conversation_id == conversation_id)
+                .order_by(ConversationMessage.id.desc())
+                .limit(self.max_messages)
+                .all()
+            )
+            return [
+                AIMessage(content=row.content) if row.role == "assistant" else HumanMessage(content=row.content)
+                for row in reversed(rows)
+            ]
+        finally:
+            db.close()
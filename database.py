@@ -1,8 +1,11 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, JSON
+import re
+from sqlalchemy import create_engine, inspect, text, func, Column, Integer, String, Float, Date, DateTime, Text, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.types import TypeDecorator
+from datetime import datetime, date
+from typing import Optional
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
@@ -16,16 +19,89 @@ connect_args = {}
 if DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
+# Connection pool sizing; the API threadpool in main.py is sized to match
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=300,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
     connect_args=connect_args
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Year-month-day with loose separators and padding ("2026-1-5", "2026/01/05", "2026-01-05T10:00")
+LOOSE_DATE_PATTERN = re.compile(r"^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})")
+
+# Dates the API accepts for ISODate columns: YYYY-MM-DD, zero padding optional, optionally with a time
+INPUT_DATE_PATTERN = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ].*)?$")
+
+def parse_date_input(value) -> Optional[date]:
+    """Parse a date sent by a client; None if it isn't a valid date.
+    
+    This is the single rule for writes: request validators use it, and the
+    ISODate bind applies it, so anything validated can be stored.
+    """
+    if value is None or isinstance(value, date):
+        return value.date() if isinstance(value, datetime) else value
+    match = INPUT_DATE_PATTERN.match(str(value).strip())
+    if not match:
+        return None
+    try:
+        return date(*(int(part) for part in match.groups()))
+    except ValueError:
+        return None
+
+def parse_loose_date(value) -> Optional[date]:
+    """Parse a date value as stored by older versions; None if it isn't a real date."""
+    if value is None or isinstance(value, date):
+        return value.date() if isinstance(value, datetime) else value
+    match = LOOSE_DATE_PATTERN.match(str(value))
+    if not match:
+        return None
+    try:
+        return date(*(int(part) for part in match.groups()))
+    except ValueError:
+        return None
+
+class ISODate(TypeDecorator):
+    """DATE column that accepts and returns 'YYYY-MM-DD' strings.
+    
+    Stored as a real DATE so range filters and indexes work in SQL, while the
+    API keeps exchanging plain date strings. Reads are lenient: a legacy value
+    that isn't a valid date comes back as None instead of failing the query.
+    """
+    impl = Date
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        parsed = parse_date_input(value)
+        if parsed is None:
+            raise ValueError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+        return parsed
+    
+    def result_processor(self, dialect, coltype):
+        # Skip the driver's strict date parsing (SQLite's rejects "2026-1-5")
+        def process(value):
+            parsed = parse_loose_date(value)
+            return parsed.isoformat() if parsed is not None else None
+        return process
+
+def year_month(column):
+    """SQL expression bucketing a DATE column as 'YYYY-MM' (portable across SQLite/Postgres)."""
+    if engine.dialect.name == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
 class User(Base):
     __tablename__ = "users"
     
@@ -44,7 +120,7 @@ class Session(Base):
     user_id = Column(Integer, nullable=False)
     email = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)  # set from remember_me at signin
 
 class Itinerary(Base):
     __tablename__ = "itineraries"
@@ -61,6 +137,10 @@ class Itinerary(Base):
     itinerary_data = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_itineraries_created_id", "created_at", "id"),
+    )
 
 class Booking(Base):
     __tablename__ = "bookings"
@@ -71,8 +151,8 @@ class Booking(Base):
     trip_id = Column(String, nullable=False)
     trip_name = Column(String, nullable=False)
     destination = Column(String, nullable=False)
-    start_date = Column(String, nullable=False)
-    end_date = Column(String, nullable=False)
+    start_date = Column(ISODate, nullable=False)
+    end_date = Column(ISODate, nullable=False)
     base_price = Column(Float, nullable=False)
     total_price = Column(Float, nullable=False)
     passengers = Column(Integer, nullable=False)
@@ -87,6 +167,11 @@ class Booking(Base):
     confirmed_at = Column(DateTime)
     cancelled_at = Column(DateTime)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_bookings_user_dates", "user_id", "start_date", "end_date"),
+        Index("ix_bookings_created_id", "created_at", "id"),
+    )
 
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
@@ -95,8 +180,8 @@ class CalendarEvent(Base):
     user_id = Column(String, default="default_user", index=True)
     title = Column(String, nullable=False)
     description = Column(Text)
-    start_date = Column(String, nullable=False)
-    end_date = Column(String, nullable=False)
+    start_date = Column(ISODate, nullable=False)
+    end_date = Column(ISODate, nullable=False)
     start_time = Column(String)  # Optional time in HH:MM format
     end_time = Column(String)  # Optional time in HH:MM format
     all_day = Column(String, default="true")  # "true" or "false" as string
@@ -108,9 +193,98 @@ class CalendarEvent(Base):
     reminder_time = Column(String)  # e.g., "1 day before", "1 hour before"
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_calendar_events_user_dates", "user_id", "start_date", "end_date"),
+    )
+
+class ConversationMessage(Base):
+    __tablename__ = "conversation_messages"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    conversation_id = Column(String, index=True, nullable=False)
+    role = Column(String, nullable=False)  # user, assistant
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class PlanJob(Base):
+    __tablename__ = "plan_jobs"
+    
+    id = Column(String, primary_key=True)  # random hex id handed to the client
+    conversation_id = Column(String, nullable=False)
+    query = Column(Text, nullable=False)
+    priority = Column(Integer, default=0)  # higher runs first
+    status = Column(String, default="queued", nullable=False)  # queued, running, succeeded, failed
+    attempts = Column(Integer, default=0)
+    result = Column(JSON)  # same fields as the /api/plan response
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        Index("ix_plan_jobs_status_priority", "status", "priority", "created_at"),
+    )
+
+# Columns that used to be VARCHAR and are now ISODate
+DATE_COLUMNS = {
+    "bookings": ["start_date", "end_date"],
+    "calendar_events": ["start_date", "end_date"],
+}
+
+def _normalize_legacy_dates(conn, table, columns):
+    """Rewrite date values that aren't plain YYYY-MM-DD strings.
+    
+    Older versions stored whatever the client sent. Values that parse loosely
+    are rewritten as YYYY-MM-DD; unparseable ones (the columns are NOT NULL)
+    take the row's other date, else its created_at date.
+    """
+    if engine.dialect.name == "postgresql":
+        non_iso = " OR ".join(f"{c} !~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$'" for c in columns)
+    else:
+        non_iso = " OR ".join(f"{c} NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'" for c in columns)
+    rows = conn.execute(text(f"SELECT id, created_at, {', '.join(columns)} FROM {table} WHERE {non_iso}")).all()
+    for row in rows:
+        parsed = {c: parse_loose_date(getattr(row, c)) for c in columns}
+        fallback = next((d for d in parsed.values() if d is not None), None) \
+            or parse_loose_date(row.created_at) or date.today()
+        values = {c: (d or fallback).isoformat() for c, d in parsed.items()}
+        conn.execute(text(f"UPDATE {table} SET {', '.join(f'{c} = :{c}' for c in columns)} WHERE id = :id"),
+                     {**values, "id": row.id})
+    if rows:
+        print(f"Warning: Normalized legacy dates in {len(rows)} {table} row(s)")
+
+def _migrate_date_columns():
+    """Convert legacy VARCHAR date columns to DATE, normalizing loose values first.
+    
+    SQLite keeps dates as text either way, so there only the values are normalized.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table, columns in DATE_COLUMNS.items():
+            if not inspector.has_table(table):
+                continue
+            column_types = {c["name"]: c["type"] for c in inspector.get_columns(table)}
+            legacy = [c for c in columns if c in column_types and not isinstance(column_types[c], Date)]
+            if engine.dialect.name != "postgresql":
+                _normalize_legacy_dates(conn, table, [c for c in columns if c in column_types])
+                continue
+            if not legacy:
+                continue
+            _normalize_legacy_dates(conn, table, legacy)
+            for column in legacy:
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE DATE USING {column}::date"))
+
+def _ensure_indexes():
+    """create_all only indexes new tables; add any indexes missing from existing ones."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _migrate_date_columns()
+    _ensure_indexes()
 
 def get_db():
     db = SessionLocal()
@@ -1,21 +1,60 @@
 import os
 import math
-from fastapi import FastAPI, HTTPException, Depends
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Body
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel
-from agent.travel_agent import TravelPlannerAgent
+from agent.travel_agent import TravelPlannerAgent, search_flights, search_hotels
+from agent.tool_output import decode_tool_result
+from agent.tool_cache import tool_cache
+from agent.llm_client import llm_limiter
+from conversations import ConversationRegistry, new_conversation_id
+from plan_jobs import PlanJobQueue, JobQueueFull, load_job
+from auth_sessions import session_store, bearer_token
 import uvicorn
 import stripe
 from stripe._error import StripeError
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime, date, timedelta
 import json
+from sqlalchemy import func, case
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from database import init_db, get_db, Itinerary, Booking, CalendarEvent, User, Session as DBSession
+from database import init_db, get_db, parse_loose_date, year_month, DB_POOL_SIZE, DB_MAX_OVERFLOW, Itinerary, Booking, CalendarEvent, User
+import booking_service
+from booking_ids import new_booking_id
+from booking_service import BookingRequest, BookingError, booking_cache
+import calendar_service
+from calendar_service import CalendarEventRequest, CalendarEventUpdate, CALENDAR_BULK_MAX_EVENTS
+from cache import TTLCache
+from catalog import catalog, CATALOG_TOP_K
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, project
+import serializers
+from serializers import FastJSONResponse
+
+# Route handlers that touch the database are plain `def` functions, so FastAPI
+# runs them in its worker threadpool instead of on the event loop. The pool is
+# sized to match the DB connection pool so threads never queue for a connection.
+API_THREADPOOL_SIZE = int(os.environ.get("API_THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    # Background plan workers run on the server's event loop
+    if agent is not None:
+        await plan_jobs.start()
+    # Deletes expired rows from the sessions table every SESSION_SWEEP_INTERVAL seconds
+    session_store.start_sweeper()
+    yield
+    await session_store.stop_sweeper()
+    if agent is not None:
+        await plan_jobs.stop()
 
 # Initialize FastAPI app
-app = FastAPI(title="TripMind AI Agent")
+app = FastAPI(title="TripMind AI Agent", lifespan=lifespan)
 
 # Initialize database
 init_db()
@@ -33,38 +72,59 @@ try:
 except Exception as e:
     print(f"Warning: Failed to initialize AI agent: {e}. AI agent features will be unavailable.")
 
-# In-memory storage for bookings (fallback, but we'll use database)
-bookings_store = {}
+# Per-conversation chat histories (the agent itself is shared and stateless per request)
+conversations = ConversationRegistry()
+
+def resolve_conversation(conversation_id: Optional[str] = None,
+                         authorization: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """Return (registry key, id to hand back to the client) for a request's conversation.
+
+    Ids from signed-in users are namespaced to the user, so nobody else can
+    reach them; anonymous ids live in their own namespace, and an anonymous
+    caller without one gets a fresh unguessable id rather than a shared one.
+    """
+    public_id = (conversation_id or "").strip()[:128] or None
+    session = session_store.validate(bearer_token(authorization))
+    if session is not None:
+        scope = f"user-{session['user_id']}"
+    else:
+        scope = "anon"
+        public_id = public_id or new_conversation_id()
+    return (f"{scope}:{public_id}" if public_id else scope), public_id
+
+async def run_plan_job(query: str, conversation_id: str):
+    history = await run_in_threadpool(conversations.get, conversation_id)
+    async for event in agent.astream_plan(query, chat_history=history):
+        yield event
 
-# Server-side trip pricing (canonical source of truth)
-TRIP_PRICES = {
-    "goa-beach": 450.00,
-    "paris-family": 750.00,
-    "manali-adventure": 200.00
-}
+# Background plan runs for POST /api/plan/jobs
+plan_jobs = PlanJobQueue(run_plan_job)
+
+def client_error(e: Exception) -> str:
+    """Error text safe to return to clients; database errors (which carry SQL and parameters) are only logged."""
+    if isinstance(e, SQLAlchemyError):
+        print(f"Database error: {e}")
+        return "A database error occurred"
+    return str(e)
+
+def sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
 
 # Request/Response models
 class TravelQuery(BaseModel):
     query: str
+    conversation_id: Optional[str] = None
+
+class PlanJobRequest(TravelQuery):
+    priority: int = 0  # higher runs first
 
 class TravelResponse(BaseModel):
     status: str
     response: str
     request: str = ""
     error: str = ""
-
-class BookingRequest(BaseModel):
-    trip_id: str
-    trip_name: str
-    destination: str
-    start_date: str
-    end_date: str
-    total_price: float
-    passengers: int
-    email: Optional[str] = None
-    flight_details: Optional[Dict[str, Any]] = None
-    hotel_details: Optional[Dict[str, Any]] = None
-    special_requests: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
+    conversation_id: Optional[str] = None
 
 class PaymentRequest(BaseModel):
     booking_id: str
@@ -80,21 +140,6 @@ class AuthSignUpRequest(BaseModel):
     email: str
     password: str
 
-class CalendarEventRequest(BaseModel):
-    title: str
-    description: Optional[str] = None
-    start_date: str
-    end_date: str
-    start_time: Optional[str] = None
-    end_time: Optional[str] = None
-    all_day: Optional[str] = "true"
-    event_type: Optional[str] = "personal"
-    tags: Optional[List[str]] = None
-    color: Optional[str] = None
-    booking_id: Optional[str] = None
-    reminder_enabled: Optional[str] = "false"
-    reminder_time: Optional[str] = None
-
 class ItineraryRequest(BaseModel):
     trip_name: str
     destination: str
@@ -113,26 +158,18 @@ async def read_root():
     """Serve the main HTML page."""
     return FileResponse("static/index.html")
 
-import secrets
-from passlib.context import CryptContext
-
-# Password hashing context using bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    return pwd_context.hash(password)
+# bcrypt runs on a dedicated, size-limited pool (see passwords.py)
+from passwords import hash_password, verify_and_update, PasswordHasherBusy
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash."""
-    return pwd_context.verify(plain_password, hashed_password)
-
-def generate_token() -> str:
-    """Generate a secure random token."""
-    return secrets.token_urlsafe(32)
+def current_session(authorization: Optional[str] = Header(None)) -> Dict[str, Any]:
+    """Dependency for endpoints that need a signed-in user; served from the session cache."""
+    session = session_store.validate(bearer_token(authorization))
+    if session is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+    return session
 
 @app.post("/api/auth/signup")
-async def signup(request: AuthSignUpRequest, db: Session = Depends(get_db)):
+def signup(request: AuthSignUpRequest, db: Session = Depends(get_db)):
     """User signup endpoint."""
     try:
         # Check if user already exists
@@ -154,13 +191,7 @@ async def signup(request: AuthSignUpRequest, db: Session = Depends(get_db)):
         db.refresh(new_user)
         
         # Generate auth token
-        token = generate_token()
-        new_session = DBSession(
-            token=token,
-            user_id=new_user.id,
-            email=new_user.email
-        )
-        db.add(new_session)
+        token = session_store.create(db, new_user.id, new_user.email).token
         db.commit()
         
         return {
@@ -171,12 +202,14 @@ async def signup(request: AuthSignUpRequest, db: Session = Depends(get_db)):
             },
             "token": token
         }
+    except PasswordHasherBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.post("/api/auth/signin")
-async def signin(request: AuthSignInRequest, db: Session = Depends(get_db)):
+def signin(request: AuthSignInRequest, db: Session = Depends(get_db)):
     """User signin endpoint."""
     try:
         # Check if user exists
@@ -188,20 +221,19 @@ async def signin(request: AuthSignInRequest, db: Session = Depends(get_db)):
             }
         
         # Verify password
-        if not verify_password(request.password, user.password_hash):
+        verified, upgraded_hash = verify_and_update(request.password, user.password_hash)
+        if not verified:
             return {
                 "status": "error",
                 "message": "Invalid email or password"
             }
         
-        # Generate auth token
-        token = generate_token()
-        new_session = DBSession(
-            token=token,
-            user_id=user.id,
-            email=user.email
-        )
-        db.add(new_session)
+        # Opportunistically rehash if the configured bcrypt cost has changed
+        if upgraded_hash:
+            user.password_hash = upgraded_hash
+        
+        # Generate auth token; remember_me sessions last longer
+        token = session_store.create(db, user.id, user.email, remember_me=bool(request.remember_me)).token
         db.commit()
         
         return {
@@ -212,25 +244,33 @@ async def signin(request: AuthSignInRequest, db: Session = Depends(get_db)):
             },
             "token": token
         }
+    except PasswordHasherBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.post("/api/auth/logout")
-async def logout(token: str, db: Session = Depends(get_db)):
+def logout(token: str, db: Session = Depends(get_db)):
     """User logout endpoint."""
     try:
-        session = db.query(DBSession).filter(DBSession.token == token).first()
-        if session:
-            db.delete(session)
-            db.commit()
+        session_store.revoke(db, token)
         return {"status": "success"}
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
+
+@app.get("/api/auth/me")
+def get_current_user(session: Dict[str, Any] = Depends(current_session)):
+    """The signed-in user for the bearer token."""
+    return {
+        "status": "success",
+        "user": {"id": session["user_id"], "email": session["email"]},
+        "expires_at": session["expires_at"].isoformat()
+    }
 
 @app.post("/api/plan", response_model=TravelResponse)
-async def plan_trip(query: TravelQuery):
+async def plan_trip(query: TravelQuery, authorization: Optional[str] = Header(None)):
     """
     Main endpoint for travel planning.
     Accepts natural language queries and returns AI-generated travel plans.
@@ -252,43 +292,137 @@ async def plan_trip(query: TravelQuery):
             error="AI agent is not available. Please set OPENROUTER_API_KEY environment variable."
         )
     try:
-        result = agent.plan_trip(query.query)
+        key, conversation_id = await run_in_threadpool(resolve_conversation, query.conversation_id, authorization)
+        history = await run_in_threadpool(conversations.get, key)
+        
+        # Async path: the LLM round trips and tool calls don't hold the event loop
+        result = await agent.aplan_trip(query.query, chat_history=history)
         
         return TravelResponse(
             status=result.get("status", "success"),
             response=result.get("response", ""),
             request=result.get("request", query.query),
-            error=result.get("error", "")
+            error=result.get("error", ""),
+            usage=result.get("usage"),
+            conversation_id=conversation_id
         )
     except Exception as e:
         return TravelResponse(
             status="error",
-            response=f"❌ An error occurred: {str(e)}",
+            response=f"❌ An error occurred: {client_error(e)}",
             request=query.query,
-            error=str(e)
+            error=client_error(e),
+            conversation_id=query.conversation_id
         )
 
+@app.post("/api/plan/stream")
+async def plan_trip_stream(query: TravelQuery, authorization: Optional[str] = Header(None)):
+    """
+    Streaming variant of /api/plan using Server-Sent Events.
+    Emits tool_start/tool_end progress events and token chunks as the agent works,
+    then a final done (or error) event with the same fields as TravelResponse.
+    The conversation id is returned in the X-Conversation-Id header.
+    """
+    key, conversation_id = await run_in_threadpool(resolve_conversation, query.conversation_id, authorization)
+    
+    async def event_stream():
+        if not query.query or not query.query.strip():
+            yield sse({
+                "type": "error",
+                "status": "error",
+                "response": "❌ Query cannot be empty. Please provide a destination or travel plan request.",
+                "request": query.query,
+                "error": "Query is required"
+            })
+            return
+        
+        if agent is None:
+            yield sse({
+                "type": "error",
+                "status": "error",
+                "response": "⚠️ AI Agent is currently unavailable. Please configure the OPENROUTER_API_KEY environment variable to enable AI-powered trip planning. You can still use the booking features!",
+                "request": query.query,
+                "error": "AI agent is not available. Please set OPENROUTER_API_KEY environment variable."
+            })
+            return
+        
+        history = await run_in_threadpool(conversations.get, key)
+        async for event in agent.astream_plan(query.query, chat_history=history):
+            yield sse(event)
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if conversation_id:
+        headers["X-Conversation-Id"] = conversation_id
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
+
+@app.post("/api/plan/jobs", status_code=202)
+async def create_plan_job(request: PlanJobRequest, authorization: Optional[str] = Header(None)):
+    """
+    Queue a travel plan to run in the background and return its job id right away.
+    Poll GET /api/plan/jobs/{job_id} or subscribe to /api/plan/jobs/{job_id}/events for the result.
+    """
+    if not request.query or not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query is required")
+    if agent is None:
+        raise HTTPException(status_code=503, detail="AI agent is not available. Please set OPENROUTER_API_KEY environment variable.")
+    key, conversation_id = await run_in_threadpool(resolve_conversation, request.conversation_id, authorization)
+    try:
+        job = await plan_jobs.submit(request.query, key, max(-10, min(10, request.priority)))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"status": "success", "job": job, "conversation_id": conversation_id}
+
+@app.get("/api/plan/jobs/{job_id}")
+def get_plan_job(job_id: str):
+    """Status of a background plan, with the plan itself once it has finished."""
+    job = load_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "job": job}
+
+@app.get("/api/plan/jobs/{job_id}/events")
+async def plan_job_events(job_id: str):
+    """
+    Server-Sent Events for a background plan: a status event with the job's
+    current state, tool/token progress while it runs, and a final status
+    event (succeeded or failed) carrying the result.
+    """
+    if await plan_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        async for event in plan_jobs.subscribe(job_id):
+            yield sse(event)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/reset")
-async def reset_memory():
+def reset_memory(conversation_id: Optional[str] = None, authorization: Optional[str] = Header(None)):
     """Reset the agent's conversation memory."""
     if agent is None:
         return {"status": "error", "message": "AI agent is not available"}
     try:
-        agent.reset_memory()
-        return {"status": "success", "message": "Memory cleared"}
+        key, conversation_id = resolve_conversation(conversation_id, authorization)
+        agent.reset_memory(conversations.get(key))
+        return {"status": "success", "message": "Memory cleared", "conversation_id": conversation_id}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.get("/api/history")
-async def get_history():
+def get_history(conversation_id: Optional[str] = None, authorization: Optional[str] = Header(None)):
     """Get conversation history."""
     if agent is None:
         return {"status": "success", "history": []}
     try:
-        history = agent.get_conversation_history()
-        return {"status": "success", "history": history}
+        key, conversation_id = resolve_conversation(conversation_id, authorization)
+        history = agent.get_conversation_history(conversations.get(key))
+        return {"status": "success", "history": history, "conversation_id": conversation_id}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.get("/api/preferences")
 async def get_preferences():
@@ -300,10 +434,10 @@ async def get_preferences():
             "preferences": user_preferences_store
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.post("/api/booking-options")
-async def get_booking_options(request: Dict[str, Any] = None):
+def get_booking_options(request: Dict[str, Any] = None, authorization: Optional[str] = Header(None)):
     """Extract flight and hotel options from conversation history or provided trip details."""
     try:
         # Get trip details from request or conversation history
@@ -324,52 +458,21 @@ async def get_booking_options(request: Dict[str, Any] = None):
             budget = trip.get("budget")
             passengers = trip.get("passengers", 1)
         elif agent is not None:
-            # Extract from conversation history
-            history = agent.get_conversation_history()
-            import re
-            for entry in history:
-                content = entry.get("content", "")
-                
-                # Extract dates
-                date_pattern = r'\d{4}-\d{2}-\d{2}'
-                dates = re.findall(date_pattern, content)
-                if dates:
-                    if not start_date:
-                        start_date = dates[0]
-                    if len(dates) > 1:
-                        end_date = dates[1]
-                    elif not end_date:
-                        end_date = dates[0]
-                
-                # Extract destination
-                dest_patterns = [
-                    r'(?:destination|going to|visit|trip to|travel to)[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-                    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:trip|vacation|getaway)',
-                ]
-                for pattern in dest_patterns:
-                    dest_match = re.search(pattern, content, re.IGNORECASE)
-                    if dest_match and not destination:
-                        destination = dest_match.group(1)
-                        break
-                
-                # Extract budget
-                budget_match = re.search(r'\$(\d+(?:\.\d{2})?)', content)
-                if budget_match and not budget:
-                    budget = float(budget_match.group(1))
-                
-                # Extract passengers
-                passenger_match = re.search(r'(\d+)\s*(?:passenger|person|people|guest)', content, re.IGNORECASE)
-                if passenger_match and passengers == 1:
-                    passengers = int(passenger_match.group(1))
+            # Trip details are extracted from each message as it is added to the history
+            key, _ = resolve_conversation(request.get("conversation_id") if request else None, authorization)
+            trip = conversations.get(key).trip_facts()
+            destination = trip["destination"]
+            start_date = trip["start_date"]
+            end_date = trip["end_date"]
+            budget = trip["budget"]
+            passengers = trip["passengers"]
         
         # Use defaults if not found
         if not destination:
             destination = "Goa"
         if not start_date:
-            from datetime import datetime, timedelta
             start_date = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
         if not end_date:
-            from datetime import datetime, timedelta
             end_date = (datetime.now() + timedelta(days=14)).strftime("%Y-%m-%d")
         if not budget:
             budget = 1000.0
@@ -379,10 +482,6 @@ async def get_booking_options(request: Dict[str, Any] = None):
         hotels_data = []
         
         if agent is not None:
-            from agent.travel_agent import search_flights, search_hotels
-            import json
-            from datetime import datetime, timedelta
-            
             # Search flights - use .invoke() for LangChain tools
             flight_budget = budget * 0.4  # Allocate 40% of budget to flights
             flights_result = search_flights.invoke({
@@ -391,7 +490,7 @@ async def get_booking_options(request: Dict[str, Any] = None):
                 "date": start_date,
                 "max_budget": flight_budget / passengers
             })
-            flights_json = json.loads(flights_result)
+            flights_json = decode_tool_result(flights_result)
             flights_data = flights_json.get("flights", [])
             
             # Search hotels - use .invoke() for LangChain tools
@@ -403,8 +502,15 @@ async def get_booking_options(request: Dict[str, Any] = None):
                 "check_out": end_date,
                 "max_price_per_night": hotel_budget / num_nights if num_nights > 0 else hotel_budget
             })
-            hotels_json = json.loads(hotels_result)
+            hotels_json = decode_tool_result(hotels_result)
             hotels_data = hotels_json.get("hotels", [])
+        elif catalog.index("flights", origin, destination) or catalog.index("hotels", destination):
+            # No agent, but inventory is loaded: query it directly
+            num_nights = (datetime.strptime(end_date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")).days
+            flights_data = catalog.query("flights", (origin, destination), max_price=budget * 0.4 / passengers,
+                                         sort=[("price", False)], limit=CATALOG_TOP_K) or []
+            hotels_data = catalog.query("hotels", (destination,), max_price=budget * 0.4 / max(num_nights, 1),
+                                        sort=[("rating", True), ("price", False)], limit=CATALOG_TOP_K) or []
         else:
             # Fallback: Generate sample flights and hotels
             flights_data = [
@@ -550,268 +656,85 @@ async def get_booking_options(request: Dict[str, Any] = None):
     except Exception as e:
         return {
             "status": "error",
-            "message": str(e),
+            "message": client_error(e),
             "flights": [],
             "hotels": []
         }
 
 @app.post("/api/bookings")
-async def create_booking(booking: BookingRequest, db: Session = Depends(get_db)):
+def create_booking(booking: BookingRequest, db: Session = Depends(get_db)):
     """Create a new booking with server-side price calculation."""
     try:
-        # Validate passenger count
-        if booking.passengers < 1 or booking.passengers > 10:
-            raise HTTPException(
-                status_code=400,
-                detail="Passenger count must be between 1 and 10"
-            )
-        
-        # Determine if this is a dynamic booking (AI-generated) or pre-defined trip
-        is_dynamic_booking = booking.trip_id.startswith("booking-")
-        
-        if is_dynamic_booking:
-            # For dynamic bookings, calculate price from flight and hotel details
-            if not booking.flight_details or not booking.hotel_details:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Flight and hotel details are required for dynamic bookings"
-                )
-            
-            # Extract and validate pricing from flight details
-            if 'price' not in booking.flight_details:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Flight price is required for dynamic bookings"
-                )
-            
-            try:
-                flight_price = float(booking.flight_details['price'])
-                if not math.isfinite(flight_price):
-                    raise ValueError("Flight price must be a valid finite number")
-                if flight_price <= 0:
-                    raise ValueError("Flight price must be positive")
-            except (ValueError, TypeError) as e:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid flight price: {str(e)}"
-                )
-            
-            # Extract and validate pricing from hotel details
-            if 'price_per_night' not in booking.hotel_details:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Hotel price per night is required for dynamic bookings"
-                )
-            
-            try:
-                hotel_price_per_night = float(booking.hotel_details['price_per_night'])
-                if not math.isfinite(hotel_price_per_night):
-                    raise ValueError("Hotel price must be a valid finite number")
-                if hotel_price_per_night <= 0:
-                    raise ValueError("Hotel price must be positive")
-            except (ValueError, TypeError) as e:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid hotel price: {str(e)}"
-                )
-            
-            # Validate and calculate number of nights from dates
-            try:
-                start = datetime.strptime(booking.start_date, '%Y-%m-%d')
-                end = datetime.strptime(booking.end_date, '%Y-%m-%d')
-                
-                if end <= start:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="End date must be after start date"
-                    )
-                
-                nights = (end - start).days
-                if nights < 1:
-                    nights = 1
-            except ValueError as e:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid date format. Use YYYY-MM-DD: {str(e)}"
-                )
-            
-            # Calculate total: (flight × passengers) + (hotel × nights)
-            flight_total = flight_price * booking.passengers
-            hotel_total = hotel_price_per_night * nights
-            calculated_total = flight_total + hotel_total
-            base_price = calculated_total / booking.passengers  # For record keeping
-        else:
-            # For pre-defined trips, use existing secure pricing
-            if booking.trip_id not in TRIP_PRICES:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Unknown trip ID: {booking.trip_id}"
-                )
-            
-            # Calculate total using TRUSTED server-side pricing
-            base_price = TRIP_PRICES[booking.trip_id]
-            calculated_total = base_price * booking.passengers
-        
-        booking_id = f"BK{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        # Extract email from flight_details if not provided directly
-        email = booking.email
-        if not email and booking.flight_details and isinstance(booking.flight_details, dict):
-            email = booking.flight_details.get('email')
-        
-        # Extract special_requests from flight_details if not provided directly
-        special_requests = booking.special_requests
-        if not special_requests and booking.flight_details and isinstance(booking.flight_details, dict):
-            special_requests = booking.flight_details.get('special_requests')
-        
-        # Create booking in database
-        db_booking = Booking(
-            booking_id=booking_id,
-            trip_id=booking.trip_id,
-            trip_name=booking.trip_name,
-            destination=booking.destination,
-            start_date=booking.start_date,
-            end_date=booking.end_date,
-            base_price=base_price,
-            total_price=calculated_total,
-            passengers=booking.passengers,
-            email=email,
-            flight_details=booking.flight_details or {},
-            hotel_details=booking.hotel_details or {},
-            special_requests=special_requests,
-            status="pending",
-            payment_status="unpaid"
-        )
-        
-        db.add(db_booking)
-        db.commit()
-        db.refresh(db_booking)
+        db_booking = booking_service.create_booking(db, booking)
+        booking_id = db_booking.booking_id
         
-        # Also store in memory for backward compatibility
-        booking_data = {
-            "id": booking_id,
-            "booking_id": booking_id,
-            "trip_id": booking.trip_id,
-            "trip_name": booking.trip_name,
-            "destination": booking.destination,
-            "start_date": booking.start_date,
-            "end_date": booking.end_date,
-            "base_price": base_price,
-            "total_price": calculated_total,
-            "passengers": booking.passengers,
-            "email": email,
-            "flight_details": booking.flight_details,
-            "hotel_details": booking.hotel_details,
-            "special_requests": special_requests,
-            "status": "pending",
-            "payment_status": "unpaid",
-            "created_at": db_booking.created_at.isoformat() if db_booking.created_at else datetime.now().isoformat()
-        }
-        bookings_store[booking_id] = booking_data
+        booking_data = booking_service.booking_summary(db_booking)
+        booking_cache.put(db_booking)
         
         return {
             "status": "success",
             "booking_id": booking_id,
             "booking": booking_data
         }
+    except BookingError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.get("/api/bookings")
-async def get_bookings(db: Session = Depends(get_db), status: Optional[str] = None):
-    """Get all bookings, optionally filtered by status."""
+def get_bookings(
+    db: Session = Depends(get_db),
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get bookings newest-first, one keyset page at a time, optionally filtered by status.
+    
+    Pass the returned next_cursor to fetch the following page; fields= limits
+    the response (and the columns loaded) to a comma-separated list.
+    """
     try:
-        query = db.query(Booking).order_by(Booking.created_at.desc())
+        query = db.query(Booking)
         
         if status:
             query = query.filter(Booking.status == status)
         
-        bookings = query.all()
-        
-        result = []
-        for booking in bookings:
-            result.append({
-                "id": booking.booking_id,
-                "booking_id": booking.booking_id,
-                "trip_id": booking.trip_id,
-                "trip_name": booking.trip_name,
-                "destination": booking.destination,
-                "start_date": booking.start_date,
-                "end_date": booking.end_date,
-                "base_price": booking.base_price,
-                "total_price": booking.total_price,
-                "passengers": booking.passengers,
-                "email": booking.email,
-                "flight_details": booking.flight_details,
-                "hotel_details": booking.hotel_details,
-                "special_requests": booking.special_requests,
-                "status": booking.status,
-                "payment_status": booking.payment_status,
-                "created_at": booking.created_at.isoformat() if booking.created_at else None,
-                "confirmed_at": booking.confirmed_at.isoformat() if booking.confirmed_at else None,
-                "cancelled_at": booking.cancelled_at.isoformat() if booking.cancelled_at else None
-            })
+        query, selected = project(query, Booking, serializers.BOOKING_FIELDS, fields)
+        bookings, next_cursor = keyset_page(query, Booking, cursor, limit)
         
-        return {
+        return FastJSONResponse({
             "status": "success",
-            "bookings": result
-        }
+            "bookings": serializers.bookings.many(bookings, selected),
+            "next_cursor": next_cursor
+        })
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.get("/api/bookings/{booking_id}")
-async def get_booking(booking_id: str, db: Session = Depends(get_db)):
-    """Get a specific booking by booking_id."""
+def get_booking(booking_id: str, db: Session = Depends(get_db)):
+    """Get a specific booking by booking_id (served from the booking cache when current)."""
     try:
-        booking = db.query(Booking).filter(Booking.booking_id == booking_id).first()
-        
-        if not booking:
-            # Fallback to in-memory store for backward compatibility
-            if booking_id in bookings_store:
-                return {
-                    "status": "success",
-                    "booking": bookings_store[booking_id]
-                }
+        booking_data = booking_cache.get(db, booking_id)
+        if booking_data is None:
             raise HTTPException(status_code=404, detail="Booking not found")
         
-        booking_data = {
-            "id": booking.booking_id,
-            "booking_id": booking.booking_id,
-            "trip_id": booking.trip_id,
-            "trip_name": booking.trip_name,
-            "destination": booking.destination,
-            "start_date": booking.start_date,
-            "end_date": booking.end_date,
-            "base_price": booking.base_price,
-            "total_price": booking.total_price,
-            "passengers": booking.passengers,
-            "email": booking.email,
-            "flight_details": booking.flight_details,
-            "hotel_details": booking.hotel_details,
-            "special_requests": booking.special_requests,
-            "status": booking.status,
-            "payment_status": booking.payment_status,
-            "stripe_session_id": booking.stripe_session_id,
-            "created_at": booking.created_at.isoformat() if booking.created_at else None,
-            "confirmed_at": booking.confirmed_at.isoformat() if booking.confirmed_at else None,
-            "cancelled_at": booking.cancelled_at.isoformat() if booking.cancelled_at else None,
-            "updated_at": booking.updated_at.isoformat() if booking.updated_at else None
-        }
-        
-        return {
+        return FastJSONResponse({
             "status": "success",
             "booking": booking_data
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.post("/api/create-checkout-session")
-async def create_checkout_session(payment: PaymentRequest, db: Session = Depends(get_db)):
+def create_checkout_session(payment: PaymentRequest, db: Session = Depends(get_db)):
     """Create a Stripe checkout session for payment."""
     try:
         import math
@@ -839,45 +762,25 @@ async def create_checkout_session(payment: PaymentRequest, db: Session = Depends
         booking = db.query(Booking).filter(Booking.booking_id == payment.booking_id).first()
         
         if not booking:
-            # Fallback to in-memory store
-            if payment.booking_id not in bookings_store:
-                raise HTTPException(status_code=404, detail="Booking not found")
-            booking_dict = bookings_store[payment.booking_id]
-            actual_amount = booking_dict['total_price']
-            
-            # Validate booking is in a payable state (in-memory)
-            if booking_dict.get('status') == 'confirmed':
-                raise HTTPException(status_code=400, detail="Booking is already confirmed")
-            if booking_dict.get('status') == 'cancelled':
-                raise HTTPException(status_code=400, detail="Booking is cancelled")
-            if booking_dict.get('payment_status') == 'paid':
-                raise HTTPException(status_code=400, detail="Booking is already paid")
-            
-            # Use in-memory booking data for Stripe
-            booking_destination = booking_dict.get('destination', 'Unknown')
-            booking_trip_name = booking_dict.get('trip_name', 'Trip')
-            booking_start_date = booking_dict.get('start_date', '')
-            booking_end_date = booking_dict.get('end_date', '')
-            booking_passengers = booking_dict.get('passengers', 1)
-            booking_email = booking_dict.get('email')
-        else:
-            actual_amount = booking.total_price
-            
-            # Validate booking is in a payable state
-            if booking.status == 'confirmed':
-                raise HTTPException(status_code=400, detail="Booking is already confirmed")
-            if booking.status == 'cancelled':
-                raise HTTPException(status_code=400, detail="Booking is cancelled")
-            if booking.payment_status == 'paid':
-                raise HTTPException(status_code=400, detail="Booking is already paid")
-            
-            # Use database booking data for Stripe
-            booking_destination = booking.destination
-            booking_trip_name = booking.trip_name
-            booking_start_date = booking.start_date
-            booking_end_date = booking.end_date
-            booking_passengers = booking.passengers
-            booking_email = booking.email
+            raise HTTPException(status_code=404, detail="Booking not found")
+        
+        actual_amount = booking.total_price
+        
+        # Validate booking is in a payable state
+        if booking.status == 'confirmed':
+            raise HTTPException(status_code=400, detail="Booking is already confirmed")
+        if booking.status == 'cancelled':
+            raise HTTPException(status_code=400, detail="Booking is cancelled")
+        if booking.payment_status == 'paid':
+            raise HTTPException(status_code=400, detail="Booking is already paid")
+        
+        # Use database booking data for Stripe
+        booking_destination = booking.destination
+        booking_trip_name = booking.trip_name
+        booking_start_date = booking.start_date
+        booking_end_date = booking.end_date
+        booking_passengers = booking.passengers
+        booking_email = booking.email
         
         # Optional: Log if client-provided amount differs from booking total
         if abs(payment.amount - actual_amount) > 0.01:
@@ -919,10 +822,10 @@ async def create_checkout_session(payment: PaymentRequest, db: Session = Depends
             }
         )
         
-        # Update booking with Stripe session ID (only if using database)
-        if booking:
-            booking.stripe_session_id = checkout_session.id
-            db.commit()
+        # Update booking with Stripe session ID
+        booking.stripe_session_id = checkout_session.id
+        db.commit()
+        booking_cache.put(booking)
         
         return {
             "status": "success",
@@ -932,81 +835,42 @@ async def create_checkout_session(payment: PaymentRequest, db: Session = Depends
     except StripeError as e:
         raise HTTPException(status_code=400, detail=f"Stripe error: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.post("/api/bookings/{booking_id}/confirm")
-async def confirm_booking(booking_id: str, db: Session = Depends(get_db)):
+def confirm_booking(booking_id: str, db: Session = Depends(get_db)):
     """Confirm a booking after successful payment."""
     try:
         booking = db.query(Booking).filter(Booking.booking_id == booking_id).first()
         
         if not booking:
-            # Fallback to in-memory store
-            if booking_id not in bookings_store:
-                raise HTTPException(status_code=404, detail="Booking not found")
-            bookings_store[booking_id]["status"] = "confirmed"
-            bookings_store[booking_id]["payment_status"] = "paid"
-            bookings_store[booking_id]["confirmed_at"] = datetime.now().isoformat()
-            return {
-                "status": "success",
-                "booking": bookings_store[booking_id]
-            }
+            raise HTTPException(status_code=404, detail="Booking not found")
         
         booking.status = "confirmed"
         booking.payment_status = "paid"
         booking.confirmed_at = datetime.utcnow()
         db.commit()
         db.refresh(booking)
+        booking_cache.put(booking)
         
-        # Also update in-memory store
-        if booking_id in bookings_store:
-            bookings_store[booking_id]["status"] = "confirmed"
-            bookings_store[booking_id]["payment_status"] = "paid"
-            bookings_store[booking_id]["confirmed_at"] = booking.confirmed_at.isoformat()
-        
-        booking_data = {
-            "id": booking.booking_id,
-            "booking_id": booking.booking_id,
-            "trip_id": booking.trip_id,
-            "trip_name": booking.trip_name,
-            "destination": booking.destination,
-            "start_date": booking.start_date,
-            "end_date": booking.end_date,
-            "base_price": booking.base_price,
-            "total_price": booking.total_price,
-            "passengers": booking.passengers,
-            "email": booking.email,
-            "status": booking.status,
-            "payment_status": booking.payment_status,
-            "confirmed_at": booking.confirmed_at.isoformat() if booking.confirmed_at else None
-        }
-        
-        return {
+        return FastJSONResponse({
             "status": "success",
-            "booking": booking_data
-        }
+            "booking": serializers.bookings.one(booking, serializers.BOOKING_CONFIRMATION_FIELDS)
+        })
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.delete("/api/bookings/{booking_id}")
-async def cancel_booking(booking_id: str, db: Session = Depends(get_db)):
+def cancel_booking(booking_id: str, db: Session = Depends(get_db)):
     """Cancel a booking."""
     try:
         booking = db.query(Booking).filter(Booking.booking_id == booking_id).first()
         
         if not booking:
-            # Fallback to in-memory store
-            if booking_id not in bookings_store:
-                raise HTTPException(status_code=404, detail="Booking not found")
-            bookings_store[booking_id]["status"] = "cancelled"
-            bookings_store[booking_id]["cancelled_at"] = datetime.now().isoformat()
-            return {
-                "status": "success",
-                "message": "Booking cancelled successfully"
-            }
+            raise HTTPException(status_code=404, detail="Booking not found")
         
         if booking.status == "cancelled":
             raise HTTPException(status_code=400, detail="Booking is already cancelled")
@@ -1014,11 +878,7 @@ async def cancel_booking(booking_id: str, db: Session = Depends(get_db)):
         booking.status = "cancelled"
         booking.cancelled_at = datetime.utcnow()
         db.commit()
-        
-        # Also update in-memory store
-        if booking_id in bookings_store:
-            bookings_store[booking_id]["status"] = "cancelled"
-            bookings_store[booking_id]["cancelled_at"] = booking.cancelled_at.isoformat()
+        booking_cache.put(booking)
         
         return {
             "status": "success",
@@ -1028,10 +888,10 @@ async def cancel_booking(booking_id: str, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.post("/api/itineraries")
-async def save_itinerary(request: ItineraryRequest, db: Session = Depends(get_db)):
+def save_itinerary(request: ItineraryRequest, db: Session = Depends(get_db)):
     """Save a planned itinerary to the calendar."""
     try:
         itinerary = Itinerary(
@@ -1055,38 +915,32 @@ async def save_itinerary(request: ItineraryRequest, db: Session = Depends(get_db
         }
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.get("/api/itineraries")
-async def get_itineraries(db: Session = Depends(get_db)):
-    """Get all itineraries for the calendar."""
+def get_itineraries(
+    db: Session = Depends(get_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get itineraries newest-first, one keyset page at a time (see /api/bookings)."""
     try:
-        itineraries = db.query(Itinerary).order_by(Itinerary.created_at.desc()).all()
-        
-        result = []
-        for itin in itineraries:
-            result.append({
-                "id": itin.id,
-                "trip_name": itin.trip_name,
-                "destination": itin.destination,
-                "start_date": itin.start_date,
-                "end_date": itin.end_date,
-                "duration_days": itin.duration_days,
-                "budget": itin.budget,
-                "description": itin.description,
-                "itinerary_data": itin.itinerary_data,
-                "created_at": itin.created_at.isoformat() if itin.created_at else None
-            })
+        query, selected = project(db.query(Itinerary), Itinerary, serializers.ITINERARY_FIELDS, fields)
+        itineraries, next_cursor = keyset_page(query, Itinerary, cursor, limit)
         
-        return {
+        return FastJSONResponse({
             "status": "success",
-            "itineraries": result
-        }
+            "itineraries": serializers.itineraries.many(itineraries, selected),
+            "next_cursor": next_cursor
+        })
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.get("/api/itineraries/{itinerary_id}")
-async def get_itinerary(itinerary_id: int, db: Session = Depends(get_db)):
+def get_itinerary(itinerary_id: int, db: Session = Depends(get_db)):
     """Get a specific itinerary by ID."""
     try:
         itinerary = db.query(Itinerary).filter(Itinerary.id == itinerary_id).first()
@@ -1094,28 +948,17 @@ async def get_itinerary(itinerary_id: int, db: Session = Depends(get_db)):
         if not itinerary:
             raise HTTPException(status_code=404, detail="Itinerary not found")
         
-        return {
+        return FastJSONResponse({
             "status": "success",
-            "itinerary": {
-                "id": itinerary.id,
-                "trip_name": itinerary.trip_name,
-                "destination": itinerary.destination,
-                "start_date": itinerary.start_date,
-                "end_date": itinerary.end_date,
-                "duration_days": itinerary.duration_days,
-                "budget": itinerary.budget,
-                "description": itinerary.description,
-                "itinerary_data": itinerary.itinerary_data,
-                "created_at": itinerary.created_at.isoformat() if itinerary.created_at else None
-            }
-        }
+            "itinerary": serializers.itineraries.one(itinerary)
+        })
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.delete("/api/itineraries/{itinerary_id}")
-async def delete_itinerary(itinerary_id: int, db: Session = Depends(get_db)):
+def delete_itinerary(itinerary_id: int, db: Session = Depends(get_db)):
     """Delete an itinerary from the calendar."""
     try:
         itinerary = db.query(Itinerary).filter(Itinerary.id == itinerary_id).first()
@@ -1134,10 +977,10 @@ async def delete_itinerary(itinerary_id: int, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.post("/api/bookings/from-itinerary/{itinerary_id}")
-async def create_booking_from_itinerary(itinerary_id: int, passengers: int = 1, db: Session = Depends(get_db)):
+def create_booking_from_itinerary(itinerary_id: int, passengers: int = 1, db: Session = Depends(get_db)):
     """Create a booking from a saved itinerary."""
     try:
         itinerary = db.query(Itinerary).filter(Itinerary.id == itinerary_id).first()
@@ -1152,6 +995,14 @@ async def create_booking_from_itinerary(itinerary_id: int, passengers: int = 1,
                 detail="Passenger count must be between 1 and 10"
             )
         
+        # Itinerary dates are free text; bookings store real dates
+        start_date, end_date = parse_loose_date(itinerary.start_date), parse_loose_date(itinerary.end_date)
+        if start_date is None or end_date is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Itinerary dates must be YYYY-MM-DD to book it; update the itinerary's start and end dates"
+            )
+        
         # Generate a trip_id from itinerary (or use a default)
         trip_id = f"itinerary-{itinerary_id}"
         
@@ -1164,15 +1015,15 @@ async def create_booking_from_itinerary(itinerary_id: int, passengers: int = 1,
         
         calculated_total = base_price * passengers
         
-        booking_id = f"BK{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        booking_id = new_booking_id()
         
         db_booking = Booking(
             booking_id=booking_id,
             trip_id=trip_id,
             trip_name=itinerary.trip_name,
             destination=itinerary.destination,
-            start_date=itinerary.start_date,
-            end_date=itinerary.end_date,
+            start_date=start_date,
+            end_date=end_date,
             base_price=base_price,
             total_price=calculated_total,
             passengers=passengers,
@@ -1185,6 +1036,7 @@ async def create_booking_from_itinerary(itinerary_id: int, passengers: int = 1,
         db.add(db_booking)
         db.commit()
         db.refresh(db_booking)
+        booking_cache.put(db_booking)
         
         booking_data = {
             "id": booking_id,
@@ -1192,8 +1044,8 @@ async def create_booking_from_itinerary(itinerary_id: int, passengers: int = 1,
             "trip_id": trip_id,
             "trip_name": itinerary.trip_name,
             "destination": itinerary.destination,
-            "start_date": itinerary.start_date,
-            "end_date": itinerary.end_date,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
             "base_price": base_price,
             "total_price": calculated_total,
             "passengers": passengers,
@@ -1211,198 +1063,95 @@ async def create_booking_from_itinerary(itinerary_id: int, passengers: int = 1,
         raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "service": "TripMind AI Agent"}
 
+@app.get("/api/llm/stats")
+async def llm_stats():
+    """In-flight and queued LLM requests, and per-model latency and tokens, for this process."""
+    models = agent.llm.stats.snapshot() if agent is not None else {}
+    return {"status": "success", "limiter": llm_limiter.stats(), "models": models, "plan_jobs": plan_jobs.stats()}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and sizes for the in-process caches."""
+    return {
+        "status": "success",
+        "tool_cache": tool_cache.stats(),
+        "plan_response_cache": agent.response_cache.stats() if agent is not None and agent.response_cache else None,
+        "calendar_stats_cache": calendar_stats_cache.stats(),
+        "session_cache": session_store.stats(),
+        "booking_cache": booking_cache.stats()
+    }
+
 # Calendar Events API Endpoints
+
+# Short-lived cache for /api/calendar/stats; cleared whenever an event changes.
+# With several workers, other processes may serve stats up to the TTL stale.
+CALENDAR_STATS_CACHE_TTL = float(os.environ.get("CALENDAR_STATS_CACHE_TTL", "30"))
+calendar_stats_cache = TTLCache(maxsize=256, ttl=CALENDAR_STATS_CACHE_TTL)
 @app.get("/api/calendar/events")
-async def get_calendar_events(start: Optional[str] = None, end: Optional[str] = None, db: Session = Depends(get_db)):
-    """Get all calendar events, optionally filtered by date range."""
+def get_calendar_events(start: Optional[str] = None, end: Optional[str] = None, user_id: str = "default_user", db: Session = Depends(get_db)):
+    """Get calendar events overlapping the optional [start, end) date range."""
     try:
-        # Get all calendar events
-        all_events = db.query(CalendarEvent).all()
-        
-        # Also get bookings and convert them to calendar events
-        bookings = db.query(Booking).filter(Booking.status.in_(["pending", "confirmed"])).all()
-        
-        events = []
-        
-        # Add manual calendar events
-        for event in all_events:
-            # Determine color based on event type
-            color = event.color
-            if not color:
-                if event.event_type == "booking":
-                    color = "#3b82f6"  # Blue for bookings
-                elif event.event_type == "trip":
-                    color = "#10b981"  # Green for trips
-                elif event.event_type == "reminder":
-                    color = "#f59e0b"  # Yellow for reminders
-                else:
-                    color = "#6366f1"  # Purple for personal
-            
-            # Format start and end dates properly
-            start_str = event.start_date
-            end_str = event.end_date
-            
-            # Add time if not all-day and time is provided
-            if event.start_time and event.all_day != "true":
-                start_str = f"{event.start_date}T{event.start_time}:00"
-            if event.end_time and event.all_day != "true":
-                end_str = f"{event.end_date}T{event.end_time}:00"
-            
-            events.append({
-                "id": f"event_{event.id}",
-                "title": event.title or "Untitled Event",
-                "description": event.description or "",
-                "start": start_str,
-                "end": end_str,
-                "allDay": event.all_day == "true",
-                "backgroundColor": color,
-                "borderColor": color,
-                "textColor": "#ffffff",
-                "extendedProps": {
-                    "event_type": event.event_type or "personal",
-                    "tags": event.tags if event.tags else [],
-                    "booking_id": event.booking_id,
-                    "reminder_enabled": event.reminder_enabled == "true",
-                    "reminder_time": event.reminder_time,
-                    "database_id": event.id
-                }
-            })
+        # FullCalendar sends ISO datetimes; only the date part matters here
+        try:
+            range_start = date.fromisoformat(start[:10]) if start else None
+            range_end = date.fromisoformat(end[:10]) if end else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid start/end. Use YYYY-MM-DD or ISO datetime")
         
-        # Add booking events
-        for booking in bookings:
-            status_color = {
-                "pending": "#f59e0b",  # Yellow
-                "confirmed": "#10b981",  # Green
-                "cancelled": "#ef4444",  # Red
-                "completed": "#6b7280"  # Gray
-            }.get(booking.status, "#6366f1")
-            
-            events.append({
-                "id": f"booking_{booking.booking_id}",
-                "title": f"✈️ {booking.trip_name}",
-                "description": f"Destination: {booking.destination}\nPassengers: {booking.passengers}\nStatus: {booking.status.title()}",
-                "start": booking.start_date,
-                "end": booking.end_date,
-                "allDay": True,
-                "backgroundColor": status_color,
-                "borderColor": status_color,
-                "textColor": "#ffffff",
-                "extendedProps": {
-                    "event_type": "booking",
-                    "booking_id": booking.booking_id,
-                    "status": booking.status,
-                    "destination": booking.destination,
-                    "is_booking": True
-                }
-            })
+        # Overlap test runs in SQL against the (user_id, start_date, end_date) indexes
+        events_query = db.query(CalendarEvent).filter(CalendarEvent.user_id == user_id)
+        bookings_query = db.query(Booking).filter(
+            Booking.user_id == user_id,
+            Booking.status.in_(["pending", "confirmed"])
+        )
+        if range_end:
+            events_query = events_query.filter(CalendarEvent.start_date < range_end)
+            bookings_query = bookings_query.filter(Booking.start_date < range_end)
+        if range_start:
+            events_query = events_query.filter(CalendarEvent.end_date >= range_start)
+            bookings_query = bookings_query.filter(Booking.end_date >= range_start)
         
-        return {
+        all_events = events_query.all()
+        
+        # Also get bookings and show them as calendar events
+        bookings = bookings_query.all()
+        
+        events = [serializers.calendar_event(event) for event in all_events]
+        events.extend(serializers.booking_calendar_event(booking) for booking in bookings)
+        
+        return FastJSONResponse({
             "status": "success",
             "events": events
-        }
+        })
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=client_error(e))
 
 @app.post("/api/calendar/events")
-async def create_calendar_event(event: CalendarEventRequest, db: Session = Depends(get_db)):
+def create_calendar_event(event: CalendarEventRequest, db: Session = Depends(get_db)):
     """Create a new calendar event."""
     try:
-        # Validate required fields
-        if not event.title or not event.title.strip():
+        error = calendar_service.validate_event(event)
+        if error:
             return {
                 "status": "error",
-                "error": "Event title is required"
+                "error": error
             }
         
-        if not event.start_date or not event.end_date:
-            return {
-                "status": "error",
-                "error": "Start date and end date are required"
-            }
-        
-        # Validate date format
-        try:
-            from datetime import datetime
-            start_date_obj = datetime.strptime(event.start_date, "%Y-%m-%d")
-            end_date_obj = datetime.strptime(event.end_date, "%Y-%m-%d")
-        except ValueError:
-            return {
-                "status": "error",
-                "error": "Invalid date format. Please use YYYY-MM-DD format"
-            }
-        
-        # Validate date ordering
-        if end_date_obj < start_date_obj:
-            return {
-                "status": "error",
-                "error": "End date must be on or after start date"
-            }
-        
-        # Validate timed events (non all-day)
-        if event.all_day == "false":
-            # Both start_time and end_time must be provided
-            if not event.start_time or not event.end_time:
-                return {
-                    "status": "error",
-                    "error": "Start time and end time are required for timed events"
-                }
-            
-            # Validate time format (for all timed events, not just same-day)
-            try:
-                start_time_obj = datetime.strptime(event.start_time, "%H:%M")
-                end_time_obj = datetime.strptime(event.end_time, "%H:%M")
-            except ValueError:
-                return {
-                    "status": "error",
-                    "error": "Invalid time format. Please use HH:MM format"
-                }
-            
-            # Validate time ordering (only for same-day events)
-            if event.start_date == event.end_date:
-                if end_time_obj <= start_time_obj:
-                    return {
-                        "status": "error",
-                        "error": "End time must be after start time"
-                    }
-        
-        # Determine color based on event type if not provided
-        color = event.color
-        if not color:
-            if event.event_type == "booking":
-                color = "#3b82f6"
-            elif event.event_type == "trip":
-                color = "#10b981"
-            elif event.event_type == "reminder":
-                color = "#f59e0b"
-            else:
-                color = "#6366f1"
-        
-        db_event = CalendarEvent(
-            title=event.title.strip(),
-            description=event.description,
-            start_date=event.start_date,
-            end_date=event.end_date,
-            start_time=event.start_time,
-            end_time=event.end_time,
-            all_day=event.all_day or "true",
-            event_type=event.event_type or "personal",
-            tags=event.tags or [],
-            color=color,
-            booking_id=event.booking_id,
-            reminder_enabled=event.reminder_enabled or "false",
-            reminder_time=event.reminder_time
-        )
+        db_event = CalendarEvent(**calendar_service.new_event_values(event))
         
         db.add(db_event)
         db.commit()
         db.refresh(db_event)
+        calendar_stats_cache.clear()
         
         return {
             "status": "success",
@@ -1412,7 +1161,7 @@ async def create_calendar_event(event: CalendarEventRequest, db: Session = Depen
     except Exception as e:
         db.rollback()
         import traceback
-        error_msg = str(e)
+        error_msg = client_error(e)
         print(f"Error creating calendar event: {error_msg}")
         print(traceback.format_exc())
         return {
@@ -1420,8 +1169,77 @@ async def create_calendar_event(event: CalendarEventRequest, db: Session = Depen
             "error": f"Failed to create event: {error_msg}"
         }
 
+def _bulk_too_large(count: int) -> Optional[Dict[str, Any]]:
+    if count > CALENDAR_BULK_MAX_EVENTS:
+        return {
+            "status": "error",
+            "error": f"At most {CALENDAR_BULK_MAX_EVENTS} events per request"
+        }
+    return None
+
+@app.post("/api/calendar/events/bulk")
+def bulk_create_calendar_events(events: List[CalendarEventRequest], atomic: bool = False, db: Session = Depends(get_db)):
+    """Create many calendar events in one transaction, with a result per event.
+    
+    Every event is validated first; valid ones are inserted in a single batch.
+    With atomic=true, any invalid event rejects the whole batch.
+    """
+    too_large = _bulk_too_large(len(events))
+    if too_large:
+        return too_large
+    try:
+        result = calendar_service.bulk_create_events(db, events, atomic)
+        if result["created"]:
+            calendar_stats_cache.clear()
+        return result
+    except Exception as e:
+        db.rollback()
+        print(f"Error creating calendar events: {e}")
+        return {
+            "status": "error",
+            "error": f"Failed to create events: {client_error(e)}"
+        }
+
+@app.put("/api/calendar/events/bulk")
+def bulk_update_calendar_events(events: List[CalendarEventUpdate], atomic: bool = False, db: Session = Depends(get_db)):
+    """Update many calendar events (each carrying its id) in one transaction, with a result per event."""
+    too_large = _bulk_too_large(len(events))
+    if too_large:
+        return too_large
+    try:
+        result = calendar_service.bulk_update_events(db, events, atomic)
+        if result["updated"]:
+            calendar_stats_cache.clear()
+        return result
+    except Exception as e:
+        db.rollback()
+        print(f"Error updating calendar events: {e}")
+        return {
+            "status": "error",
+            "error": f"Failed to update events: {client_error(e)}"
+        }
+
+@app.delete("/api/calendar/events/bulk")
+def bulk_delete_calendar_events(event_ids: List[int] = Body(...), db: Session = Depends(get_db)):
+    """Delete many calendar events by id in one statement, with a result per id."""
+    too_large = _bulk_too_large(len(event_ids))
+    if too_large:
+        return too_large
+    try:
+        result = calendar_service.bulk_delete_events(db, event_ids)
+        if result["deleted"]:
+            calendar_stats_cache.clear()
+        return result
+    except Exception as e:
+        db.rollback()
+        print(f"Error deleting calendar events: {e}")
+        return {
+            "status": "error",
+            "error": f"Failed to delete events: {client_error(e)}"
+        }
+
 @app.put("/api/calendar/events/{event_id}")
-async def update_calendar_event(event_id: int, event: CalendarEventRequest, db: Session = Depends(get_db)):
+def update_calendar_event(event_id: int, event: CalendarEventRequest, db: Session = Depends(get_db)):
     """Update an existing calendar event."""
     try:
         db_event = db.query(CalendarEvent).filter(CalendarEvent.id == event_id).first()
@@ -1431,11 +1249,11 @@ async def update_calendar_event(event_id: int, event: CalendarEventRequest, db:
                 "error": "Event not found"
             }
         
-        # Validate required fields
-        if not event.title or not event.title.strip():
+        error = calendar_service.validate_event(event)
+        if error:
             return {
                 "status": "error",
-                "error": "Event title is required"
+                "error": error
             }
         
         db_event.title = event.title.strip()
@@ -1455,6 +1273,7 @@ async def update_calendar_event(event_id: int, event: CalendarEventRequest, db:
         
         db.commit()
         db.refresh(db_event)
+        calendar_stats_cache.clear()
         
         return {
             "status": "success",
@@ -1463,7 +1282,7 @@ async def update_calendar_event(event_id: int, event: CalendarEventRequest, db:
     except Exception as e:
         db.rollback()
         import traceback
-        error_msg = str(e)
+        error_msg = client_error(e)
         print(f"Error updating calendar event: {error_msg}")
         print(traceback.format_exc())
         return {
@@ -1472,7 +1291,7 @@ async def update_calendar_event(event_id: int, event: CalendarEventRequest, db:
         }
 
 @app.delete("/api/calendar/events/{event_id}")
-async def delete_calendar_event(event_id: int, db: Session = Depends(get_db)):
+def delete_calendar_event(event_id: int, db: Session = Depends(get_db)):
     """Delete a calendar event."""
     try:
         db_event = db.query(CalendarEvent).filter(CalendarEvent.id == event_id).first()
@@ -1484,6 +1303,7 @@ async def delete_calendar_event(event_id: int, db: Session = Depends(get_db)):
         
         db.delete(db_event)
         db.commit()
+        calendar_stats_cache.clear()
         
         return {
             "status": "success",
@@ -1492,7 +1312,7 @@ async def delete_calendar_event(event_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         db.rollback()
         import traceback
-        error_msg = str(e)
+        error_msg = client_error(e)
         print(f"Error deleting calendar event: {error_msg}")
         print(traceback.format_exc())
         return {
@@ -1501,33 +1321,57 @@ async def delete_calendar_event(event_id: int, db: Session = Depends(get_db)):
         }
 
 @app.get("/api/calendar/stats")
-async def get_calendar_stats(db: Session = Depends(get_db)):
-    """Get calendar statistics including total and upcoming events."""
+def get_calendar_stats(user_id: str = "default_user", db: Session = Depends(get_db)):
+    """Get calendar statistics: totals, upcoming/past, and per-type and per-month breakdowns."""
     try:
-        from datetime import datetime, date
         today = date.today()
+        cache_key = (user_id, today)
+        cached = calendar_stats_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # One grouped pass over the indexed date column
+        month = year_month(CalendarEvent.start_date)
+        rows = (
+            db.query(
+                CalendarEvent.event_type,
+                month,
+                func.count(CalendarEvent.id),
+                func.sum(case((CalendarEvent.start_date >= today, 1), else_=0))
+            )
+            .filter(CalendarEvent.user_id == user_id)
+            .group_by(CalendarEvent.event_type, month)
+            .all()
+        )
         
-        all_events = db.query(CalendarEvent).all()
-        total_events = len(all_events)
-        
+        total_events = 0
         upcoming_events = 0
-        for event in all_events:
-            try:
-                event_start = datetime.strptime(event.start_date, "%Y-%m-%d").date()
-                if event_start >= today:
-                    upcoming_events += 1
-            except:
-                pass
-        
-        return {
+        by_type: Dict[str, Dict[str, int]] = {}
+        by_month: Dict[str, int] = {}
+        for event_type, event_month, count, upcoming in rows:
+            upcoming = int(upcoming or 0)
+            total_events += count
+            upcoming_events += upcoming
+            type_stats = by_type.setdefault(event_type or "personal", {"total": 0, "upcoming": 0, "past": 0})
+            type_stats["total"] += count
+            type_stats["upcoming"] += upcoming
+            type_stats["past"] += count - upcoming
+            if event_month:
+                by_month[event_month] = by_month.get(event_month, 0) + count
+        
+        result = {
             "status": "success",
             "total_events": total_events,
             "upcoming_events": upcoming_events,
-            "past_events": total_events - upcoming_events
+            "past_events": total_events - upcoming_events,
+            "by_type": by_type,
+            "by_month": dict(sorted(by_month.items()))
         }
+        calendar_stats_cache.set(cache_key, result)
+        return result
     except Exception as e:
         import traceback
-        error_msg = str(e)
+        error_msg = client_error(e)
         print(f"Error getting calendar stats: {error_msg}")
         print(traceback.format_exc())
         return {
@@ -0,0 +1,50 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# bcrypt cost factor; raising it makes existing hashes get upgraded on next login
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+# Worker threads dedicated to hashing (bcrypt releases the GIL, so these run in parallel)
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash jobs allowed to wait for a worker before new ones are rejected
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", "32"))
+# How long a request waits for a queue slot before giving up
+PASSWORD_HASH_ADMIT_TIMEOUT = float(os.environ.get("PASSWORD_HASH_ADMIT_TIMEOUT", "2"))
+
+# Password hashing context using bcrypt
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool is saturated; callers should answer 503."""
+
+
+def _run(func, *args):
+    # Backpressure: bounded admission so a login burst can't pile up unbounded work
+    if not _slots.acquire(timeout=PASSWORD_HASH_ADMIT_TIMEOUT):
+        raise PasswordHasherBusy("Too many sign-in attempts in progress, please retry shortly")
+    try:
+        return _executor.submit(func, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password: str) -> str:
+    """Hash a password using bcrypt."""
+    return _run(pwd_context.hash, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash."""
+    return _run(pwd_context.verify, plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a fresh hash if the stored one uses an outdated cost."""
+    return _run(pwd_context.verify_and_update, plain_password, hashed_password)
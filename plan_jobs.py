@@ -0,0 +1,303 @@
+import os
+import uuid
+import asyncio
+import itertools
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, or_
+
+from database import SessionLocal, PlanJob
+
+# Job queue limits (overridable from the environment)
+PLAN_JOB_WORKERS = int(os.environ.get("PLAN_JOB_WORKERS", "4"))
+PLAN_JOB_MAX_QUEUED = int(os.environ.get("PLAN_JOB_MAX_QUEUED", "200"))
+PLAN_JOB_TIMEOUT = float(os.environ.get("PLAN_JOB_TIMEOUT", "300"))
+# Runs a job may get; jobs interrupted by a restart are retried up to this many times
+PLAN_JOB_MAX_ATTEMPTS = int(os.environ.get("PLAN_JOB_MAX_ATTEMPTS", "2"))
+# How often subscribers re-check the database (e.g. for jobs run by another process)
+PLAN_JOB_POLL_INTERVAL = float(os.environ.get("PLAN_JOB_POLL_INTERVAL", "5"))
+# How often to look for jobs orphaned by a process that died. A running job is
+# only taken over once it has been running longer than the timeout plus this
+# interval, so jobs a live process (another worker, or the old side of a
+# rolling deploy) is still running are never started twice.
+PLAN_JOB_RECOVER_INTERVAL = float(os.environ.get("PLAN_JOB_RECOVER_INTERVAL", "60"))
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+# run(query, conversation_id) yields astream_plan-style events, ending with done or error
+JobRunner = Callable[[str, str], AsyncIterator[Dict[str, Any]]]
+
+
+class JobQueueFull(Exception):
+    """Raised when too many plan jobs are already waiting."""
+
+
+def job_to_dict(job: PlanJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "priority": job.priority,
+        "query": job.query,
+        "attempts": job.attempts,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def load_job(job_id: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        job = db.get(PlanJob, job_id)
+        return job_to_dict(job) if job else None
+    finally:
+        db.close()
+
+
+class PlanJobQueue:
+    """Runs agent plans in the background on a bounded pool of asyncio workers.
+
+    Jobs are persisted in the plan_jobs table: the queue itself is in memory,
+    but queued jobs and stale running ones (see PLAN_JOB_RECOVER_INTERVAL)
+    left by other processes are picked up on start() and periodically after.
+    Recovery fills the memory queue only up to max_queued, like submit();
+    the rest stay queued in the database until a later pass has room.
+    Workers run on the server's event loop, which the shared LLM client
+    belongs to. Progress events are fanned out to subscribers of this
+    process; status changes are also written to the database.
+    """
+
+    def __init__(self, run: JobRunner, workers: int = PLAN_JOB_WORKERS,
+                 max_queued: int = PLAN_JOB_MAX_QUEUED, timeout: float = PLAN_JOB_TIMEOUT):
+        self.run = run
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks = []
+        self._order = itertools.count()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._running: Set[str] = set()
+        self._pending: Set[str] = set()
+
+    async def start(self) -> None:
+        self._queue = asyncio.PriorityQueue()
+        await self._recover_jobs()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if PLAN_JOB_RECOVER_INTERVAL > 0:
+            self._tasks.append(asyncio.create_task(self._recover_periodically()))
+
+    async def _recover_jobs(self) -> None:
+        # Highest priority first, so the jobs left for a later pass are the least urgent
+        for job_id, priority in await asyncio.to_thread(self._recover):
+            if self._queue.qsize() >= self.max_queued:
+                break
+            if job_id not in self._pending and job_id not in self._running:
+                self._enqueue(job_id, priority)
+
+    async def _recover_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(PLAN_JOB_RECOVER_INTERVAL)
+            try:
+                await self._recover_jobs()
+            except Exception as e:
+                print(f"Warning: Failed to recover plan jobs: {e}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _enqueue(self, job_id: str, priority: int) -> None:
+        # Highest priority first, then first come first served
+        self._pending.add(job_id)
+        self._queue.put_nowait((-priority, next(self._order), job_id))
+
+    async def submit(self, query: str, conversation_id: str, priority: int = 0) -> Dict[str, Any]:
+        if self._queue is None:
+            raise RuntimeError("Plan job queue is not running")
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull("Too many plans are queued right now, please try again in a moment")
+        job = await asyncio.to_thread(self._insert, query, conversation_id, priority)
+        self._enqueue(job["job_id"], priority)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(load_job, job_id)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job's current status, then its progress events until it finishes."""
+        events: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(events)
+        try:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            yield {"type": "status", **job}
+            while job["status"] not in FINISHED_STATUSES:
+                try:
+                    event = await asyncio.wait_for(events.get(), PLAN_JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Nothing published here: the job may be waiting, or running in another process
+                    latest = await self.get(job_id)
+                    if latest["status"] != job["status"]:
+                        yield {"type": "status", **latest}
+                    job = latest
+                    continue
+                if event["type"] == "status":
+                    job = event
+                yield event
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(events)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+    def _publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        for events in self._subscribers.get(job_id, ()):
+            events.put_nowait(event)
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                await self._run_job(job_id)
+            except Exception as e:
+                print(f"Warning: Plan job {job_id} failed unexpectedly: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str) -> None:
+        claimed = await asyncio.to_thread(self._claim, job_id)
+        if claimed is None:
+            return  # finished, or claimed by another process
+        job, conversation_id = claimed
+        self._running.add(job_id)
+        self._publish(job_id, {"type": "status", **job})
+
+        async def consume() -> Dict[str, Any]:
+            async for event in self.run(job["query"], conversation_id):
+                if event["type"] in ("done", "error"):
+                    return {k: v for k, v in event.items() if k != "type"}
+                self._publish(job_id, {**event, "job_id": job_id})
+            raise RuntimeError("Agent run finished without a response")
+
+        try:
+            result = await asyncio.wait_for(consume(), self.timeout)
+            error = (result.get("error") or "Plan failed") if result.get("status") == "error" else None
+        except asyncio.TimeoutError:
+            result, error = None, f"Plan timed out after {self.timeout:.0f}s"
+        except Exception as e:
+            result, error = None, str(e)
+        finally:
+            self._running.discard(job_id)
+
+        job = await asyncio.to_thread(self._finish, job_id, result, error)
+        self._publish(job_id, {"type": "status", **job})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queued": self.max_queued,
+            "running": len(self._running),
+            "subscribers": sum(len(s) for s in self._subscribers.values())
+        }
+
+    # Database helpers (run in a worker thread)
+
+    def _insert(self, query: str, conversation_id: str, priority: int) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            job = PlanJob(id=uuid.uuid4().hex, conversation_id=conversation_id, query=query,
+                          priority=priority, status="queued", attempts=0)
+            db.add(job)
+            db.commit()
+            return job_to_dict(job)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _claim(self, job_id: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Mark a queued job as running; None if it isn't queued any more."""
+        db = SessionLocal()
+        try:
+            claimed = db.query(PlanJob).filter(PlanJob.id == job_id, PlanJob.status == "queued").update(
+                {"status": "running", "started_at": datetime.utcnow(), "attempts": PlanJob.attempts + 1},
+                synchronize_session=False
+            )
+            db.commit()
+            if not claimed:
+                return None
+            job = db.get(PlanJob, job_id)
+            return job_to_dict(job), job.conversation_id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _finish(self, job_id: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            job = db.get(PlanJob, job_id)
+            job.status = "failed" if error else "succeeded"
+            job.result = result
+            job.error = error
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            return job_to_dict(job)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _recover(self) -> List[Tuple[str, int]]:
+        """Jobs to enqueue here: queued ones, and stale running ones (requeued or failed if out of attempts).
+
+        A queued job may also sit in another process's memory queue; that's
+        harmless since _claim lets only one process run it. Running jobs are
+        taken over with a conditional UPDATE so two recovering processes can't
+        both requeue the same one.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=self.timeout + PLAN_JOB_RECOVER_INTERVAL)
+        db = SessionLocal()
+        try:
+            pending = []
+            jobs = (
+                db.query(PlanJob.id, PlanJob.status, PlanJob.priority, PlanJob.attempts)
+                .filter(or_(
+                    PlanJob.status == "queued",
+                    and_(PlanJob.status == "running", PlanJob.started_at < stale_before)
+                ))
+                .order_by(PlanJob.priority.desc(), PlanJob.created_at)
+                .all()
+            )
+            for job in jobs:
+                if job.status == "running":
+                    stale = db.query(PlanJob).filter(
+                        PlanJob.id == job.id, PlanJob.status == "running", PlanJob.started_at < stale_before
+                    )
+                    if (job.attempts or 0) >= PLAN_JOB_MAX_ATTEMPTS:
+                        stale.update({"status": "failed", "error": "Interrupted: the process running it stopped",
+                                      "finished_at": datetime.utcnow()}, synchronize_session=False)
+                        continue
+                    if not stale.update({"status": "queued"}, synchronize_session=False):
+                        continue  # finished or taken over meanwhile
+                pending.append((job.id, job.priority or 0))
+            db.commit()
+            return pending
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
@@ -0,0 +1,184 @@
+import json
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # falls back to the standard library encoder
+    orjson = None
+
+# Response field -> (model attribute, optional value transform)
+FieldSpec = Dict[str, Tuple[str, Optional[Callable[[Any], Any]]]]
+
+
+def isoformat(value):
+    return value.isoformat() if value else None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when it is installed.
+
+    Return it directly from a route to skip FastAPI's jsonable_encoder pass;
+    the content must already be plain JSON types (what the serializers
+    below produce).
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RowSerializer:
+    """Maps ORM rows to response dicts using a FieldSpec.
+
+    The mapper for each field selection is built once: one attrgetter call
+    fetches every attribute, and transforms run only for the fields that
+    have them.
+    """
+
+    def __init__(self, spec: FieldSpec):
+        self.spec = spec
+        self._mappers: Dict[Tuple[str, ...], Callable[[Any], Dict[str, Any]]] = {}
+
+    def mapper(self, fields: Optional[Sequence[str]] = None) -> Callable[[Any], Dict[str, Any]]:
+        key = tuple(fields) if fields else tuple(self.spec)
+        mapper = self._mappers.get(key)
+        if mapper is None:
+            mapper = self._mappers[key] = self._compile(key)
+        return mapper
+
+    def _compile(self, fields: Tuple[str, ...]) -> Callable[[Any], Dict[str, Any]]:
+        getter = attrgetter(*(self.spec[f][0] for f in fields))
+        if len(fields) == 1:
+            single = getter
+            getter = lambda row: (single(row),)
+        transforms = [(i, self.spec[f][1]) for i, f in enumerate(fields) if self.spec[f][1]]
+
+        if not transforms:
+            return lambda row: dict(zip(fields, getter(row)))
+
+        def mapper(row) -> Dict[str, Any]:
+            values = list(getter(row))
+            for i, transform in transforms:
+                values[i] = transform(values[i])
+            return dict(zip(fields, values))
+        return mapper
+
+    def one(self, row, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        return self.mapper(fields)(row)
+
+    def many(self, rows: Iterable[Any], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        return list(map(self.mapper(fields), rows))
+
+
+BOOKING_FIELDS: FieldSpec = {
+    "id": ("booking_id", None),
+    "booking_id": ("booking_id", None),
+    "trip_id": ("trip_id", None),
+    "trip_name": ("trip_name", None),
+    "destination": ("destination", None),
+    "start_date": ("start_date", None),
+    "end_date": ("end_date", None),
+    "base_price": ("base_price", None),
+    "total_price": ("total_price", None),
+    "passengers": ("passengers", None),
+    "email": ("email", None),
+    "flight_details": ("flight_details", None),
+    "hotel_details": ("hotel_details", None),
+    "special_requests": ("special_requests", None),
+    "status": ("status", None),
+    "payment_status": ("payment_status", None),
+    "created_at": ("created_at", isoformat),
+    "confirmed_at": ("confirmed_at", isoformat),
+    "cancelled_at": ("cancelled_at", isoformat)
+}
+
+# GET /api/bookings/{id} also shows the payment session and last update
+BOOKING_DETAIL_FIELDS: FieldSpec = {
+    **{k: v for k, v in BOOKING_FIELDS.items() if k not in ("created_at", "confirmed_at", "cancelled_at")},
+    "stripe_session_id": ("stripe_session_id", None),
+    "created_at": ("created_at", isoformat),
+    "confirmed_at": ("confirmed_at", isoformat),
+    "cancelled_at": ("cancelled_at", isoformat),
+    "updated_at": ("updated_at", isoformat)
+}
+
+BOOKING_CONFIRMATION_FIELDS = ("id", "booking_id", "trip_id", "trip_name", "destination", "start_date", "end_date",
+                               "base_price", "total_price", "passengers", "email", "status", "payment_status",
+                               "confirmed_at")
+
+ITINERARY_FIELDS: FieldSpec = {
+    "id": ("id", None),
+    "trip_name": ("trip_name", None),
+    "destination": ("destination", None),
+    "start_date": ("start_date", None),
+    "end_date": ("end_date", None),
+    "duration_days": ("duration_days", None),
+    "budget": ("budget", None),
+    "description": ("description", None),
+    "itinerary_data": ("itinerary_data", None),
+    "created_at": ("created_at", isoformat)
+}
+
+bookings = RowSerializer(BOOKING_FIELDS)
+booking_details = RowSerializer(BOOKING_DETAIL_FIELDS)
+itineraries = RowSerializer(ITINERARY_FIELDS)
+
+# Calendar colours by event type and booking status
+EVENT_TYPE_COLORS = {"booking": "#3b82f6", "trip": "#10b981", "reminder": "#f59e0b"}
+BOOKING_STATUS_COLORS = {"pending": "#f59e0b", "confirmed": "#10b981", "cancelled": "#ef4444", "completed": "#6b7280"}
+DEFAULT_EVENT_COLOR = "#6366f1"
+
+
+def calendar_event(event) -> Dict[str, Any]:
+    """A CalendarEvent row as a FullCalendar event."""
+    color = event.color or EVENT_TYPE_COLORS.get(event.event_type, DEFAULT_EVENT_COLOR)
+    all_day = event.all_day == "true"
+    # Add time if not all-day and time is provided
+    start = f"{event.start_date}T{event.start_time}:00" if event.start_time and not all_day else event.start_date
+    end = f"{event.end_date}T{event.end_time}:00" if event.end_time and not all_day else event.end_date
+    return {
+        "id": f"event_{event.id}",
+        "title": event.title or "Untitled Event",
+        "description": event.description or "",
+        "start": start,
+        "end": end,
+        "allDay": all_day,
+        "backgroundColor": color,
+        "borderColor": color,
+        "textColor": "#ffffff",
+        "extendedProps": {
+            "event_type": event.event_type or "personal",
+            "tags": event.tags if event.tags else [],
+            "booking_id": event.booking_id,
+            "reminder_enabled": event.reminder_enabled == "true",
+            "reminder_time": event.reminder_time,
+            "database_id": event.id
+        }
+    }
+
+
+def booking_calendar_event(booking) -> Dict[str, Any]:
+    """A Booking row as an all-day FullCalendar event."""
+    color = BOOKING_STATUS_COLORS.get(booking.status, DEFAULT_EVENT_COLOR)
+    return {
+        "id": f"booking_{booking.booking_id}",
+        "title": f"✈️ {booking.trip_name}",
+        "description": f"Destination: {booking.destination}\nPassengers: {booking.passengers}\nStatus: {booking.status.title()}",
+        "start": booking.start_date,
+        "end": booking.end_date,
+        "allDay": True,
+        "backgroundColor": color,
+        "borderColor": color,
+        "textColor": "#ffffff",
+        "extendedProps": {
+            "event_type": "booking",
+            "booking_id": booking.booking_id,
+            "status": booking.status,
+            "destination": booking.destination,
+            "is_booking": True
+        }
+    }
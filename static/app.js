@@ -5,6 +5,18 @@ let bookingTripDetails = null;
 let currentPaymentBooking = null; // Store current booking for payment page
 let toastCounter = 0;
 
+// Each browser tab keeps its own conversation with the AI agent
+function getConversationId() {
+    let conversationId = sessionStorage.getItem('conversation_id');
+    if (!conversationId) {
+        conversationId = (window.crypto && crypto.randomUUID)
+            ? crypto.randomUUID()
+            : `conv-${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        sessionStorage.setItem('conversation_id', conversationId);
+    }
+    return conversationId;
+}
+
 // ========== TOAST NOTIFICATION SYSTEM (XSS-Safe) ==========
 function showToast(message, type = 'info', duration = 5000) {
     const container = document.getElementById('toast-container');
@@ -335,6 +347,112 @@ function formatMessage(content) {
     return content;
 }
 
+const TOOL_STATUS_LABELS = {
+    search_flights: '✈️ Searching flights...',
+    search_hotels: '🏨 Finding hotels...',
+    get_weather_forecast: '🌤️ Checking the weather...',
+    search_activities: '🎯 Looking up activities...',
+    calculate_trip_budget: '💰 Calculating your budget...',
+    save_user_preferences: '💾 Saving your preferences...',
+    get_user_preferences: '📋 Checking your preferences...',
+    create_day_by_day_itinerary: '🗓️ Building your itinerary...',
+    create_booking: '🎫 Creating your booking...'
+};
+
+function removeTypingIndicator() {
+    const messagesDiv = document.getElementById('chat-messages');
+    const indicator = messagesDiv.querySelector('.typing-indicator, .streaming-message');
+    if (indicator) {
+        indicator.closest('.message').remove();
+    }
+}
+
+function renderStreamingStatus(toolName) {
+    const messagesDiv = document.getElementById('chat-messages');
+    const indicator = messagesDiv.querySelector('.typing-indicator, .streaming-message');
+    if (!indicator) return;
+    
+    const messageDiv = indicator.closest('.message');
+    let statusEl = messageDiv.querySelector('.tool-status');
+    if (!statusEl) {
+        statusEl = document.createElement('div');
+        statusEl.className = 'tool-status';
+        statusEl.style.cssText = 'font-size: 0.85rem; opacity: 0.7; margin-top: 0.35rem;';
+        messageDiv.appendChild(statusEl);
+    }
+    statusEl.textContent = TOOL_STATUS_LABELS[toolName] || `⚙️ Running ${toolName}...`;
+}
+
+function renderStreamingMessage(text) {
+    const messagesDiv = document.getElementById('chat-messages');
+    const indicator = messagesDiv.querySelector('.typing-indicator, .streaming-message');
+    if (!indicator) return;
+    
+    // Swap the typing dots for the text streamed so far (escaped, formatted on completion)
+    indicator.className = 'message-content streaming-message';
+    indicator.textContent = text;
+    indicator.style.whiteSpace = 'pre-wrap';
+    messagesDiv.scrollTop = messagesDiv.scrollHeight;
+}
+
+// Stream the agent's progress over SSE; falls back to the regular endpoint
+async function streamPlanRequest(message) {
+    const requestOptions = {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ query: message, conversation_id: getConversationId() })
+    };
+    
+    const response = await fetch('/api/plan/stream', requestOptions);
+    if (!response.ok || !response.body || !window.TextDecoder) {
+        const fallback = await fetch('/api/plan', requestOptions);
+        if (!fallback.ok) {
+            throw new Error(`HTTP error! status: ${fallback.status}`);
+        }
+        return fallback.json();
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let streamedText = '';
+    let finalEvent = null;
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            const dataLine = rawEvent.split('\n').find(line => line.startsWith('data: '));
+            if (!dataLine) continue;
+            const event = JSON.parse(dataLine.slice(6));
+            
+            if (event.type === 'token') {
+                streamedText += event.content;
+                renderStreamingMessage(streamedText);
+            } else if (event.type === 'tool_start') {
+                // Narration before a tool call isn't part of the final answer
+                streamedText = '';
+                renderStreamingStatus(event.tool);
+            } else if (event.type === 'done' || event.type === 'error') {
+                finalEvent = event;
+            }
+        }
+    }
+    
+    if (!finalEvent) {
+        throw new Error('Connection closed before the plan was complete');
+    }
+    return finalEvent;
+}
+
 async function sendMessage() {
     const input = document.getElementById('chat-input');
     const sendBtn = document.getElementById('send-btn');
@@ -354,19 +472,7 @@ async function sendMessage() {
     sendBtn.innerHTML = '<span class="loading-spinner"></span> Planning...';
     
     try {
-        const response = await fetch('/api/plan', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ query: message })
-        });
-        
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        
-        const data = await response.json();
+        const data = await streamPlanRequest(message);
         
         if (data.status === 'success') {
             let responseText = data.response || '';
@@ -392,12 +498,8 @@ async function sendMessage() {
                 // Not JSON, continue
             }
             
-            // Remove typing indicator
-            const messagesDiv = document.getElementById('chat-messages');
-            const typingIndicator = messagesDiv.querySelector('.typing-indicator');
-            if (typingIndicator) {
-                typingIndicator.closest('.message').remove();
-            }
+            // Remove typing indicator (or the live streamed message)
+            removeTypingIndicator();
             
             addMessage('assistant', responseText);
             
@@ -407,12 +509,8 @@ async function sendMessage() {
                 extractAndCreateBooking(responseText, message);
             }, 500);
         } else {
-            // Remove typing indicator
-            const messagesDiv = document.getElementById('chat-messages');
-            const typingIndicator = messagesDiv.querySelector('.typing-indicator');
-            if (typingIndicator) {
-                typingIndicator.closest('.message').remove();
-            }
+            // Remove typing indicator (or the live streamed message)
+            removeTypingIndicator();
             
             const errorMsg = data.error || 'Something went wrong';
             addMessage('assistant', '❌ Error: ' + errorMsg);
@@ -420,12 +518,8 @@ async function sendMessage() {
     } catch (error) {
         console.error('Chat error:', error);
         
-        // Remove typing indicator
-        const messagesDiv = document.getElementById('chat-messages');
-        const typingIndicator = messagesDiv.querySelector('.typing-indicator');
-        if (typingIndicator) {
-            typingIndicator.closest('.message').remove();
-        }
+        // Remove typing indicator (or the live streamed message)
+        removeTypingIndicator();
         
         addMessage('assistant', '❌ Error connecting to server: ' + error.message + '\n\nPlease check if the server is running and try again.');
     } finally {
@@ -651,7 +745,7 @@ function openBookingWithDetails() {
         fetch("/api/booking-options", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ trip_details: window.lastTripDetails })
+            body: JSON.stringify({ trip_details: window.lastTripDetails, conversation_id: getConversationId() })
         })
         .then(response => {
             if (!response.ok) {
@@ -761,7 +855,7 @@ async function clearChat() {
         messagesDiv.innerHTML = '';
         
         try {
-            await fetch('/api/reset', { method: 'POST' });
+            await fetch(`/api/reset?conversation_id=${encodeURIComponent(getConversationId())}`, { method: 'POST' });
         } catch (error) {
             console.error('Error resetting memory:', error);
         }
@@ -1624,6 +1718,93 @@ async function deleteItinerary(id) {
     }
 }
 
+// My Trips loads bookings a page at a time, without the heavy flight/hotel JSON
+const TRIPS_PAGE_SIZE = 24;
+const TRIP_CARD_FIELDS = 'id,trip_name,destination,start_date,end_date,total_price,passengers,status,payment_status';
+
+function renderTripCard(booking) {
+    const statusBadge = booking.status === 'confirmed' 
+        ? '<span class="badge badge-success">✓ Confirmed</span>'
+        : booking.status === 'cancelled'
+        ? '<span class="badge" style="background: rgba(239, 68, 68, 0.1); color: #ef4444;">Cancelled</span>'
+        : '<span class="badge badge-primary">Pending</span>';
+
+    return `
+        <div class="trip-card" onclick="handleTripClick('${booking.id}', '${booking.payment_status}')" style="cursor: pointer; transition: all 0.3s ease;">
+            <div class="trip-image">✈️</div>
+            <div class="trip-content">
+                <h3 class="trip-title">${booking.trip_name}</h3>
+                <div class="trip-meta">📅 ${booking.start_date} to ${booking.end_date} • 💰 $${(booking.total_price || 0).toFixed(2)} • 👥 ${booking.passengers || 1} passenger(s)</div>
+                <p class="feature-desc">${booking.destination}</p>
+                <div style="margin-top: 1rem;">
+                    ${statusBadge}
+                    ${booking.payment_status === 'paid' ? '<span class="badge badge-success">💳 Paid</span>' : '<span class="badge badge-warning">💳 Unpaid</span>'}
+                </div>
+                <div style="margin-top: 1rem;">
+                    <small style="color: var(--gray);">Booking ID: ${booking.id}</small>
+                </div>
+                <div style="margin-top: 0.5rem;">
+                    <button class="btn-small btn-view" onclick="event.stopPropagation(); viewBookingDetailsModal('${booking.id}')" style="margin-right: 0.5rem;">📋 View Details</button>
+                    ${booking.status !== 'cancelled' && booking.payment_status !== 'paid' ? 
+                        `<button class="btn-small btn-primary" onclick="event.stopPropagation(); proceedToPayment('${booking.id}', ${booking.total_price})">💳 Complete Payment</button>
+                        <button class="btn-small btn-delete" onclick="event.stopPropagation(); cancelBooking('${booking.id}')" style="margin-left: 0.5rem;">❌ Cancel</button>` : 
+                        ''}
+                </div>
+            </div>
+        </div>
+    `;
+}
+
+function renderPlanNewTripCard() {
+    return `
+        <div class="trip-card" style="border: 2px dashed var(--primary); background: rgba(99, 102, 241, 0.05);">
+            <div class="trip-image" style="background: rgba(99, 102, 241, 0.1); color: var(--primary);">➕</div>
+            <div class="trip-content" style="text-align: center;">
+                <h3 class="trip-title" style="color: var(--primary);">Plan New Trip</h3>
+                <p class="feature-desc" style="margin: 1rem 0;">Ready for your next adventure? Let our AI help you plan the perfect trip!</p>
+                <button class="btn btn-primary" onclick="navigateTo('plan')">🚀 Start Planning</button>
+            </div>
+        </div>
+    `;
+}
+
+function renderLoadMoreTripsCard(cursor) {
+    return `
+        <div class="trip-card load-more-trips" style="border: 2px dashed var(--primary); background: rgba(99, 102, 241, 0.05);">
+            <div class="trip-content" style="text-align: center;">
+                <button class="btn btn-primary" onclick="loadMoreTrips('${cursor}', this)">⬇️ Load more trips</button>
+            </div>
+        </div>
+    `;
+}
+
+async function loadMoreTrips(cursor, button) {
+    const loadMoreCard = button.closest('.load-more-trips');
+    button.disabled = true;
+    
+    try {
+        const response = await fetch(`/api/bookings?limit=${TRIPS_PAGE_SIZE}&fields=${TRIP_CARD_FIELDS}&cursor=${encodeURIComponent(cursor)}`);
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const data = await response.json();
+        
+        let html = '';
+        (data.bookings || []).forEach(booking => {
+            html += renderTripCard(booking);
+        });
+        if (data.next_cursor) {
+            html += renderLoadMoreTripsCard(data.next_cursor);
+        }
+        loadMoreCard.insertAdjacentHTML('beforebegin', html);
+        loadMoreCard.remove();
+    } catch (error) {
+        console.error('Error loading more trips:', error);
+        button.disabled = false;
+        showToast('Could not load more trips. Please try again.', 'error');
+    }
+}
+
 async function loadMyTrips() {
     const tripsGrid = document.querySelector('#trips-page .trips-grid');
     
@@ -1635,7 +1816,7 @@ async function loadMyTrips() {
     tripsGrid.innerHTML = '<div class="loading-container"><div class="loading-spinner-large"></div><p>Loading your trips...</p></div>';
     
     try {
-        const response = await fetch('/api/bookings');
+        const response = await fetch(`/api/bookings?limit=${TRIPS_PAGE_SIZE}&fields=${TRIP_CARD_FIELDS}`);
         
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
@@ -1647,48 +1828,14 @@ async function loadMyTrips() {
             let html = '';
             
             data.bookings.forEach(booking => {
-                const statusBadge = booking.status === 'confirmed' 
-                    ? '<span class="badge badge-success">✓ Confirmed</span>'
-                    : booking.status === 'cancelled'
-                    ? '<span class="badge" style="background: rgba(239, 68, 68, 0.1); color: #ef4444;">Cancelled</span>'
-                    : '<span class="badge badge-primary">Pending</span>';
-                
-                html += `
-                    <div class="trip-card" onclick="handleTripClick('${booking.id}', '${booking.payment_status}')" style="cursor: pointer; transition: all 0.3s ease;">
-                        <div class="trip-image">✈️</div>
-                        <div class="trip-content">
-                            <h3 class="trip-title">${booking.trip_name}</h3>
-                            <div class="trip-meta">📅 ${booking.start_date} to ${booking.end_date} • 💰 $${(booking.total_price || 0).toFixed(2)} • 👥 ${booking.passengers || 1} passenger(s)</div>
-                            <p class="feature-desc">${booking.destination}</p>
-                            <div style="margin-top: 1rem;">
-                                ${statusBadge}
-                                ${booking.payment_status === 'paid' ? '<span class="badge badge-success">💳 Paid</span>' : '<span class="badge badge-warning">💳 Unpaid</span>'}
-                            </div>
-                            <div style="margin-top: 1rem;">
-                                <small style="color: var(--gray);">Booking ID: ${booking.id}</small>
-                            </div>
-                            <div style="margin-top: 0.5rem;">
-                                <button class="btn-small btn-view" onclick="event.stopPropagation(); viewBookingDetailsModal('${booking.id}')" style="margin-right: 0.5rem;">📋 View Details</button>
-                                ${booking.status !== 'cancelled' && booking.payment_status !== 'paid' ? 
-                                    `<button class="btn-small btn-primary" onclick="event.stopPropagation(); proceedToPayment('${booking.id}', ${booking.total_price})">💳 Complete Payment</button>
-                                    <button class="btn-small btn-delete" onclick="event.stopPropagation(); cancelBooking('${booking.id}')" style="margin-left: 0.5rem;">❌ Cancel</button>` : 
-                                    ''}
-                            </div>
-                        </div>
-                    </div>
-                `;
+                html += renderTripCard(booking);
             });
             
-            html += `
-                <div class="trip-card" style="border: 2px dashed var(--primary); background: rgba(99, 102, 241, 0.05);">
-                    <div class="trip-image" style="background: rgba(99, 102, 241, 0.1); color: var(--primary);">➕</div>
-                    <div class="trip-content" style="text-align: center;">
-                        <h3 class="trip-title" style="color: var(--primary);">Plan New Trip</h3>
-                        <p class="feature-desc" style="margin: 1rem 0;">Ready for your next adventure? Let our AI help you plan the perfect trip!</p>
-                        <button class="btn btn-primary" onclick="navigateTo('plan')">🚀 Start Planning</button>
-                    </div>
-                </div>
-            `;
+            if (data.next_cursor) {
+                html += renderLoadMoreTripsCard(data.next_cursor);
+            }
+            
+            html += renderPlanNewTripCard();
             
             tripsGrid.innerHTML = html;
         } else {
@@ -1967,7 +2114,7 @@ async function openBookingPageFromChat() {
         const response = await fetch("/api/booking-options", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({})
+            body: JSON.stringify({ conversation_id: getConversationId() })
         });
         const data = await response.json();
         if (data.status === "success") {
@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+import pytest
+
+# Tests never touch travel_planner.db or a configured database, and never call a real LLM
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ.pop("OPENROUTER_API_KEY", None)
+
+from database import Base, SessionLocal, engine, init_db
+
+init_db()
+
+
+@pytest.fixture
+def db():
+    """A session on an emptied test database."""
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db):
+    """A TestClient for the API on the emptied test database (startup tasks are not run)."""
+    from fastapi.testclient import TestClient
+    import main
+
+    return TestClient(main.app)
@@ -0,0 +1,59 @@
+import re
+import threading
+import time
+
+import booking_service
+from booking_service import BookingRequest
+from database import Booking, SessionLocal
+
+THREADS = 8
+PER_THREAD = 300
+
+BOOKING_ID_PATTERN = re.compile(r"^BK\d{17}-[0-9A-F]{8}$")
+
+
+def book_many(results, errors):
+    request = BookingRequest(trip_id="goa-beach", trip_name="Goa Beach", destination="Goa",
+                             start_date="2026-12-01", end_date="2026-12-05", total_price=0, passengers=2)
+    db = SessionLocal()
+    try:
+        for _ in range(PER_THREAD):
+            started = time.perf_counter_ns()
+            booking_id = booking_service.create_booking(db, request).booking_id
+            results.append((started, time.perf_counter_ns(), booking_id))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        db.close()
+
+
+def test_concurrent_bookings_get_unique_ordered_ids(db):
+    per_thread = [[] for _ in range(THREADS)]
+    errors = []
+    threads = [threading.Thread(target=book_many, args=(results, errors)) for results in per_thread]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+    ids = [booking_id for results in per_thread for _, _, booking_id in results]
+    assert len(ids) == THREADS * PER_THREAD
+    assert len(set(ids)) == len(ids)
+    assert all(BOOKING_ID_PATTERN.match(booking_id) for booking_id in ids)
+    assert sorted(db.scalars(db.query(Booking.booking_id).statement)) == sorted(ids)
+
+    # Each thread's bookings sort in the order they were made...
+    for results in per_thread:
+        thread_ids = [booking_id for _, _, booking_id in results]
+        assert thread_ids == sorted(thread_ids)
+
+    # ...and across threads, a booking made after another one finished sorts after it
+    calls = sorted(call for results in per_thread for call in results)
+    finished = sorted((end, booking_id) for _, end, booking_id in calls)
+    latest, i = "", 0
+    for started, _, booking_id in calls:
+        while i < len(finished) and finished[i][0] < started:
+            latest = max(latest, finished[i][1])
+            i += 1
+        assert booking_id > latest
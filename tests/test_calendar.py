@@ -0,0 +1,79 @@
+import random
+from datetime import date, timedelta
+
+from database import Booking
+
+FIRST = date(2026, 11, 1)
+
+
+def add_events(client, rng, n):
+    events = []
+    for i in range(n):
+        start = FIRST + timedelta(days=rng.randint(0, 90))
+        end = start + timedelta(days=rng.choice([0, 0, 1, 3, 10]))
+        event = {"title": f"Event {i}", "start_date": start.isoformat(), "end_date": end.isoformat(),
+                 "event_type": rng.choice(["trip", "personal", "reminder"])}
+        assert client.post("/api/calendar/events", json=event).json()["status"] == "success"
+        events.append(event)
+    return events
+
+
+def test_events_overlapping_the_range_are_returned(db, client):
+    rng = random.Random(7)
+    events = add_events(client, rng, 60)
+    for status, start, end in (("confirmed", "2026-11-20", "2026-11-25"), ("pending", "2027-01-30", "2027-02-02"),
+                               ("cancelled", "2026-11-20", "2026-11-25")):
+        db.add(Booking(booking_id=f"BK-{status}", trip_id="goa-beach", trip_name="Goa", destination="Goa",
+                       start_date=start, end_date=end, base_price=450.0, total_price=450.0, passengers=1,
+                       status=status))
+    db.commit()
+
+    for _ in range(30):
+        range_start = FIRST + timedelta(days=rng.randint(-10, 100))
+        range_end = range_start + timedelta(days=rng.randint(1, 45))
+        # FullCalendar sends datetimes; the range end is exclusive and event end dates inclusive
+        body = client.get("/api/calendar/events", params={"start": f"{range_start}T00:00:00",
+                                                          "end": f"{range_end}T00:00:00"}).json()
+
+        expected = {e["title"] for e in events
+                    if e["start_date"] < range_end.isoformat() and e["end_date"] >= range_start.isoformat()}
+        got = {e["title"] for e in body["events"] if not e["extendedProps"].get("is_booking")}
+        assert got == expected
+
+        bookings = {e["extendedProps"]["booking_id"] for e in body["events"] if e["extendedProps"].get("is_booking")}
+        assert "BK-cancelled" not in bookings
+        assert ("BK-confirmed" in bookings) == ("2026-11-20" < range_end.isoformat() and "2026-11-25" >= range_start.isoformat())
+
+    everything = client.get("/api/calendar/events").json()["events"]
+    assert len(everything) == len(events) + 2
+
+
+def test_invalid_range_is_a_400(client):
+    assert client.get("/api/calendar/events", params={"start": "next week"}).status_code == 400
+
+
+def test_stats_match_a_count_over_every_event(client):
+    rng = random.Random(3)
+    today = date.today()
+    events = []
+    for i in range(40):
+        start = today + timedelta(days=rng.randint(-120, 120))
+        event = {"title": f"Event {i}", "start_date": start.isoformat(), "end_date": start.isoformat(),
+                 "event_type": rng.choice(["trip", "personal", "reminder"])}
+        client.post("/api/calendar/events", json=event)
+        events.append(event)
+
+    stats = client.get("/api/calendar/stats").json()
+
+    upcoming = [e for e in events if e["start_date"] >= today.isoformat()]
+    assert (stats["total_events"], stats["upcoming_events"], stats["past_events"]) == (
+        len(events), len(upcoming), len(events) - len(upcoming))
+    for event_type, counts in stats["by_type"].items():
+        typed = [e for e in events if e["event_type"] == event_type]
+        typed_upcoming = [e for e in typed if e in upcoming]
+        assert counts == {"total": len(typed), "upcoming": len(typed_upcoming), "past": len(typed) - len(typed_upcoming)}
+    assert sum(c["total"] for c in stats["by_type"].values()) == len(events)
+    by_month = {}
+    for e in events:
+        by_month[e["start_date"][:7]] = by_month.get(e["start_date"][:7], 0) + 1
+    assert stats["by_month"] == dict(sorted(by_month.items()))
@@ -0,0 +1,64 @@
+from calendar_service import (CalendarEventRequest, CalendarEventUpdate, bulk_create_events,
+                              bulk_delete_events, bulk_update_events)
+from database import CalendarEvent
+
+
+def event(title, start, end=None, **fields):
+    return CalendarEventRequest(title=title, start_date=start, end_date=end or start, **fields)
+
+
+def stored(db):
+    db.expire_all()
+    return {e.title: (e.start_date, e.end_date) for e in db.query(CalendarEvent)}
+
+
+def test_bad_item_is_reported_and_the_rest_are_written(db):
+    result = bulk_create_events(db, [
+        event("valid", "2026-12-01"),
+        event("bad month", "2026-13-01"),
+        event("unpadded", "2026-1-5", "2026-1-6"),
+        event("not a date", "next week"),
+    ])
+
+    assert result["status"] == "success"
+    assert (result["created"], result["failed"]) == (2, 2)
+    assert [r["status"] for r in result["results"]] == ["success", "error", "success", "error"]
+    assert result["results"][1]["error"] == "Invalid date format. Please use YYYY-MM-DD format"
+    assert stored(db) == {"valid": ("2026-12-01", "2026-12-01"), "unpadded": ("2026-01-05", "2026-01-06")}
+
+
+def test_atomic_batch_writes_nothing_when_an_item_is_bad(db):
+    result = bulk_create_events(db, [event("valid", "2026-12-01"), event("bad", "2026-02-30")], atomic=True)
+
+    assert result["status"] == "error"
+    assert [r["status"] for r in result["results"]] == ["skipped", "error"]
+    assert stored(db) == {}
+
+
+def test_bulk_update_reports_bad_items_and_applies_the_rest(db):
+    created = bulk_create_events(db, [event("a", "2026-12-01"), event("b", "2026-12-02")])
+    a, b = (r["event_id"] for r in created["results"])
+
+    result = bulk_update_events(db, [
+        CalendarEventUpdate(id=a, title="a", start_date="2026-12-3", end_date="2026-12-4"),
+        CalendarEventUpdate(id=b, title="b", start_date="2026/12/05", end_date="2026-12-05"),
+        CalendarEventUpdate(id=a, title="a", start_date="2026-12-09", end_date="2026-12-09"),
+        CalendarEventUpdate(id=999, title="c", start_date="2026-12-01", end_date="2026-12-01"),
+    ])
+
+    assert (result["updated"], result["failed"]) == (1, 3)
+    assert [r.get("error") for r in result["results"]] == [
+        None, "Invalid date format. Please use YYYY-MM-DD format",
+        "Event appears more than once in the batch", "Event not found"
+    ]
+    assert stored(db) == {"a": ("2026-12-03", "2026-12-04"), "b": ("2026-12-02", "2026-12-02")}
+
+
+def test_bulk_delete_counts_each_row_once(db):
+    created = bulk_create_events(db, [event("a", "2026-12-01"), event("b", "2026-12-02")])
+    a, b = (r["event_id"] for r in created["results"])
+
+    result = bulk_delete_events(db, [a, a, 999])
+
+    assert (result["deleted"], result["failed"]) == (1, 2)
+    assert stored(db) == {"b": ("2026-12-02", "2026-12-02")}
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from catalog import Catalog, InventoryIndex
+
+STYLES = ["luxury", "mid-range", "budget-friendly"]
+AMENITIES = ["Pool", "WiFi", "Spa", "Gym"]
+SORTS = [
+    [("rating", True), ("price", False)],
+    [("price", False), ("rating", True)],
+    [("price", True)],
+    [("reviews", True)],
+    [("rating", False), ("name", True)],
+]
+
+
+def make_hotels(rng, n):
+    return [{
+        "name": f"Hotel {i}",
+        "price_per_night": rng.randint(20, 400),
+        "rating": round(rng.uniform(3, 5), 1),
+        "reviews": rng.randint(0, 5000),
+        "style": rng.choice(STYLES),
+        "amenities": rng.sample(AMENITIES, rng.randint(0, 3)),
+    } for i in range(n)]
+
+
+def linear(index, items, min_price, max_price, min_rating, filters, sort, limit):
+    """Filter and sort every item, the way the search tools did before the index."""
+    def matches(item):
+        price = item["price_per_night"]
+        for facet, values in filters.items():
+            have = item[facet] if isinstance(item[facet], list) else [item[facet]]
+            if not {v.lower() for v in values} & {str(h).lower() for h in have}:
+                return False
+        return ((min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+                and (min_rating is None or item["rating"] >= min_rating))
+
+    ids = [i for i, item in enumerate(items) if matches(item)]
+    return [dict(items[i]) for i in sorted(ids, key=index._sort_key(sort))[:limit]]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_query_matches_a_linear_scan(seed):
+    rng = random.Random(seed)
+    items = make_hotels(rng, rng.choice([1, 10, 200, 3000]))
+    index = InventoryIndex(items, "price_per_night", ("style", "amenities"))
+    for _ in range(25):
+        filters = {}
+        if rng.random() < 0.5:
+            filters["style"] = rng.sample(STYLES, rng.randint(1, 2))
+        if rng.random() < 0.3:
+            filters["amenities"] = [rng.choice(AMENITIES)]
+        args = (rng.choice([None, rng.randint(0, 200)]), rng.choice([None, rng.randint(50, 450)]),
+                rng.choice([None, 4.0, 4.5]), filters, rng.choice(SORTS), rng.randint(1, 20))
+        assert index.query(*args) == linear(index, items, *args)
+
+
+def test_query_returns_copies():
+    items = [{"name": "A", "price_per_night": 100, "rating": 4.0}]
+    result = InventoryIndex(items, "price_per_night", ()).query()
+    result[0]["name"] = "changed"
+    assert items[0]["name"] == "A"
+
+
+def test_unindexed_facet_is_rejected():
+    index = InventoryIndex([{"name": "A", "price_per_night": 1, "rating": 4}], "price_per_night", ("style",))
+    with pytest.raises(ValueError):
+        index.query(filters={"location": ["Beach"]})
+
+
+def test_catalog_keys_are_case_insensitive_and_unknown_keys_are_none():
+    catalog = Catalog()
+    catalog.load("flights", [
+        {"origin": "Delhi", "destination": "Goa", "flight_number": "AI1", "price": 300, "rating": 4},
+        {"origin": "delhi ", "destination": "GOA", "flight_number": "6E2", "price": 120, "rating": 4},
+    ])
+    flights = catalog.query("flights", ("DELHI", "goa"), sort=[("price", False)])
+    assert [f["flight_number"] for f in flights] == ["6E2", "AI1"]
+    assert catalog.query("flights", ("Delhi", "Paris")) is None
+    assert catalog.stats() == {"flights": {"keys": 1, "items": 2}}
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agent.llm_client import InFlightLimiter, LLMBusy
+
+
+def test_waiters_get_slots_in_arrival_order():
+    limiter = InFlightLimiter(limit=1, queue_timeout=5)
+    limiter.acquire()
+    order = []
+
+    def worker(n):
+        limiter.acquire()
+        order.append(n)
+        limiter.release()
+
+    threads = []
+    for n in range(5):
+        threads.append(threading.Thread(target=worker, args=(n,)))
+        threads[-1].start()
+        # Let each one join the queue before the next arrives
+        while limiter.stats()["queued"] < n + 1:
+            time.sleep(0.001)
+    limiter.release()
+    for t in threads:
+        t.join()
+
+    assert order == [0, 1, 2, 3, 4]
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["queued_total"] == 5
+
+
+def test_sync_and_async_callers_share_one_fifo_queue():
+    limiter = InFlightLimiter(limit=1, queue_timeout=5)
+    order = []
+
+    async def run():
+        await limiter.aacquire()
+        thread = threading.Thread(target=lambda: (limiter.acquire(), order.append("thread"), limiter.release()))
+        thread.start()
+        while limiter.stats()["queued"] < 1:
+            await asyncio.sleep(0.001)
+
+        async def task():
+            await limiter.aacquire()
+            order.append("task")
+            limiter.release()
+
+        queued = asyncio.create_task(task())
+        while limiter.stats()["queued"] < 2:
+            await asyncio.sleep(0.001)
+        limiter.release()
+        await queued
+        await asyncio.to_thread(thread.join)
+
+    asyncio.run(run())
+    assert order == ["thread", "task"]
+
+
+def test_waiting_past_the_timeout_is_rejected_and_leaves_the_queue():
+    limiter = InFlightLimiter(limit=1, queue_timeout=0.05)
+    limiter.acquire()
+
+    with pytest.raises(LLMBusy):
+        limiter.acquire()
+
+    async def queued():
+        await limiter.aacquire()
+
+    with pytest.raises(LLMBusy):
+        asyncio.run(queued())
+
+    stats = limiter.stats()
+    assert (stats["queued"], stats["rejected_total"], stats["in_flight"]) == (0, 2, 1)
+    limiter.release()
+    limiter.acquire()
+    assert limiter.stats()["in_flight"] == 1
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = InFlightLimiter(limit=1, queue_timeout=5)
+
+    async def run():
+        await limiter.aacquire()
+        waiter = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+
+    asyncio.run(run())
+    assert limiter.stats()["in_flight"] == 0 and limiter.stats()["queued"] == 0
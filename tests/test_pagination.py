@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from database import Booking, Itinerary
+
+CREATED = datetime(2026, 1, 1)
+
+
+def seed_bookings(db, n):
+    for i in range(n):
+        db.add(Booking(
+            booking_id=f"BK{i:04d}", trip_id="goa-beach", trip_name=f"Trip {i}", destination="Goa",
+            start_date="2026-12-01", end_date="2026-12-05", base_price=450.0, total_price=900.0, passengers=2,
+            status="confirmed" if i % 3 == 0 else "pending", payment_status="unpaid",
+            flight_details={"flight_number": f"AI{i}"}, hotel_details={},
+            # Pairs of bookings share a timestamp, so the id has to break ties
+            created_at=CREATED + timedelta(minutes=i // 2)
+        ))
+    db.commit()
+
+
+def all_pages(client, path, key, **params):
+    pages, cursor = [], None
+    while True:
+        body = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append(body[key])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_bookings_page_newest_first_without_gaps_or_repeats(db, client):
+    seed_bookings(db, 23)
+
+    pages = all_pages(client, "/api/bookings", "bookings", limit=5)
+
+    assert [len(p) for p in pages] == [5, 5, 5, 5, 3]
+    ids = [b["booking_id"] for page in pages for b in page]
+    assert ids == [f"BK{i:04d}" for i in reversed(range(23))]
+
+
+def test_status_filter_and_exact_last_page(db, client):
+    seed_bookings(db, 23)
+
+    pages = all_pages(client, "/api/bookings", "bookings", limit=4, status="confirmed")
+
+    assert [len(p) for p in pages] == [4, 4]
+    assert all(b["status"] == "confirmed" for page in pages for b in page)
+
+
+def test_fields_limit_the_response(db, client):
+    seed_bookings(db, 3)
+
+    body = client.get("/api/bookings", params={"fields": "id,total_price,created_at"}).json()
+
+    assert body["bookings"][0] == {"id": "BK0002", "total_price": 900.0, "created_at": "2026-01-01T00:01:00"}
+
+
+def test_itineraries_page_through_cursors(db, client):
+    for i in range(7):
+        db.add(Itinerary(trip_name=f"Trip {i}", destination="Goa", start_date="2026-12-01", end_date="2026-12-05",
+                         created_at=CREATED + timedelta(hours=i)))
+    db.commit()
+
+    pages = all_pages(client, "/api/itineraries", "itineraries", limit=3, fields="trip_name")
+
+    assert [[i["trip_name"] for i in page] for page in pages] == [
+        ["Trip 6", "Trip 5", "Trip 4"], ["Trip 3", "Trip 2", "Trip 1"], ["Trip 0"]
+    ]
+
+
+def test_bad_cursor_and_unknown_fields_are_400s(client):
+    assert client.get("/api/bookings", params={"cursor": "not-a-cursor"}).status_code == 400
+    response = client.get("/api/bookings", params={"fields": "id,password"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: password"
+    assert client.get("/api/itineraries", params={"limit": 0}).status_code == 422
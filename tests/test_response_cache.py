@@ -0,0 +1,34 @@
+import pytest
+
+from agent.response_cache import PlanResponseCache
+
+PREFERENCES = {"budget": "moderate"}
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Plan a 5 day honeymoon trip to Maldives from Mumbai", "Plan a 5 day honeymoon trip to Maldives from Delhi"),
+    ("Plan a 4 day Bali trip with vegetarian food", "Plan a 4 day Bali trip with non-vegetarian food"),
+    ("Plan a 3 day Goa trip with a mid-range hotel", "Plan a 3 day Goa trip with a luxury hotel"),
+    ("Plan a trip from Mumbai to Goa", "Plan a trip from Goa to Mumbai"),
+    ("Plan a 3 day Goa trip under $800", "Plan a 3 day Goa trip under $900"),
+])
+def test_different_requests_miss(cached, asked):
+    cache = PlanResponseCache(similarity=0.5)
+    cache.set(cached, PREFERENCES, {"status": "success"})
+    assert cache.get(asked, PREFERENCES) is None
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("3 day goa trip", "3-day trip to Goa"),
+    ("Plan a 5 day honeymoon trip to Maldives from Mumbai", "Plan me a 5 day honeymoon trip to the Maldives from Mumbai"),
+])
+def test_rewordings_hit(cached, asked):
+    cache = PlanResponseCache()
+    cache.set(cached, PREFERENCES, {"status": "success"})
+    assert cache.get(asked, PREFERENCES) == ({"status": "success"}, "similar")
+
+
+def test_preferences_must_match():
+    cache = PlanResponseCache()
+    cache.set("3 day goa trip", PREFERENCES, {"status": "success"})
+    assert cache.get("3 day goa trip", {"budget": "luxury"}) is None
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from agent.tool_cache import ToolResultCache
+
+
+def counting_search(calls, delay=0.0):
+    def search_flights(origin: str, destination: str, max_budget: float = 1000.0):
+        calls.append((origin, destination, max_budget))
+        time.sleep(delay)
+        return f"{origin}->{destination} under {max_budget}"
+    return search_flights
+
+
+def test_concurrent_identical_calls_run_once():
+    calls = []
+    cached = ToolResultCache().wrap("search_flights", counting_search(calls, delay=0.2))
+    start = threading.Barrier(10)
+    results = []
+
+    def call():
+        start.wait()
+        results.append(cached(origin="Delhi", destination="Goa"))
+
+    threads = [threading.Thread(target=call) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["Delhi->Goa under 1000.0"] * 10
+
+
+def test_equivalent_arguments_share_an_entry():
+    calls = []
+    cache = ToolResultCache()
+    cached = cache.wrap("search_flights", counting_search(calls))
+
+    cached(origin="Delhi", destination="Goa")
+    cached(origin=" delhi ", destination="GOA", max_budget=1000)
+    cached(origin="Delhi", destination="Goa", max_budget=500)
+
+    assert len(calls) == 2
+    assert cache.stats()["tools"]["search_flights"]["hits"] == 1
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    monkeypatch.setenv("AGENT_TOOL_CACHE_TTL_SEARCH_FLIGHTS", "0.1")
+    calls = []
+    cached = ToolResultCache().wrap("search_flights", counting_search(calls))
+
+    cached(origin="Delhi", destination="Goa")
+    cached(origin="Delhi", destination="Goa")
+    time.sleep(0.15)
+    cached(origin="Delhi", destination="Goa")
+
+    assert len(calls) == 2
+
+
+def test_tools_without_a_ttl_are_not_cached():
+    calls = []
+    cached = ToolResultCache().wrap("create_booking", counting_search(calls))
+    cached(origin="Delhi", destination="Goa")
+    cached(origin="Delhi", destination="Goa")
+    assert len(calls) == 2
+
+
+def test_failures_are_not_cached_and_reach_waiting_callers():
+    attempts = []
+
+    def search_flights(origin: str):
+        attempts.append(origin)
+        time.sleep(0.1)
+        if len(attempts) == 1:
+            raise RuntimeError("provider down")
+        return "ok"
+
+    cached = ToolResultCache().wrap("search_flights", search_flights)
+    start = threading.Barrier(3)
+    errors = []
+
+    def call():
+        start.wait()
+        try:
+            cached(origin="Delhi")
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(attempts) == 1 and len(errors) == 3
+    assert cached(origin="Delhi") == "ok"
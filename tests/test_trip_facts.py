@@ -0,0 +1,66 @@
+import random
+import re
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from conversations import ConversationHistory
+from trip_facts import extract_message_facts, merge_trip_facts
+
+PARTS = ["trip to Goa", "Paris vacation", "visit Rome", "2025-01-01", "2025-02-03 to 2025-02-09",
+         "$500", "$0", "$1200.50", "1 person", "3 people", "2 guests", "0 passengers", "hello"]
+
+
+def scan(history):
+    """The per-request scan /api/booking-options ran over the whole history before per-message facts."""
+    destination = start_date = end_date = budget = None
+    passengers = 1
+    for content in history:
+        dates = re.findall(r'\d{4}-\d{2}-\d{2}', content)
+        if dates:
+            if not start_date:
+                start_date = dates[0]
+            if len(dates) > 1:
+                end_date = dates[1]
+            elif not end_date:
+                end_date = dates[0]
+        for pattern in [r'(?:destination|going to|visit|trip to|travel to)[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
+                        r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:trip|vacation|getaway)']:
+            match = re.search(pattern, content, re.IGNORECASE)
+            if match and not destination:
+                destination = match.group(1)
+                break
+        match = re.search(r'\$(\d+(?:\.\d{2})?)', content)
+        if match and not budget:
+            budget = float(match.group(1))
+        match = re.search(r'(\d+)\s*(?:passenger|person|people|guest)', content, re.IGNORECASE)
+        if match and passengers == 1:
+            passengers = int(match.group(1))
+    return {"destination": destination, "start_date": start_date, "end_date": end_date,
+            "budget": budget, "passengers": passengers}
+
+
+def random_history(rng):
+    return [" ".join(rng.sample(PARTS, rng.randint(0, 4))) for _ in range(rng.randint(0, 8))]
+
+
+def test_merge_matches_the_full_scan():
+    rng = random.Random(1)
+    for _ in range(5000):
+        history = random_history(rng)
+        assert merge_trip_facts([extract_message_facts(m) for m in history]) == scan(history)
+
+
+def test_history_facts_follow_added_and_trimmed_messages(db):
+    rng = random.Random(2)
+    history = ConversationHistory("test-trip-facts", max_messages=6)
+    contents = []
+    for _ in range(20):
+        batch = random_history(rng)[:3]
+        history.add_messages([HumanMessage(content=c) if i % 2 == 0 else AIMessage(content=c)
+                              for i, c in enumerate(batch)])
+        contents = (contents + batch)[-6:]
+        assert history.trip_facts() == scan(contents)
+
+    facts = history.trip_facts()
+    facts["destination"] = "Changed"
+    assert history.trip_facts() == scan(contents)
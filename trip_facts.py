@@ -0,0 +1,58 @@
+import re
+from typing import Any, Dict, List, Optional
+
+# Trip details mentioned in a conversation, used to prefill /api/booking-options
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+DESTINATION_PATTERNS = [
+    re.compile(r'(?:destination|going to|visit|trip to|travel to)[:\s]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', re.IGNORECASE),
+    re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:trip|vacation|getaway)', re.IGNORECASE),
+]
+BUDGET_PATTERN = re.compile(r'\$(\d+(?:\.\d{2})?)')
+PASSENGER_PATTERN = re.compile(r'(\d+)\s*(?:passenger|person|people|guest)', re.IGNORECASE)
+
+
+def extract_message_facts(content: str) -> Dict[str, Any]:
+    """Trip details found in one message (only the keys that were found)."""
+    facts: Dict[str, Any] = {}
+    dates = DATE_PATTERN.findall(content)
+    if dates:
+        facts["dates"] = dates[:2]
+    for pattern in DESTINATION_PATTERNS:
+        match = pattern.search(content)
+        if match:
+            facts["destination"] = match.group(1)
+            break
+    match = BUDGET_PATTERN.search(content)
+    if match:
+        facts["budget"] = float(match.group(1))
+    match = PASSENGER_PATTERN.search(content)
+    if match:
+        facts["passengers"] = int(match.group(1))
+    return facts
+
+
+def merge_trip_facts(per_message: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-message facts, oldest first, into the conversation's trip details.
+
+    The first destination, budget and start date mentioned win; a later
+    message with two dates updates the end date; a passenger count replaces
+    the default of one.
+    """
+    trip: Dict[str, Optional[Any]] = {"destination": None, "start_date": None, "end_date": None,
+                                      "budget": None, "passengers": 1}
+    for facts in per_message:
+        dates = facts.get("dates")
+        if dates:
+            if not trip["start_date"]:
+                trip["start_date"] = dates[0]
+            if len(dates) > 1:
+                trip["end_date"] = dates[1]
+            elif not trip["end_date"]:
+                trip["end_date"] = dates[0]
+        if facts.get("destination") and not trip["destination"]:
+            trip["destination"] = facts["destination"]
+        if "budget" in facts and not trip["budget"]:
+            trip["budget"] = facts["budget"]
+        if "passengers" in facts and trip["passengers"] == 1:
+            trip["passengers"] = facts["passengers"]
+    return trip